@@ -4,18 +4,43 @@ Call Wrapped 2025 - Your calling habits across Phone, FaceTime & WhatsApp, expos
 Usage: python3 call_wrapped.py
 """
 
-import sqlite3, os, sys, re, subprocess, argparse, glob, threading, time
-from datetime import datetime, timedelta
+import sqlite3, os, sys, glob, threading, time, atexit, heapq, pickle
+from operator import itemgetter
+from itertools import chain
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 # Database paths
 CALL_HISTORY_DB = os.path.expanduser("~/Library/Application Support/CallHistoryDB/CallHistory.storedata")
 WHATSAPP_CALLS_DB = os.path.expanduser("~/Library/Group Containers/group.net.whatsapp.WhatsApp.shared/CallHistory.sqlite")
 ADDRESSBOOK_DIR = os.path.expanduser("~/Library/Application Support/AddressBook")
+# Parsed contacts from the last run, reused while the AddressBook files are unchanged
+CONTACTS_CACHE = os.path.expanduser("~/.cache/wrap2025/call_contacts.pickle")
+CONTACTS_CACHE_FORMAT = 2  # bump when the cached contact keys change shape
 
 # Mac epoch offset (Jan 1, 2001 -> Jan 1, 1970)
 MAC_EPOCH = 978307200
 
+# ZCALLTYPE -> (platform, is_video): 1=Phone, 8=FaceTime Audio, 16=FaceTime Video
+CALL_TYPES = {8: ('FaceTime', False), 16: ('FaceTime', True)}
+PHONE_CALL_TYPE = ('Phone', False)
+
+# Per-platform display: icon in name badges, label color on the summary card
+PLATFORM_ICONS = {'Phone': '📱', 'FaceTime': '📹', 'WhatsApp': '💬'}
+PLATFORM_COLORS = {'Phone': '#4ade80', 'FaceTime': '#22d3ee', 'WhatsApp': '#25d366'}
+
+# Proleptic ordinal of Jan 1, 1970 (for turning epoch day numbers into dates)
+UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Callback-speed buckets: upper bounds in minutes, then (label, color class) for each bucket
+CALLBACK_SPEED_BOUNDS = (5, 30, 120)
+CALLBACK_SPEEDS = (("LIGHTNING", "green"), ("RESPONSIVE", "cyan"), ("EVENTUALLY", "yellow"), ("WHENEVER", "red"))
+
+# Pre-rendered small counts (most per-day call counts are tiny)
+SMALL_INTS = tuple(str(i) for i in range(256))
+
 # Timestamps for 2025
 TS_2025_START = datetime(2025, 1, 1).timestamp()
 TS_2025_END = datetime(2025, 12, 31, 23, 59, 59).timestamp()
@@ -27,33 +52,50 @@ TS_2024_END = datetime(2024, 12, 31, 23, 59, 59).timestamp()
 TS_JUN_2024 = datetime(2024, 6, 1).timestamp()
 
 
+class DigitTable(dict):
+    """str.translate table that deletes every non-digit (same set as regex \\D)."""
+    def __missing__(self, codepoint):
+        value = codepoint if chr(codepoint).isdecimal() else None
+        self[codepoint] = value
+        return value
+
+
+DIGIT_TABLE = DigitTable()
+
+
 class Spinner:
     """Animated terminal spinner for long operations"""
     def __init__(self, message=""):
         self.message = message
-        self.spinning = False
+        self.stop_event = threading.Event()
         self.thread = None
         self.frames = ['⣾', '⣽', '⣻', '⢿', '⡿', '⣟', '⣯', '⣷']
+        self.animate = sys.stdout.isatty()  # don't spam frames into pipes/logs
 
     def spin(self):
         i = 0
-        while self.spinning:
+        while True:
             frame = self.frames[i % len(self.frames)]
             print(f"\r    {frame} {self.message}", end='', flush=True)
-            time.sleep(0.1)
+            # Wakes immediately on stop() instead of finishing a sleep
+            if self.stop_event.wait(0.1):
+                break
             i += 1
 
     def start(self, message=None):
         if message:
             self.message = message
-        self.spinning = True
-        self.thread = threading.Thread(target=self.spin)
+        if not self.animate:
+            return  # no thread at all when there's no terminal to draw on
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.spin, daemon=True)
         self.thread.start()
 
     def stop(self, final_message=None):
-        self.spinning = False
+        self.stop_event.set()
         if self.thread:
             self.thread.join()
+            self.thread = None
         if final_message:
             print(f"\r    ✓ {final_message}".ljust(60))
         else:
@@ -64,7 +106,7 @@ def normalize_phone(phone):
     """Normalize phone number to last 10 digits."""
     if not phone:
         return None
-    digits = re.sub(r'\D', '', str(phone))
+    digits = str(phone).translate(DIGIT_TABLE)
     if len(digits) == 11 and digits.startswith('1'):
         digits = digits[1:]
     elif len(digits) > 10:
@@ -72,37 +114,97 @@ def normalize_phone(phone):
     return digits[-10:] if len(digits) >= 10 else (digits if len(digits) >= 7 else None)
 
 
+def local_utc_offset(ts, cache):
+    """Local UTC offset in seconds for a Unix timestamp, cached per UTC day."""
+    utc_day = int(ts // 86400)
+    offset = cache.get(utc_day)
+    if offset is None:
+        start = time.localtime(utc_day * 86400).tm_gmtoff
+        end = time.localtime(utc_day * 86400 + 86399).tm_gmtoff
+        # A DST switch happens inside this day: resolve each timestamp directly
+        offset = cache[utc_day] = start if start == end else False
+    if offset is False:
+        return time.localtime(ts).tm_gmtoff
+    return offset
+
+
+def read_contact_shard(db_path):
+    """Return (phone key, name) pairs from one AddressBook database."""
+    pairs = []
+    append = pairs.append
+    try:
+        conn = open_readonly(db_path)
+        people = {}
+        for row in conn.execute("SELECT ROWID, ZFIRSTNAME, ZLASTNAME FROM ZABCDRECORD WHERE ZFIRSTNAME IS NOT NULL OR ZLASTNAME IS NOT NULL"):
+            name = f"{row[1] or ''} {row[2] or ''}".strip()
+            if name:
+                # Interned: names key many dicts/sets downstream, so equal names
+                # share one object and compare by identity
+                people[row[0]] = sys.intern(name)
+        for owner, phone in conn.execute("SELECT ZOWNER, ZFULLNUMBER FROM ZABCDPHONENUMBER WHERE ZFULLNUMBER IS NOT NULL"):
+            if owner in people:
+                name = people[owner]
+                digits = str(phone).translate(DIGIT_TABLE)
+                # The full number for exact matches, plus the last 10 digits
+                # (covers +1/country-code variants) and last 7 (local numbers)
+                if digits:
+                    append((digits, name))
+                    if len(digits) >= 10:
+                        append((digits[-10:], name))
+                    if len(digits) >= 7:
+                        append((digits[-7:], name))
+        conn.close()
+    except:
+        pass
+    return pairs
+
+
+def contacts_cache_key(db_paths):
+    """Stat signature of the AddressBook files, WAL included (new writes land there first)."""
+    key = [CONTACTS_CACHE_FORMAT]
+    for db_path in db_paths:
+        for path in (db_path, db_path + '-wal'):
+            try:
+                st = os.stat(path)
+                key.append((path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                pass
+    return tuple(key)
+
+
 def extract_contacts():
     """Extract contacts from macOS AddressBook."""
-    contacts = {}
     db_paths = glob.glob(os.path.join(ADDRESSBOOK_DIR, "Sources", "*", "AddressBook-v22.abcddb"))
     main_db = os.path.join(ADDRESSBOOK_DIR, "AddressBook-v22.abcddb")
     if os.path.exists(main_db):
         db_paths.append(main_db)
 
-    for db_path in db_paths:
-        try:
-            conn = sqlite3.connect(db_path)
-            people = {}
-            for row in conn.execute("SELECT ROWID, ZFIRSTNAME, ZLASTNAME FROM ZABCDRECORD WHERE ZFIRSTNAME IS NOT NULL OR ZLASTNAME IS NOT NULL"):
-                name = f"{row[1] or ''} {row[2] or ''}".strip()
-                if name:
-                    people[row[0]] = name
-            for owner, phone in conn.execute("SELECT ZOWNER, ZFULLNUMBER FROM ZABCDPHONENUMBER WHERE ZFULLNUMBER IS NOT NULL"):
-                if owner in people:
-                    name = people[owner]
-                    digits = re.sub(r'\D', '', str(phone))
-                    if digits:
-                        contacts[digits] = name
-                        if len(digits) >= 10:
-                            contacts[digits[-10:]] = name
-                        if len(digits) >= 7:
-                            contacts[digits[-7:]] = name
-                        if len(digits) == 11 and digits.startswith('1'):
-                            contacts[digits[1:]] = name
-            conn.close()
-        except:
-            pass
+    # Reuse the last run's contacts if no AddressBook file has changed since
+    key = contacts_cache_key(db_paths)
+    try:
+        with open(CONTACTS_CACHE, 'rb') as f:
+            cached_key, contacts = pickle.load(f)
+        if cached_key == key:
+            return contacts
+    except:
+        pass
+
+    # Read the shards in parallel; map() keeps their order, so when the same
+    # number appears in several shards the later one still wins
+    with ThreadPoolExecutor(max_workers=min(len(db_paths), 4) or 1) as pool:
+        shards = list(pool.map(read_contact_shard, db_paths))
+    # Merge all shards in one dict build (duplicates collapse, last wins)
+    contacts = dict(chain.from_iterable(shards))
+
+    # Save for next time: owner-only permissions, swapped into place atomically
+    try:
+        os.makedirs(os.path.dirname(CONTACTS_CACHE), exist_ok=True)
+        tmp_path = f"{CONTACTS_CACHE}.{os.getpid()}.tmp"
+        with os.fdopen(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as f:
+            pickle.dump((key, contacts), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, CONTACTS_CACHE)
+    except:
+        pass
     return contacts
 
 
@@ -110,7 +212,7 @@ def get_name(phone, contacts):
     """Resolve phone number to contact name."""
     if not phone:
         return None
-    digits = re.sub(r'\D', '', str(phone))
+    digits = str(phone).translate(DIGIT_TABLE)
 
     # Skip short codes
     if 5 <= len(digits) <= 6:
@@ -122,9 +224,6 @@ def get_name(phone, contacts):
 
     if digits in contacts:
         return contacts[digits]
-    if len(digits) == 11 and digits.startswith('1'):
-        if digits[1:] in contacts:
-            return contacts[digits[1:]]
     if len(digits) >= 10 and digits[-10:] in contacts:
         return contacts[digits[-10:]]
     if len(digits) >= 7 and digits[-7:] in contacts:
@@ -132,54 +231,94 @@ def get_name(phone, contacts):
     return None
 
 
+# Read-only analytics tuning applied to every connection. journal_mode/synchronous
+# are deliberately left alone: those would write to the system's databases.
+READ_PRAGMAS = (
+    "PRAGMA query_only=ON",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=268435456",
+)
+
+_connections = {}  # db path -> open connection, shared by every query on that db
+
+
+def open_readonly(path, **kwargs):
+    """Open a new connection to a database with READ_PRAGMAS applied."""
+    conn = sqlite3.connect(path, **kwargs)
+    for pragma in READ_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def db_conn(path):
+    """Return the cached connection for a database, opening it on first use."""
+    conn = _connections.get(path)
+    if conn is None:
+        # Connections are opened on the main thread but read from analyzer
+        # threads; each database is only ever used by one thread at a time
+        conn = _connections[path] = open_readonly(path, check_same_thread=False)
+    return conn
+
+
+def close_db(path):
+    """Close and forget the cached connection for a database, if any."""
+    conn = _connections.pop(path, None)
+    if conn is not None:
+        conn.close()
+
+
+@atexit.register
+def close_all_dbs():
+    """Close every cached connection (runs at interpreter exit)."""
+    for path in list(_connections):
+        close_db(path)
+
+
 def check_access():
-    """Check access to call databases. Returns (has_phone, has_whatsapp)."""
+    """Check access to call databases. Returns (has_phone, has_whatsapp).
+
+    Probes each platform's call table with a one-row read, so a denied, empty
+    or differently-shaped database is skipped. The connection is kept open and
+    reused by the real queries.
+    """
     has_phone = False
     has_whatsapp = False
 
     # Check Phone/FaceTime
     if os.path.exists(CALL_HISTORY_DB):
         try:
-            conn = sqlite3.connect(CALL_HISTORY_DB)
-            conn.execute("SELECT 1 FROM ZCALLRECORD LIMIT 1")
-            conn.close()
+            db_conn(CALL_HISTORY_DB).execute("SELECT 1 FROM ZCALLRECORD LIMIT 1")
             has_phone = True
         except:
-            pass
+            close_db(CALL_HISTORY_DB)
 
     # Check WhatsApp
     if os.path.exists(WHATSAPP_CALLS_DB):
         try:
-            conn = sqlite3.connect(WHATSAPP_CALLS_DB)
-            conn.execute("SELECT 1 FROM ZWAAGGREGATECALLEVENT LIMIT 1")
-            conn.close()
+            db_conn(WHATSAPP_CALLS_DB).execute("SELECT 1 FROM ZWAAGGREGATECALLEVENT LIMIT 1")
             has_whatsapp = True
         except:
-            pass
+            close_db(WHATSAPP_CALLS_DB)
 
     if not has_phone and not has_whatsapp:
         print("\n[!] ACCESS DENIED - Neither Phone nor WhatsApp call history accessible")
         print("   System Settings -> Privacy & Security -> Full Disk Access -> Add Terminal")
+        import subprocess
         subprocess.run(['open', 'x-apple.systempreferences:com.apple.preference.security?Privacy_AllFiles'])
         sys.exit(1)
 
     return has_phone, has_whatsapp
 
 
-def q_phone(sql):
+def q_phone(sql, params=()):
     """Query phone call history database."""
-    conn = sqlite3.connect(CALL_HISTORY_DB)
-    r = conn.execute(sql).fetchall()
-    conn.close()
-    return r
+    return db_conn(CALL_HISTORY_DB).execute(sql, params).fetchall()
 
 
-def q_whatsapp(sql):
+def q_whatsapp(sql, params=()):
     """Query WhatsApp call history database."""
-    conn = sqlite3.connect(WHATSAPP_CALLS_DB)
-    r = conn.execute(sql).fetchall()
-    conn.close()
-    return r
+    return db_conn(WHATSAPP_CALLS_DB).execute(sql, params).fetchall()
 
 
 def format_duration(seconds):
@@ -208,37 +347,48 @@ def format_duration_short(seconds):
         return f"{hours}h {mins}m" if mins else f"{hours}h"
 
 
+def rank_items(rows):
+    """Render (num, name, count_class, count) rows as rank-list items."""
+    return ''.join(
+        f'<div class="rank-item"><span class="rank-num">{num}</span><span class="rank-name">{name}</span><span class="{cls}">{count}</span></div>'
+        for num, name, cls, count in rows
+    )
+
+
 def analyze_phone_calls(ts_start, ts_end, ts_jun, contacts):
     """Analyze phone/FaceTime call history."""
     calls = []
 
-    # Get all calls in date range
-    rows = q_phone(f"""
-        SELECT ZADDRESS, ZDURATION, ZDATE, ZORIGINATED, ZANSWERED, ZCALLTYPE
+    # Get all calls in date range (compare raw ZDATE so an index on it can be used;
+    # the epoch shift and NULL durations are handled in the SELECT list, in C).
+    # Iterate the cursor directly so rows stream instead of materializing a list.
+    rows = db_conn(CALL_HISTORY_DB).execute(f"""
+        SELECT ZADDRESS, COALESCE(ZDURATION, 0), ZDATE + {MAC_EPOCH}, ZORIGINATED, ZANSWERED, ZCALLTYPE
         FROM ZCALLRECORD
-        WHERE (ZDATE + {MAC_EPOCH}) > {ts_start} AND (ZDATE + {MAC_EPOCH}) < {ts_end}
+        WHERE ZDATE > ? AND ZDATE < ?
         ORDER BY ZDATE
-    """)
-
-    for row in rows:
-        phone, duration, ts, originated, answered, call_type = row
-        name = get_name(phone, contacts)
+    """, (ts_start - MAC_EPOCH, ts_end - MAC_EPOCH))
+
+    # The same numbers repeat across many calls: resolve each one only once
+    resolved = {}  # raw address -> (name, normalized phone)
+    append = calls.append
+    for phone, duration, ts, originated, answered, call_type in rows:
+        hit = resolved.get(phone)
+        if hit is None:
+            name = get_name(phone, contacts)
+            # Unmatched numbers are dropped below, so only normalize matched ones
+            hit = resolved[phone] = (name, normalize_phone(phone) if name else None)
+        name, norm_phone = hit
         if not name:
             continue
 
-        # Determine call type: 1=Phone, 8=FaceTime Audio, 16=FaceTime Video
-        if call_type in (8, 16):
-            platform = 'FaceTime'
-            is_video = call_type == 16
-        else:
-            platform = 'Phone'
-            is_video = False
+        platform, is_video = CALL_TYPES.get(call_type, PHONE_CALL_TYPE)
 
-        calls.append({
+        append({
             'name': name,
-            'phone': normalize_phone(phone),
-            'duration': duration or 0,
-            'timestamp': ts + MAC_EPOCH,
+            'phone': norm_phone,
+            'duration': duration,
+            'timestamp': ts,
             'outgoing': originated == 1,
             'answered': answered == 1,
             'platform': platform,
@@ -257,54 +407,59 @@ def analyze_whatsapp_calls(ts_start, ts_end, ts_jun, contacts):
     try:
         wa_msg_db = os.path.expanduser("~/Library/Group Containers/group.net.whatsapp.WhatsApp.shared/ChatStorage.sqlite")
         if os.path.exists(wa_msg_db):
-            conn = sqlite3.connect(wa_msg_db)
+            conn = open_readonly(wa_msg_db)
             # Source 1: Push names (user's self-set display name)
             for row in conn.execute("SELECT ZJID, ZPUSHNAME FROM ZWAPROFILEPUSHNAME WHERE ZPUSHNAME IS NOT NULL"):
                 jid, name = row
                 if jid and name:
-                    wa_contacts[jid] = name
+                    wa_contacts[jid] = sys.intern(name)
             # Source 2: Chat session partner names (your saved contact name - higher priority)
             for row in conn.execute("SELECT ZCONTACTJID, ZPARTNERNAME FROM ZWACHATSESSION WHERE ZPARTNERNAME IS NOT NULL"):
                 jid, name = row
                 if jid and name and not name.startswith('+'):  # Skip if it's just a phone number
-                    wa_contacts[jid] = name  # Override push name with your contact name
+                    wa_contacts[jid] = sys.intern(name)  # Override push name with your contact name
             conn.close()
     except:
         pass
 
     # Get all WhatsApp calls from ZWACDCALLEVENT (has duration!)
-    # Join with participant table to get phone number/JID
-    rows = q_whatsapp(f"""
-        SELECT e.ZDURATION, e.ZDATE, e.ZOUTCOME, p.ZJIDSTRING
+    # Join with participant table to get phone number/JID; rows stream from the cursor
+    rows = db_conn(WHATSAPP_CALLS_DB).execute(f"""
+        SELECT COALESCE(e.ZDURATION, 0), e.ZDATE + {MAC_EPOCH}, e.ZOUTCOME, p.ZJIDSTRING
         FROM ZWACDCALLEVENT e
         JOIN ZWACDCALLEVENTPARTICIPANT p ON p.Z1PARTICIPANTS = e.Z_PK
-        WHERE (e.ZDATE + {MAC_EPOCH}) > {ts_start} AND (e.ZDATE + {MAC_EPOCH}) < {ts_end}
+        WHERE e.ZDATE > ? AND e.ZDATE < ?
         ORDER BY e.ZDATE
-    """)
-
-    for row in rows:
-        duration, ts, outcome, jid = row
-
-        # Handle both @s.whatsapp.net (phone) and @lid (internal ID) formats
-        phone = jid.split('@')[0] if jid else None
-        name = None
-
-        # Try WhatsApp contacts first
-        if jid in wa_contacts:
-            name = wa_contacts[jid]
-        # Try AddressBook lookup by phone number
-        if not name and phone:
-            name = get_name(phone, contacts)
+    """, (ts_start - MAC_EPOCH, ts_end - MAC_EPOCH))
+
+    # The same JIDs repeat across many calls: resolve each one only once
+    resolved = {}  # JID -> (name, normalized phone)
+    append = calls.append
+    for duration, ts, outcome, jid in rows:
+        hit = resolved.get(jid)
+        if hit is None:
+            # Handle both @s.whatsapp.net (phone) and @lid (internal ID) formats
+            phone = jid.split('@')[0] if jid else None
+            name = None
+
+            # Try WhatsApp contacts first
+            if jid in wa_contacts:
+                name = wa_contacts[jid]
+            # Try AddressBook lookup by phone number
+            if not name and phone:
+                name = get_name(phone, contacts)
+            hit = resolved[jid] = (name, normalize_phone(phone) if name else None)
+        name, norm_phone = hit
         if not name:
             continue
 
-        calls.append({
+        append({
             'name': name,
-            'phone': normalize_phone(phone),
-            'duration': duration or 0,
-            'timestamp': ts + MAC_EPOCH,
+            'phone': norm_phone,
+            'duration': duration,
+            'timestamp': ts,
             'outgoing': True,  # Direction not in this table
-            'answered': (duration or 0) > 0,  # Has duration = was answered
+            'answered': duration > 0,  # Has duration = was answered
             'platform': 'WhatsApp',
             'is_video': False,  # Video flag not in this table
         })
@@ -314,19 +469,17 @@ def analyze_whatsapp_calls(ts_start, ts_end, ts_jun, contacts):
 
 def analyze_calls(phone_calls, whatsapp_calls, ts_start, ts_end, ts_jun):
     """Combine and analyze all calls."""
-    all_calls = phone_calls + whatsapp_calls
-    all_calls.sort(key=lambda x: x['timestamp'])
+    # Both inputs are already in time order (ORDER BY ZDATE), so merge instead of sorting
+    all_calls = list(heapq.merge(phone_calls, whatsapp_calls, key=itemgetter('timestamp')))
 
     # === FIRST: Build name normalization map ===
     # Step 1: Phone-based matching (same phone = same person)
+    # c['phone'] is already normalize_phone() output: 7-10 digits or None
     phone_to_names = defaultdict(set)
     for c in all_calls:
         phone = c['phone']
         if phone:
-            digits = re.sub(r'\D', '', str(phone))
-            key = digits[-10:] if len(digits) >= 7 else None
-            if key:
-                phone_to_names[key].add(c['name'])
+            phone_to_names[phone].add(c['name'])
 
     name_normalize = {}
     for key, names in phone_to_names.items():
@@ -340,6 +493,11 @@ def analyze_calls(phone_calls, whatsapp_calls, ts_start, ts_end, ts_jun):
     normalized_names = set(name_normalize.values())
     all_target_names = all_names | normalized_names
 
+    # Sorted (lowercase, stripped) target names: every name with a given prefix
+    # sits in one contiguous run, found by bisect instead of scanning all targets
+    sorted_targets = sorted((t.strip().lower(), t.strip()) for t in all_target_names)
+    sorted_keys = [lower for lower, _ in sorted_targets]
+
     # Build first-name index for reverse lookup
     first_name_to_full = {}
     for full_name in all_target_names:
@@ -358,11 +516,13 @@ def analyze_calls(phone_calls, whatsapp_calls, ts_start, ts_end, ts_jun):
 
         # Method 1: Check if any full name starts with this name + space
         matches = []
-        for target in all_target_names:
-            target_clean = target.strip()
-            target_lower = target_clean.lower()
-            if target_lower.startswith(name_lower + ' ') and len(target_clean) > len(name_clean):
+        prefix = name_lower + ' '
+        i = bisect_left(sorted_keys, prefix)
+        while i < len(sorted_keys) and sorted_keys[i].startswith(prefix):
+            target_clean = sorted_targets[i][1]
+            if len(target_clean) > len(name_clean):
                 matches.append(target_clean)
+            i += 1
 
         # Method 2: If name is a single word, check first-name index
         if not matches and ' ' not in name_clean:
@@ -375,22 +535,168 @@ def analyze_calls(phone_calls, whatsapp_calls, ts_start, ts_end, ts_jun):
         if len(matches) == 1:
             name_normalize[name] = matches[0]
 
-    # Normalize all call names for consistent analytics
+    # Normalize all call names for consistent analytics (once per distinct name)
+    canonical = {}
     for c in all_calls:
-        c['name'] = name_normalize.get(c['name'].strip(), c['name'].strip())
+        raw = c['name']
+        name = canonical.get(raw)
+        if name is None:
+            stripped = raw.strip()
+            name = canonical[raw] = name_normalize.get(stripped, stripped)
+        c['name'] = name
 
     d = {}
 
-    # Basic stats (note: WhatsApp direction unknown, so outgoing/incoming skewed)
+    # === Single pass: update every per-call accumulator at once ===
     total_calls = len(all_calls)
-    # Only count direction for Phone/FaceTime where we have accurate data
-    phone_ft_calls = [c for c in all_calls if c['platform'] != 'WhatsApp']
-    outgoing = sum(1 for c in phone_ft_calls if c['outgoing'])
-    incoming = sum(1 for c in phone_ft_calls if not c['outgoing'])
-    answered = sum(1 for c in all_calls if c['answered'])
-    missed = total_calls - answered
-    total_duration = sum(c['duration'] for c in all_calls)
+    outgoing = 0
+    incoming = 0
+    answered = 0
+    answered_duration = 0
+    total_duration = 0
+    video_calls = 0
+    weekday_calls = 0
+    h1_calls = 0
+    quick_calls = 0
+    normal_calls = 0
+    long_calls = 0
+    longest = None
+    hour_counts = [0] * 24
+    day_counts = [0] * 7  # indexed like strftime('%w'): 0 = Sunday
+    # Buckets in order of first appearance, so ties go to the earliest seen
+    hour_order = []
+    day_order = []
+    monthly_counts_by_idx = [0] * 12
+    monthly_duration_by_idx = [0] * 12
+
+    # Plain dicts filled on first sight (no defaultdict factory call per lookup)
+    platform_stats = {}
+    # Top contacts by call count - key by phone number to deduplicate
+    phone_stats = {}
+    night_owl_stats = defaultdict(int)
+    early_bird_stats = defaultdict(int)
+    missed_from = defaultdict(int)
+    unanswered_to = {}  # name -> [attempts, answered]
+    inbound_from = defaultdict(int)
+    contact_h1_h2 = {}  # name -> [h1 calls, h2 calls]
+    call_times_to = defaultdict(list)  # name -> list of outgoing call timestamps
+    missed_incoming = []  # (name, timestamp) of missed Phone/FaceTime calls, in time order
+    utc_offsets = {}  # UTC day -> local offset, see local_utc_offset()
+    # Month index of every local day in the range, looked up by day number - first_day
+    first_date = datetime.fromtimestamp(ts_start).date()
+    first_day = first_date.toordinal() - UNIX_EPOCH_ORDINAL
+    n_days = datetime.fromtimestamp(ts_end).date().toordinal() - first_date.toordinal() + 1
+    month_lut = [date.fromordinal(first_date.toordinal() + i).month - 1 for i in range(n_days)]
+    calls_by_day = [0] * n_days  # dense per-day counts, same indexing
+    name_days = defaultdict(set)  # name -> local day numbers with a call (for streaks)
 
+    for c in all_calls:
+        name = c['name']
+        ts = c['timestamp']
+        duration = c['duration']
+        platform = c['platform']
+        is_outgoing = c['outgoing']
+        is_answered = c['answered']
+        # Local calendar fields via integer math instead of datetime/strftime per call
+        offset = utc_offsets.get(int(ts // 86400))
+        if offset is None or offset is False:  # cache miss or a DST-switch day
+            offset = local_utc_offset(ts, utc_offsets)
+        local = ts + offset
+        day_num = int(local // 86400)
+        hour = int(local // 3600) % 24
+        weekday = (day_num + 3) % 7  # Jan 1, 1970 was a Thursday
+        day_idx = day_num - first_day
+        month_idx = month_lut[day_idx]
+
+        total_duration += duration
+        video_calls += c['is_video']  # bools add as 0/1, no branch needed
+        if longest is None or duration > longest['duration']:
+            longest = c
+
+        ps = platform_stats.get(platform)
+        if ps is None:
+            ps = platform_stats[platform] = {'count': 0, 'duration': 0}
+        ps['count'] += 1
+        ps['duration'] += duration
+
+        # Use the normalized phone (last 10 digits) as key for consistent matching
+        # across platforms, falling back to name if no valid phone
+        key = c['phone'] or f"name:{name}"
+        cs = phone_stats.get(key)
+        if cs is None:
+            cs = phone_stats[key] = {
+                'count': 0, 'duration': 0, 'outgoing': 0, 'incoming': 0,
+                'answered': 0, 'missed': 0, 'platforms': set(), 'names': set()
+            }
+        cs['count'] += 1
+        cs['duration'] += duration
+
+        # Direction is only known for Phone/FaceTime
+        if platform != 'WhatsApp':
+            if is_outgoing:
+                outgoing += 1
+                cs['outgoing'] += 1
+                ua = unanswered_to.get(name)
+                if ua is None:
+                    ua = unanswered_to[name] = [0, 0]
+                ua[0] += 1
+                if is_answered:
+                    ua[1] += 1
+                call_times_to[name].append(ts)
+            else:
+                incoming += 1
+                cs['incoming'] += 1
+                inbound_from[name] += 1
+                if not is_answered:
+                    missed_from[name] += 1
+                    missed_incoming.append((name, ts))
+
+        if is_answered:
+            answered += 1
+            answered_duration += duration
+            cs['answered'] += 1
+            # Call duration buckets (quick <2min, normal 2-15min, marathon 15min+)
+            if duration < 120:
+                quick_calls += 1
+            elif duration < 900:
+                normal_calls += 1
+            else:
+                long_calls += 1
+        else:
+            cs['missed'] += 1
+        cs['platforms'].add(platform)
+        cs['names'].add(name)
+
+        if not hour_counts[hour]:
+            hour_order.append(hour)
+        hour_counts[hour] += 1
+        dow = (weekday + 1) % 7
+        if not day_counts[dow]:
+            day_order.append(dow)
+        day_counts[dow] += 1
+        weekday_calls += weekday < 5
+        # Night owl calls (midnight - 5am) and early bird calls (6-9am)
+        if hour < 5:
+            night_owl_stats[name] += 1
+        elif 6 <= hour <= 9:
+            early_bird_stats[name] += 1
+
+        calls_by_day[day_idx] += 1
+        name_days[name].add(day_num)
+        monthly_counts_by_idx[month_idx] += 1
+        monthly_duration_by_idx[month_idx] += duration
+
+        halves = contact_h1_h2.get(name)
+        if halves is None:
+            halves = contact_h1_h2[name] = [0, 0]
+        if ts < ts_jun:
+            h1_calls += 1
+            halves[0] += 1
+        else:
+            halves[1] += 1
+
+    # Basic stats (note: WhatsApp direction unknown, so outgoing/incoming skewed)
+    missed = total_calls - answered
     d['stats'] = {
         'total': total_calls,
         'outgoing': outgoing,
@@ -401,45 +707,12 @@ def analyze_calls(phone_calls, whatsapp_calls, ts_start, ts_end, ts_jun):
     }
 
     # Platform breakdown
-    platform_stats = defaultdict(lambda: {'count': 0, 'duration': 0})
-    for c in all_calls:
-        platform_stats[c['platform']]['count'] += 1
-        platform_stats[c['platform']]['duration'] += c['duration']
-    d['platforms'] = dict(platform_stats)
+    d['platforms'] = platform_stats
 
     # Video vs voice (only accurate for Phone/FaceTime)
-    video_calls = sum(1 for c in all_calls if c['is_video'])
     voice_calls = total_calls - video_calls
     d['video_voice'] = {'video': video_calls, 'voice': voice_calls}
 
-    # Top contacts by call count - key by phone number to deduplicate
-    phone_stats = defaultdict(lambda: {
-        'count': 0, 'duration': 0, 'outgoing': 0, 'incoming': 0,
-        'answered': 0, 'missed': 0, 'platforms': set(), 'names': set()
-    })
-    for c in all_calls:
-        # Use last 10 digits of phone as key for consistent matching across platforms
-        phone = c['phone']
-        if phone:
-            digits = re.sub(r'\D', '', str(phone))
-            key = digits[-10:] if len(digits) >= 7 else None
-        else:
-            key = None
-        # Fall back to name if no valid phone
-        if not key:
-            key = f"name:{c['name']}"
-        cs = phone_stats[key]
-        cs['count'] += 1
-        cs['duration'] += c['duration']
-        # Only count direction for Phone/FaceTime
-        if c['platform'] != 'WhatsApp':
-            cs['outgoing'] += 1 if c['outgoing'] else 0
-            cs['incoming'] += 0 if c['outgoing'] else 1
-        cs['answered'] += 1 if c['answered'] else 0
-        cs['missed'] += 0 if c['answered'] else 1
-        cs['platforms'].add(c['platform'])
-        cs['names'].add(c['name'])
-
     # Convert to contact_stats with best display name, MERGING entries with same name
     contact_stats = {}
     for key, stats in phone_stats.items():
@@ -492,86 +765,52 @@ def analyze_calls(phone_calls, whatsapp_calls, ts_start, ts_end, ts_jun):
                 'platforms': platforms
             }
 
+    # Top-N lists use heapq.nlargest/nsmallest: a bounded heap instead of sorting
+    # every entry, with the same tie order as sorted(...)[:n]
     # Top 10 by call count
-    top_by_count = sorted(contact_stats.items(), key=lambda x: x[1]['count'], reverse=True)[:10]
+    top_by_count = heapq.nlargest(10, contact_stats.items(), key=lambda x: x[1]['count'])
     d['top_count'] = [(name, stats) for name, stats in top_by_count]
 
     # Top 10 by duration
-    top_by_duration = sorted(contact_stats.items(), key=lambda x: x[1]['duration'], reverse=True)[:10]
+    top_by_duration = heapq.nlargest(10, contact_stats.items(), key=lambda x: x[1]['duration'])
     d['top_duration'] = [(name, stats) for name, stats in top_by_duration]
 
     # Longest single call
-    if all_calls:
-        longest = max(all_calls, key=lambda x: x['duration'])
-        d['longest_call'] = longest
-    else:
-        d['longest_call'] = None
+    d['longest_call'] = longest
 
     # Peak hour
-    hour_counts = defaultdict(int)
-    for c in all_calls:
-        hour = datetime.fromtimestamp(c['timestamp']).hour
-        hour_counts[hour] += 1
-    if hour_counts:
-        peak_hour = max(hour_counts.items(), key=lambda x: x[1])[0]
-        d['peak_hour'] = peak_hour
+    if total_calls:
+        d['peak_hour'] = max(hour_order, key=hour_counts.__getitem__)
     else:
         d['peak_hour'] = 12
 
     # Peak day of week
-    day_counts = defaultdict(int)
     days = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
-    for c in all_calls:
-        day = datetime.fromtimestamp(c['timestamp']).strftime('%w')
-        day_counts[int(day)] += 1
-    if day_counts:
-        peak_day = max(day_counts.items(), key=lambda x: x[1])[0]
-        d['peak_day'] = days[peak_day]
+    if total_calls:
+        d['peak_day'] = days[max(day_order, key=day_counts.__getitem__)]
     else:
         d['peak_day'] = 'Unknown'
 
     # Night owl calls (midnight - 5am)
-    night_owl_stats = defaultdict(int)
-    for c in all_calls:
-        hour = datetime.fromtimestamp(c['timestamp']).hour
-        if hour < 5:
-            night_owl_stats[c['name']] += 1
-    night_owls = sorted(night_owl_stats.items(), key=lambda x: x[1], reverse=True)[:5]
+    night_owls = heapq.nlargest(5, night_owl_stats.items(), key=lambda x: x[1])
     d['night_owls'] = night_owls
 
     # Early bird calls (6-9am)
-    early_bird_stats = defaultdict(int)
-    for c in all_calls:
-        hour = datetime.fromtimestamp(c['timestamp']).hour
-        if 6 <= hour <= 9:
-            early_bird_stats[c['name']] += 1
-    early_birds = sorted(early_bird_stats.items(), key=lambda x: x[1], reverse=True)[:5]
+    early_birds = heapq.nlargest(5, early_bird_stats.items(), key=lambda x: x[1])
     d['early_birds'] = early_birds
 
     # Missed call king (who you miss calls from most) - Phone/FaceTime only (has direction)
-    missed_from = defaultdict(int)
-    for c in all_calls:
-        if c['platform'] != 'WhatsApp' and not c['answered'] and not c['outgoing']:
-            missed_from[c['name']] += 1
-    missed_kings = sorted(missed_from.items(), key=lambda x: x[1], reverse=True)[:5]
+    missed_kings = heapq.nlargest(5, missed_from.items(), key=lambda x: x[1])
     d['missed_kings'] = missed_kings
 
     # Call avoider (who you call but doesn't answer) - Phone/FaceTime only
-    unanswered_to = defaultdict(lambda: {'attempts': 0, 'answered': 0})
-    for c in all_calls:
-        if c['platform'] != 'WhatsApp' and c['outgoing']:
-            unanswered_to[c['name']]['attempts'] += 1
-            if c['answered']:
-                unanswered_to[c['name']]['answered'] += 1
-
     avoiders = []
-    for name, stats in unanswered_to.items():
-        if stats['attempts'] >= 3:  # Lower threshold since Phone/FaceTime only
-            miss_rate = (stats['attempts'] - stats['answered']) / stats['attempts']
+    for name, (attempts, picked_up) in unanswered_to.items():
+        if attempts >= 3:  # Lower threshold since Phone/FaceTime only
+            miss_rate = (attempts - picked_up) / attempts
             if miss_rate > 0.5:
-                avoiders.append((name, stats['attempts'] - stats['answered'], stats['attempts']))
-    avoiders.sort(key=lambda x: x[1], reverse=True)
-    d['avoiders'] = avoiders[:5]
+                avoiders.append((name, attempts - picked_up, attempts))
+    d['avoiders'] = heapq.nlargest(5, avoiders, key=lambda x: x[1])
 
     # Speed dialer (shortest avg call duration)
     avg_durations = []
@@ -579,20 +818,17 @@ def analyze_calls(phone_calls, whatsapp_calls, ts_start, ts_end, ts_jun):
         if stats['count'] >= 5 and stats['duration'] > 0:
             avg = stats['duration'] / stats['count']
             avg_durations.append((name, avg, stats['count']))
-    avg_durations.sort(key=lambda x: x[1])
-    d['speed_dialers'] = avg_durations[:5]
+    d['speed_dialers'] = heapq.nsmallest(5, avg_durations, key=lambda x: x[1])
 
     # Marathon talkers (longest avg call duration)
-    marathon_talkers = sorted(avg_durations, key=lambda x: x[1], reverse=True)[:5]
+    marathon_talkers = heapq.nlargest(5, avg_durations, key=lambda x: x[1])
     d['marathon_talkers'] = marathon_talkers
 
     # Busiest day
-    daily_counts = defaultdict(int)
-    for c in all_calls:
-        day_str = datetime.fromtimestamp(c['timestamp']).strftime('%Y-%m-%d')
-        daily_counts[day_str] += 1
-
-    d['daily_counts'] = dict(daily_counts)
+    # Days with calls, keyed by local date ordinal (in date order)
+    first_ord = first_date.toordinal()
+    daily_counts = {first_ord + i: n for i, n in enumerate(calls_by_day) if n}
+    d['daily_counts'] = daily_counts
 
     if daily_counts:
         busiest_day = max(daily_counts.items(), key=lambda x: x[1])
@@ -601,42 +837,28 @@ def analyze_calls(phone_calls, whatsapp_calls, ts_start, ts_end, ts_jun):
         d['busiest_day'] = None
 
     # H1 vs H2 comparison
-    h1_calls = sum(1 for c in all_calls if c['timestamp'] < ts_jun)
-    h2_calls = sum(1 for c in all_calls if c['timestamp'] >= ts_jun)
+    h2_calls = total_calls - h1_calls
     d['h1_h2'] = {'h1': h1_calls, 'h2': h2_calls}
 
     # Heating up (more calls in H2)
-    contact_h1_h2 = defaultdict(lambda: {'h1': 0, 'h2': 0})
-    for c in all_calls:
-        if c['timestamp'] < ts_jun:
-            contact_h1_h2[c['name']]['h1'] += 1
-        else:
-            contact_h1_h2[c['name']]['h2'] += 1
-
     heating_up = []
-    for name, stats in contact_h1_h2.items():
-        if stats['h1'] >= 3 and stats['h2'] > stats['h1'] * 1.5:
-            heating_up.append((name, stats['h1'], stats['h2']))
-    heating_up.sort(key=lambda x: x[2] - x[1], reverse=True)
-    d['heating_up'] = heating_up[:5]
+    for name, (h1, h2) in contact_h1_h2.items():
+        if h1 >= 3 and h2 > h1 * 1.5:
+            heating_up.append((name, h1, h2))
+    d['heating_up'] = heapq.nlargest(5, heating_up, key=lambda x: x[2] - x[1])
 
     # Cooling down (less calls in H2)
     cooling_down = []
-    for name, stats in contact_h1_h2.items():
-        if stats['h1'] >= 5 and stats['h2'] < stats['h1'] * 0.5:
-            cooling_down.append((name, stats['h1'], stats['h2']))
-    cooling_down.sort(key=lambda x: x[1] - x[2], reverse=True)
-    d['cooling_down'] = cooling_down[:5]
+    for name, (h1, h2) in contact_h1_h2.items():
+        if h1 >= 5 and h2 < h1 * 0.5:
+            cooling_down.append((name, h1, h2))
+    d['cooling_down'] = heapq.nlargest(5, cooling_down, key=lambda x: x[1] - x[2])
 
     # Monthly breakdown
-    monthly_counts = defaultdict(int)
-    monthly_duration = defaultdict(int)
-    for c in all_calls:
-        month = datetime.fromtimestamp(c['timestamp']).strftime('%b')
-        monthly_counts[month] += 1
-        monthly_duration[month] += c['duration']
-    d['monthly_counts'] = dict(monthly_counts)
-    d['monthly_duration'] = dict(monthly_duration)
+    months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+    monthly_counts = {months[i]: n for i, n in enumerate(monthly_counts_by_idx) if n}
+    d['monthly_counts'] = monthly_counts
+    d['monthly_duration'] = {months[i]: monthly_duration_by_idx[i] for i, n in enumerate(monthly_counts_by_idx) if n}
 
     # Busiest month
     if monthly_counts:
@@ -670,28 +892,19 @@ def analyze_calls(phone_calls, whatsapp_calls, ts_start, ts_end, ts_jun):
         d['first_call'] = None
 
     # Who calls YOU most (biggest fan - inbound only, Phone/FaceTime only since WhatsApp has no direction)
-    inbound_from = defaultdict(int)
-    for c in all_calls:
-        if c['platform'] != 'WhatsApp' and not c['outgoing']:
-            inbound_from[c['name']] += 1
-    biggest_fans = sorted(inbound_from.items(), key=lambda x: x[1], reverse=True)[:5]
+    biggest_fans = heapq.nlargest(5, inbound_from.items(), key=lambda x: x[1])
     d['biggest_fans'] = biggest_fans
 
     # Longest streak (consecutive days calling same person)
     streaks = {}
     for name in contact_stats.keys():
-        person_dates = sorted(set(
-            datetime.fromtimestamp(c['timestamp']).strftime('%Y-%m-%d')
-            for c in all_calls if c['name'] == name
-        ))
-        if len(person_dates) < 2:
+        person_days = sorted(name_days.get(name, ()))
+        if len(person_days) < 2:
             continue
         max_streak = 1
         current_streak = 1
-        for i in range(1, len(person_dates)):
-            d1 = datetime.strptime(person_dates[i-1], '%Y-%m-%d')
-            d2 = datetime.strptime(person_dates[i], '%Y-%m-%d')
-            if (d2 - d1).days == 1:
+        for prev_day, day in zip(person_days, person_days[1:]):
+            if day - prev_day == 1:
                 current_streak += 1
                 max_streak = max(max_streak, current_streak)
             else:
@@ -705,44 +918,30 @@ def analyze_calls(phone_calls, whatsapp_calls, ts_start, ts_end, ts_jun):
         d['longest_streak'] = None
 
     # Weekday vs Weekend breakdown
-    weekday_calls = sum(1 for c in all_calls if datetime.fromtimestamp(c['timestamp']).weekday() < 5)
     weekend_calls = total_calls - weekday_calls
     d['weekday_weekend'] = {'weekday': weekday_calls, 'weekend': weekend_calls}
 
     # Call duration buckets (quick <2min, normal 2-15min, marathon 15min+)
-    quick_calls = sum(1 for c in all_calls if c['answered'] and c['duration'] < 120)
-    normal_calls = sum(1 for c in all_calls if c['answered'] and 120 <= c['duration'] < 900)
-    long_calls = sum(1 for c in all_calls if c['answered'] and c['duration'] >= 900)
     d['duration_buckets'] = {'quick': quick_calls, 'normal': normal_calls, 'marathon': long_calls}
 
-    # Ghost protocol (missed calls you never returned) - Phone/FaceTime only
-    # Build set of people you called (outgoing) - include all platforms for callback detection
-    call_times_to = defaultdict(list)  # name -> list of outgoing call timestamps
-    for c in all_calls:
-        if c['platform'] != 'WhatsApp' and c['outgoing']:
-            call_times_to[c['name']].append(c['timestamp'])
-
-    # Find missed calls you never returned (Phone/FaceTime only for incoming detection)
+    # Ghost protocol (missed calls you never returned) and call back speed
+    # (avg time to return missed calls, in minutes) - Phone/FaceTime only
     ghosts = defaultdict(int)
-    for c in all_calls:
-        if c['platform'] != 'WhatsApp' and not c['outgoing'] and not c['answered']:
-            # Check if you ever called them back after this
-            later_calls = [t for t in call_times_to.get(c['name'], []) if t > c['timestamp']]
-            if not later_calls:
-                ghosts[c['name']] += 1
-    ghost_list = sorted(ghosts.items(), key=lambda x: x[1], reverse=True)[:5]
+    callback_times = []
+    for name, ts in missed_incoming:
+        # Check if you ever called them back after this (call_times_to lists are
+        # in time order, so the first callback is found by binary search)
+        times = call_times_to.get(name, ())
+        i = bisect_right(times, ts)
+        if i == len(times):
+            ghosts[name] += 1
+            continue
+        callback_time = (times[i] - ts) / 60  # minutes
+        if callback_time < 1440:  # within 24 hours
+            callback_times.append(callback_time)
+    ghost_list = heapq.nlargest(5, ghosts.items(), key=lambda x: x[1])
     d['ghosts'] = ghost_list
 
-    # Call back speed (avg time to return missed calls, in minutes) - Phone/FaceTime only
-    callback_times = []
-    for c in all_calls:
-        if c['platform'] != 'WhatsApp' and not c['outgoing'] and not c['answered']:
-            # Find first outgoing call to this person after the missed call
-            later_calls = [t for t in call_times_to.get(c['name'], []) if t > c['timestamp']]
-            if later_calls:
-                callback_time = (min(later_calls) - c['timestamp']) / 60  # minutes
-                if callback_time < 1440:  # within 24 hours
-                    callback_times.append(callback_time)
     if callback_times:
         d['avg_callback_time'] = round(sum(callback_times) / len(callback_times))
     else:
@@ -750,10 +949,9 @@ def analyze_calls(phone_calls, whatsapp_calls, ts_start, ts_end, ts_jun):
 
     # Calling personality diagnosis
     # Based on: call frequency, duration, missed rate, callback speed, outgoing ratio
-    answered_calls = [c for c in all_calls if c['answered']]
-    avg_duration = sum(c['duration'] for c in answered_calls) / max(len(answered_calls), 1)
-    outgoing_ratio = outgoing / max(total_calls, 1)
-    miss_rate = missed / max(total_calls, 1)
+    avg_duration = answered_duration / (answered or 1)
+    outgoing_ratio = outgoing / (total_calls or 1)
+    miss_rate = missed / (total_calls or 1)
 
     if avg_duration < 60 and total_calls > 200:
         personality = ("THE SPEED DIALER", "You treat calls like texts - quick, efficient, gone")
@@ -780,32 +978,550 @@ def analyze_calls(phone_calls, whatsapp_calls, ts_start, ts_end, ts_jun):
 
 def get_data_coverage(ts_start, ts_end, has_phone, has_whatsapp):
     """Check how much of the year we have data for."""
+    earliest, latest, _ = scan_coverage(ts_start, ts_end, has_phone, has_whatsapp)
+    return earliest, latest
+
+
+def scan_coverage(ts_start, ts_end, has_phone, has_whatsapp, count_calls=False):
+    """Return (earliest, latest, total) for the year.
+
+    With count_calls, total is the number of calls since ts_start, fetched in the
+    same statement as the coverage range (one query per database); otherwise 0.
+    """
     earliest = None
     latest = None
+    total = 0
+    start, end = ts_start - MAC_EPOCH, ts_end - MAC_EPOCH
 
     if has_phone:
-        rows = q_phone(f"""
-            SELECT MIN(ZDATE + {MAC_EPOCH}), MAX(ZDATE + {MAC_EPOCH})
-            FROM ZCALLRECORD
-            WHERE (ZDATE + {MAC_EPOCH}) > {ts_start} AND (ZDATE + {MAC_EPOCH}) < {ts_end}
-        """)
+        if count_calls:
+            # One pass over ZDATE > start gives both the in-year range and the count
+            rows = q_phone(f"""
+                SELECT MIN(CASE WHEN ZDATE < ? THEN ZDATE END) + {MAC_EPOCH},
+                       MAX(CASE WHEN ZDATE < ? THEN ZDATE END) + {MAC_EPOCH},
+                       COUNT(*)
+                FROM ZCALLRECORD
+                WHERE ZDATE > ?
+            """, (end, end, start))
+            total += rows[0][2]
+        else:
+            rows = q_phone(f"""
+                SELECT MIN(ZDATE) + {MAC_EPOCH}, MAX(ZDATE) + {MAC_EPOCH}
+                FROM ZCALLRECORD
+                WHERE ZDATE > ? AND ZDATE < ?
+            """, (start, end))
         if rows and rows[0][0]:
             earliest = rows[0][0]
             latest = rows[0][1]
 
     if has_whatsapp:
+        # The count comes from the aggregate events table, so it rides along as a subquery
+        count_sql = "(SELECT COUNT(*) FROM ZWAAGGREGATECALLEVENT WHERE ZFIRSTDATE > ?)" if count_calls else "0"
         rows = q_whatsapp(f"""
-            SELECT MIN(ZDATE + {MAC_EPOCH}), MAX(ZDATE + {MAC_EPOCH})
+            SELECT MIN(ZDATE) + {MAC_EPOCH}, MAX(ZDATE) + {MAC_EPOCH}, {count_sql}
             FROM ZWACDCALLEVENT
-            WHERE (ZDATE + {MAC_EPOCH}) > {ts_start} AND (ZDATE + {MAC_EPOCH}) < {ts_end}
-        """)
+            WHERE ZDATE > ? AND ZDATE < ?
+        """, ((start,) if count_calls else ()) + (start, end))
+        total += rows[0][2]
         if rows and rows[0][0]:
             if earliest is None or rows[0][0] < earliest:
                 earliest = rows[0][0]
             if latest is None or rows[0][1] > latest:
                 latest = rows[0][1]
 
-    return earliest, latest
+    return earliest, latest, total
+
+
+# Report stylesheet. It has no placeholders, so it lives outside the page
+# f-strings (no doubled braces, no re-interpolation) and is joined in as-is
+REPORT_CSS = '''
+
+:root {
+    --bg: #08080f;
+    --bg-card: #0d0d18;
+    --text: #f5f5f7;
+    --muted: #6b7280;
+    --green: #34d399;
+    --yellow: #fbbf24;
+    --red: #f87171;
+    --cyan: #22d3ee;
+    --pink: #f472b6;
+    --orange: #fb923c;
+    --purple: #a78bfa;
+    --phone: #34d399;
+    --facetime: #22d3ee;
+    --whatsapp: #25D366;
+    --glow-cyan: rgba(34,211,238,0.15);
+    --font-pixel: 'Silkscreen', cursive;
+    --font-mono: 'Azeret Mono', monospace;
+    --font-body: 'Space Grotesk', sans-serif;
+}
+
+* { margin:0; padding:0; box-sizing:border-box; -webkit-tap-highlight-color:transparent; }
+html, body { height:100%; overflow:hidden; }
+body { font-family:'Space Grotesk',sans-serif; background:var(--bg); color:var(--text); font-feature-settings:'ss01' on,'ss02' on; -webkit-font-smoothing:antialiased; }
+
+.gallery {
+    display:flex;
+    height:100%;
+    transition:transform 0.4s cubic-bezier(0.4,0,0.2,1);
+}
+
+.slide {
+    position:relative;
+    min-width:100vw;
+    height:100vh;
+    display:flex;
+    flex-direction:column;
+    justify-content:center;
+    align-items:center;
+    padding:48px 24px 88px;
+    text-align:center;
+    background:var(--bg);
+}
+
+.slide.intro { background:radial-gradient(ellipse at 50% 0%,#151525 0%,#08080f 70%); }
+.slide.gradient-bg { background:radial-gradient(ellipse at 50% 100%,#0a1f1a 0%,#08080f 70%); }
+.slide.purple-bg { background:radial-gradient(ellipse at 50% 100%,#151020 0%,#08080f 70%); }
+.slide.orange-bg { background:radial-gradient(ellipse at 50% 100%,#1a1008 0%,#08080f 70%); }
+.slide.red-bg { background:radial-gradient(ellipse at 50% 100%,#1a0a0a 0%,#08080f 70%); }
+.slide.summary-slide { background:radial-gradient(ellipse at 50% 50%,#101820 0%,#08080f 70%); }
+.slide.contrib-slide { background:var(--bg); padding:32px 16px 88px; }
+.slide.platform-breakdown { background:radial-gradient(ellipse at 50% 100%,#0a1a15 0%,#08080f 70%); }
+
+.coverage-warning { font-size:12px; color:var(--yellow); margin-top:12px; opacity:0.8; }
+
+/* Contribution graph */
+.contrib-graph { display:flex; flex-direction:column; align-items:center; margin:20px auto; padding:0 8px; }
+.contrib-container { display:flex; gap:4px; }
+.contrib-days { display:flex; flex-direction:column; gap:2px; font-size:9px; color:var(--muted); padding-top:20px; min-width:28px; text-align:right; padding-right:4px; }
+.contrib-days span { height:10px; line-height:10px; }
+.contrib-main { display:flex; flex-direction:column; }
+.contrib-months { position:relative; height:16px; margin-bottom:4px; font-size:10px; color:var(--muted); }
+.contrib-months span { position:absolute; white-space:nowrap; }
+.contrib-grid { display:flex; gap:2px; }
+.contrib-week { display:flex; flex-direction:column; gap:2px; }
+.contrib-cell { width:10px; height:10px; border-radius:2px; background:rgba(255,255,255,0.05); }
+.contrib-cell.empty { background:transparent; }
+.contrib-cell.level-0 { background:rgba(255,255,255,0.12); }
+.contrib-cell.level-1 { background:rgba(34,211,238,0.25); }
+.contrib-cell.level-2 { background:rgba(34,211,238,0.45); }
+.contrib-cell.level-3 { background:rgba(34,211,238,0.70); }
+.contrib-cell.level-4 { background:var(--cyan); }
+.contrib-cell:not(.empty) { cursor:pointer; position:relative; }
+.contrib-tooltip { position:fixed; background:rgba(20,20,30,0.95); color:var(--text); padding:8px 12px; border-radius:6px; font-size:12px; pointer-events:none; z-index:1000; white-space:nowrap; border:1px solid rgba(255,255,255,0.1); box-shadow:0 4px 12px rgba(0,0,0,0.3); }
+.contrib-tooltip .tooltip-count { font-family:var(--font-mono); color:var(--cyan); font-weight:600; }
+.contrib-tooltip .tooltip-date { color:var(--muted); font-size:11px; margin-top:2px; }
+.contrib-legend { display:flex; align-items:center; justify-content:center; gap:4px; margin-top:12px; font-size:10px; color:var(--muted); }
+.contrib-legend .contrib-cell { cursor:default; }
+.contrib-stats { display:flex; gap:32px; margin-top:24px; justify-content:center; }
+.contrib-stat { display:flex; flex-direction:column; align-items:center; }
+.contrib-stat-num { font-family:var(--font-mono); font-size:28px; font-weight:600; color:var(--cyan); }
+.contrib-stat-lbl { font-size:11px; color:var(--muted); margin-top:4px; text-transform:uppercase; letter-spacing:0.5px; }
+.activity-note { font-size:11px; color:var(--yellow); margin-top:16px; opacity:0.85; }
+
+/* Platform breakdown - stacked bar design */
+.stacked-bar { display:flex; width:100%; max-width:340px; height:40px; border-radius:20px; overflow:hidden; margin:32px 0 28px; box-shadow:0 8px 24px rgba(0,0,0,0.3); }
+.bar-segment { height:100%; transition:all 0.3s; position:relative; }
+.bar-segment.phone { background:linear-gradient(90deg, #34d399, #10b981); }
+.bar-segment.facetime { background:linear-gradient(90deg, #22d3ee, #06b6d4); }
+.bar-segment.whatsapp { background:linear-gradient(90deg, #25d366, #128c7e); }
+.platform-details { display:flex; gap:16px; justify-content:center; margin-top:12px; }
+.platform-detail { display:flex; flex-direction:column; align-items:center; padding:14px 18px; border-radius:10px; background:rgba(255,255,255,0.02); }
+.platform-detail.phone { border-left:2px solid #34d399; }
+.platform-detail.facetime { border-left:2px solid #22d3ee; }
+.platform-detail.whatsapp { border-left:2px solid #25d366; }
+.platform-detail .platform-pct { font-family:var(--font-mono); font-size:28px; font-weight:700; letter-spacing:-1px; }
+.platform-detail.phone .platform-pct { color:#34d399; }
+.platform-detail.facetime .platform-pct { color:#22d3ee; }
+.platform-detail.whatsapp .platform-pct { color:#25d366; }
+.platform-detail .platform-name { font-size:12px; color:var(--muted); margin-top:2px; }
+.platform-detail .platform-count { font-family:var(--font-mono); font-size:11px; color:var(--muted); margin-top:6px; opacity:0.6; }
+
+/* Dual stats (video vs voice) */
+.dual-stats { display:flex; gap:40px; margin:28px 0; }
+.dual-stat { display:flex; flex-direction:column; align-items:center; }
+.dual-icon { font-size:40px; margin-bottom:8px; }
+.dual-num { font-family:var(--font-mono); font-size:40px; font-weight:600; }
+.dual-label { font-size:12px; color:var(--muted); margin-top:6px; }
+
+/* Duration buckets */
+.duration-buckets { display:flex; gap:20px; margin:28px 0; justify-content:center; }
+.bucket { display:flex; flex-direction:column; align-items:center; padding:16px 20px; background:rgba(255,255,255,0.03); border-radius:12px; min-width:90px; }
+.bucket-icon { font-size:28px; margin-bottom:6px; }
+.bucket-num { font-family:var(--font-mono); font-size:32px; font-weight:600; }
+.bucket-label { font-size:11px; color:var(--muted); margin-top:6px; text-align:center; line-height:1.2; }
+
+/* Personality type */
+.personality-type { font-family:var(--font-pixel); font-size:16px; font-weight:400; line-height:1.2; color:var(--purple); margin:20px 0; text-transform:uppercase; letter-spacing:0.5px; text-shadow:0 0 20px rgba(167,139,250,0.3); }
+
+.slide h1 { font-family:var(--font-pixel); font-size:32px; font-weight:400; line-height:1.15; margin:16px 0; }
+.slide-label { font-family:var(--font-pixel); font-size:11px; font-weight:400; color:var(--cyan); letter-spacing:1px; margin-bottom:12px; text-shadow:0 0 20px var(--glow-cyan); }
+.slide-icon { font-size:64px; margin-bottom:12px; }
+.slide-text { font-size:16px; color:var(--muted); margin:6px 0; letter-spacing:0.2px; }
+.subtitle { font-size:16px; color:var(--muted); margin-top:6px; }
+.subtitle2 { font-size:14px; color:var(--muted); margin-top:4px; opacity:0.6; }
+
+.big-number { font-family:var(--font-mono); font-size:72px; font-weight:600; line-height:1; letter-spacing:-3px; }
+.big-number.gradient { background:linear-gradient(135deg, var(--cyan) 0%, var(--green) 100%); -webkit-background-clip:text; -webkit-text-fill-color:transparent; background-clip:text; filter:drop-shadow(0 0 30px var(--glow-cyan)); }
+.pct { font-family:var(--font-body); font-size:44px; }
+.huge-name { font-family:var(--font-body); font-size:28px; font-weight:600; line-height:1.2; word-break:break-word; max-width:85%; margin:12px 0; }
+.roast { font-style:italic; color:var(--muted); font-size:15px; margin-top:14px; max-width:360px; line-height:1.4; }
+
+.green { color:var(--green); }
+.yellow { color:var(--yellow); }
+.red { color:var(--red); }
+.cyan { color:var(--cyan); }
+.pink { color:var(--pink); }
+.orange { color:var(--orange); }
+.purple { color:var(--purple); }
+
+.source-badge { font-size:16px; margin-left:4px; }
+
+.stat-grid { display:flex; gap:32px; margin-top:24px; }
+.stat-item { display:flex; flex-direction:column; align-items:center; }
+.stat-num { font-family:var(--font-mono); font-size:22px; font-weight:600; color:var(--cyan); }
+.stat-lbl { font-size:10px; color:var(--muted); margin-top:4px; text-transform:uppercase; letter-spacing:0.5px; }
+
+.rank-list { width:100%; max-width:380px; margin-top:16px; }
+.rank-item { display:flex; align-items:center; padding:12px 16px; gap:14px; border-radius:8px; margin-bottom:4px; background:rgba(255,255,255,0.02); transition:background 0.2s; }
+.rank-item:hover { background:rgba(255,255,255,0.04); }
+.rank-item:first-child { background:linear-gradient(90deg, var(--glow-cyan) 0%, transparent 100%); border:1px solid rgba(34,211,238,0.2); }
+.rank-item:first-child .rank-name { font-weight:600; color:var(--cyan); }
+.rank-item:first-child .rank-count { font-size:18px; color:var(--cyan); }
+.rank-num { font-family:var(--font-mono); font-size:16px; font-weight:600; color:var(--cyan); width:28px; text-align:center; opacity:0.7; }
+.rank-item:first-child .rank-num { opacity:1; }
+.rank-name { flex:1; font-size:15px; text-align:left; white-space:nowrap; overflow:hidden; text-overflow:ellipsis; }
+.rank-count { font-family:var(--font-mono); font-size:15px; font-weight:600; color:var(--yellow); }
+
+.tap-hint { position:absolute; bottom:60px; font-size:16px; color:var(--muted); animation:pulse 2s infinite; }
+@keyframes pulse { 0%,100%{opacity:0.4} 50%{opacity:1} }
+
+/* Animations */
+.slide .slide-label,
+.slide .slide-text,
+.slide .slide-icon,
+.slide .big-number,
+.slide .huge-name,
+.slide .roast,
+.slide .stat-grid,
+.slide .rank-item,
+.slide h1,
+.slide .subtitle,
+.slide .subtitle2,
+.slide .summary-card,
+.slide .contrib-graph,
+.slide .contrib-stats,
+.slide .stacked-bar,
+.slide .platform-details,
+.slide .dual-stats,
+.slide .duration-buckets,
+.slide .personality-type {
+    opacity: 0;
+    transform: translateY(20px);
+}
+
+.gallery { transition: transform 0.55s cubic-bezier(0.22, 1, 0.36, 1); }
+
+.slide.active .slide-label { animation: textFade 0.4s ease-out forwards; }
+.slide.active .slide-text { animation: textFade 0.4s ease-out 0.1s forwards; }
+.slide.active .slide-icon { animation: iconPop 0.5s cubic-bezier(0.34, 1.56, 0.64, 1) 0.05s forwards; }
+.slide.active h1 { animation: titleReveal 0.5s ease-out 0.12s forwards; }
+.slide.active .subtitle { animation: textFade 0.4s ease-out 0.25s forwards; }
+.slide.active .subtitle2 { animation: textFade 0.4s ease-out 0.35s forwards; }
+.slide.active .big-number { animation: numberFlip 0.6s ease-out 0.18s forwards; }
+.slide.active .huge-name { animation: nameBlur 0.5s ease-out 0.2s forwards; }
+.slide.active .roast { animation: roastType 0.6s ease-out 0.4s forwards; }
+.slide.active .stat-grid { animation: none; opacity: 1; transform: none; }
+.slide.active .stat-item { animation: statFade 0.35s ease-out forwards; }
+.slide.active .stat-item:nth-child(1) { animation-delay: 0.3s; }
+.slide.active .stat-item:nth-child(2) { animation-delay: 0.38s; }
+.slide.active .stat-item:nth-child(3) { animation-delay: 0.46s; }
+.slide.active .rank-list { animation: none; opacity: 1; transform: none; }
+.slide.active .rank-item { animation: rankSlide 0.35s ease-out forwards; }
+.slide.active .rank-item:nth-child(1) { animation-delay: 0.1s; }
+.slide.active .rank-item:nth-child(2) { animation-delay: 0.18s; }
+.slide.active .rank-item:nth-child(3) { animation-delay: 0.26s; }
+.slide.active .rank-item:nth-child(4) { animation-delay: 0.34s; }
+.slide.active .rank-item:nth-child(5) { animation-delay: 0.42s; }
+.slide.active .summary-card { animation: cardRise 0.6s ease-out 0.1s forwards; }
+.slide.active .screenshot-btn { opacity: 0; animation: buttonSlide 0.4s ease-out 0.5s forwards; }
+.slide.active .share-hint { opacity: 0; animation: hintFade 0.4s ease-out 0.7s forwards; }
+.slide.active .contrib-graph { animation: graphReveal 0.8s ease-out 0.15s forwards; }
+.slide.active .contrib-stats { animation: none; opacity: 1; transform: none; }
+.slide.active .contrib-stat { animation: statFade 0.35s ease-out forwards; }
+.slide.active .contrib-stat:nth-child(1) { animation-delay: 0.5s; }
+.slide.active .contrib-stat:nth-child(2) { animation-delay: 0.6s; }
+.slide.active .contrib-stat:nth-child(3) { animation-delay: 0.7s; }
+.slide.active .stacked-bar { animation: barGrow 0.6s ease-out 0.2s forwards; }
+.slide.active .platform-details { animation: textFade 0.5s ease-out 0.5s forwards; }
+@keyframes barGrow { 0% { opacity: 0; transform: scaleX(0); } 100% { opacity: 1; transform: scaleX(1); } }
+.slide.active .dual-stats { animation: textFade 0.5s ease-out 0.2s forwards; }
+.slide.active .duration-buckets { animation: textFade 0.5s ease-out 0.2s forwards; }
+.slide.active .personality-type { animation: glitchReveal 0.8s ease-out 0.15s forwards; }
+
+@keyframes glitchReveal { 0% { opacity: 0; transform: translateY(15px); filter: blur(4px); } 50% { opacity: 0.8; transform: translateY(3px) skewX(-3deg); filter: blur(1px); } 100% { opacity: 1; transform: translateY(0) skewX(0); filter: blur(0); } }
+
+@keyframes textFade { 0% { opacity: 0; transform: translateY(15px); } 100% { opacity: 1; transform: translateY(0); } }
+@keyframes titleReveal { 0% { opacity: 0; transform: translateY(25px) scale(0.95); } 70% { transform: translateY(-3px) scale(1.01); } 100% { opacity: 1; transform: translateY(0) scale(1); } }
+@keyframes iconPop { 0% { opacity: 0; transform: translateY(20px) scale(0.4) rotate(-15deg); } 50% { transform: translateY(-8px) scale(1.15) rotate(8deg); } 75% { transform: translateY(2px) scale(0.95) rotate(-3deg); } 100% { opacity: 1; transform: translateY(0) scale(1) rotate(0); } }
+@keyframes numberFlip { 0% { opacity: 0; transform: perspective(400px) rotateX(-60deg) translateY(20px); } 60% { transform: perspective(400px) rotateX(10deg); } 100% { opacity: 1; transform: perspective(400px) rotateX(0) translateY(0); } }
+@keyframes nameBlur { 0% { opacity: 0; transform: translateY(20px); filter: blur(8px); } 100% { opacity: 1; transform: translateY(0); filter: blur(0); } }
+@keyframes roastType { 0% { opacity: 0; clip-path: inset(0 100% 0 0); } 100% { opacity: 1; clip-path: inset(0 0 0 0); } }
+@keyframes statFade { 0% { opacity: 0; transform: translateY(12px); } 100% { opacity: 1; transform: translateY(0); } }
+@keyframes rankSlide { 0% { opacity: 0; transform: translateX(-20px); } 100% { opacity: 1; transform: translateX(0); } }
+@keyframes cardRise { 0% { opacity: 0; transform: translateY(40px); } 100% { opacity: 1; transform: translateY(0); } }
+@keyframes graphReveal { 0% { opacity: 0; transform: translateY(30px) scale(0.95); } 100% { opacity: 1; transform: translateY(0) scale(1); } }
+@keyframes buttonSlide { 0% { opacity: 0; transform: translateY(15px); } 100% { opacity: 1; transform: translateY(0); } }
+@keyframes hintFade { 0% { opacity: 0; } 100% { opacity: 1; } }
+
+.summary-card {
+    background:linear-gradient(160deg,#0f1218 0%,#121820 50%,#0f1218 100%);
+    border:1px solid rgba(255,255,255,0.08);
+    border-radius:20px;
+    padding:28px 24px;
+    width:100%;
+    max-width:380px;
+    text-align:center;
+    box-shadow:0 20px 40px rgba(0,0,0,0.4);
+}
+.summary-header { display:flex; align-items:center; justify-content:center; gap:10px; margin-bottom:20px; padding-bottom:14px; border-bottom:1px solid rgba(255,255,255,0.06); }
+.summary-logo { font-size:24px; }
+.summary-title { font-family:var(--font-pixel); font-size:10px; font-weight:400; color:var(--text); letter-spacing:0.5px; }
+.summary-hero { margin:20px 0; }
+.summary-big-stat { display:flex; flex-direction:column; align-items:center; }
+.summary-big-num { font-family:var(--font-mono); font-size:52px; font-weight:600; background:linear-gradient(135deg, var(--cyan), var(--green)); -webkit-background-clip:text; -webkit-text-fill-color:transparent; background-clip:text; line-height:1; letter-spacing:-2px; }
+.summary-big-label { font-size:11px; color:var(--muted); text-transform:uppercase; letter-spacing:1.5px; margin-top:6px; }
+.summary-platform-split { display:flex; justify-content:center; flex-wrap:wrap; gap:6px 12px; margin:14px 0; padding:10px 16px; border-top:1px solid rgba(255,255,255,0.04); border-bottom:1px solid rgba(255,255,255,0.04); font-family:var(--font-mono); font-size:11px; }
+.summary-stats { display:grid; grid-template-columns:repeat(4,1fr); gap:8px; margin:18px 0; padding:16px 0; border-top:1px solid rgba(255,255,255,0.06); border-bottom:1px solid rgba(255,255,255,0.06); }
+.summary-stat { display:flex; flex-direction:column; align-items:center; }
+.summary-stat-val { font-family:var(--font-mono); font-size:18px; font-weight:600; color:var(--cyan); white-space:nowrap; }
+.summary-stat-lbl { font-size:8px; color:var(--muted); text-transform:uppercase; margin-top:3px; letter-spacing:0.3px; }
+.summary-personality { margin:14px 0; }
+.summary-personality-type { font-family:var(--font-pixel); font-size:10px; font-weight:400; color:var(--purple); text-transform:uppercase; letter-spacing:0.5px; }
+.summary-top3 { margin:12px 0; display:flex; flex-direction:column; gap:4px; }
+.summary-top3-label { font-size:9px; color:var(--muted); text-transform:uppercase; letter-spacing:0.5px; }
+.summary-top3-names { font-size:12px; color:var(--text); opacity:0.9; }
+.summary-footer { margin-top:16px; padding-top:14px; border-top:1px solid rgba(255,255,255,0.06); font-size:10px; color:var(--cyan); font-family:var(--font-pixel); font-weight:400; opacity:0.8; }
+
+.screenshot-btn {
+    display:flex; align-items:center; justify-content:center; gap:8px;
+    font-family:var(--font-pixel); font-size:9px; font-weight:400; text-transform:uppercase; letter-spacing:0.5px;
+    background:linear-gradient(135deg, var(--cyan), var(--green)); color:#000; border:none;
+    padding:14px 28px; border-radius:10px; margin-top:24px;
+    cursor:pointer; transition:transform 0.2s,box-shadow 0.2s;
+    box-shadow:0 4px 16px rgba(34,211,238,0.3);
+}
+.screenshot-btn:hover { transform:scale(1.02); box-shadow:0 6px 20px rgba(34,211,238,0.4); }
+.screenshot-btn:active { transform:scale(0.98); }
+.btn-icon { font-size:18px; }
+.share-hint { font-size:13px; color:var(--muted); margin-top:14px; }
+
+.slide-save-btn {
+    position:absolute; bottom:56px; left:50%; transform:translateX(-50%);
+    display:flex; align-items:center; justify-content:center; gap:6px;
+    font-family:var(--font-pixel); font-size:8px; font-weight:400; text-transform:uppercase; letter-spacing:0.5px;
+    background:rgba(34,211,238,0.1); color:var(--cyan); border:1px solid rgba(34,211,238,0.2);
+    padding:8px 16px; border-radius:6px;
+    cursor:pointer; transition:all 0.2s; opacity:0;
+}
+.slide.active .slide-save-btn { opacity:0.7; }
+.slide-save-btn:hover { opacity:1; background:rgba(34,211,238,0.15); border-color:rgba(34,211,238,0.4); }
+
+.slide.capturing, .slide.capturing * {
+    animation: none !important;
+    opacity: 1 !important;
+    transform: none !important;
+    filter: none !important;
+    clip-path: none !important;
+}
+.slide-watermark {
+    position:absolute; bottom:24px; left:50%; transform:translateX(-50%);
+    font-family:var(--font-pixel); font-size:10px; color:var(--cyan); opacity:0.6;
+    display:none;
+}
+
+.progress { position:fixed; bottom:20px; left:50%; transform:translateX(-50%); display:flex; gap:6px; z-index:100; }
+.dot { width:8px; height:8px; border-radius:50%; background:rgba(255,255,255,0.15); transition:all 0.3s; cursor:pointer; }
+.dot:hover { background:rgba(255,255,255,0.3); }
+.dot.active { background:var(--cyan); transform:scale(1.4); box-shadow:0 0 8px var(--cyan); }
+
+.nav { position:fixed; top:50%; transform:translateY(-50%); font-size:28px; color:rgba(255,255,255,0.15); cursor:pointer; z-index:100; padding:20px; transition:color 0.2s; user-select:none; }
+.nav:hover { color:rgba(255,255,255,0.4); }
+.nav.prev { left:4px; }
+.nav.next { right:4px; }
+.nav.hidden { opacity:0; pointer-events:none; }
+'''
+
+
+# Everything from the favicon to the opening gallery div is the same for every
+# report, so it is assembled and UTF-8 encoded once at import and written verbatim
+REPORT_FAVICON = "data:image/svg+xml,<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 100 100'><text y='.9em' font-size='90'>📞</text></svg>"
+REPORT_HEAD = (f'''<link rel="icon" href="{REPORT_FAVICON}">
+<link rel="preconnect" href="https://fonts.googleapis.com">
+<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+<link href="https://fonts.googleapis.com/css2?family=Silkscreen&family=Azeret+Mono:wght@400;500;600;700&family=Space+Grotesk:wght@400;500;700&display=swap" rel="stylesheet">
+<style>''' + REPORT_CSS + '''</style>
+</head>
+<body>
+
+<div class="gallery" id="gallery">''').encode()
+
+
+# Report script (navigation, screenshots, tooltips) plus the closing tags, as
+# UTF-8 like REPORT_HEAD; per-report values (total, summaryFilename) are
+# declared by gen_html just before it
+REPORT_JS = '''let current = 0;
+
+for (let i = 0; i < total; i++) {
+    const dot = document.createElement('div');
+    dot.className = 'dot' + (i === 0 ? ' active' : '');
+    dot.onclick = () => goTo(i);
+    progressEl.appendChild(dot);
+}
+const dots = progressEl.querySelectorAll('.dot');
+const slides = gallery.querySelectorAll('.slide');
+
+function goTo(idx) {
+    if (idx < 0 || idx >= total) return;
+    slides.forEach(s => s.classList.remove('active'));
+    current = idx;
+    gallery.style.transform = `translateX(-${current * 100}vw)`;
+    dots.forEach((d, i) => d.classList.toggle('active', i === current));
+    prevBtn.classList.toggle('hidden', current === 0);
+    nextBtn.classList.toggle('hidden', current === total - 1);
+    setTimeout(() => slides[current].classList.add('active'), 50);
+}
+
+document.addEventListener('click', (e) => {
+    if (e.target.closest('.nav, button, .dot')) return;
+    const x = e.clientX / window.innerWidth;
+    if (x < 0.3) goTo(current - 1);
+    else goTo(current + 1);
+});
+
+document.addEventListener('keydown', (e) => {
+    if (e.key === 'ArrowRight' || e.key === ' ') { e.preventDefault(); goTo(current + 1); }
+    if (e.key === 'ArrowLeft') { e.preventDefault(); goTo(current - 1); }
+});
+
+prevBtn.onclick = (e) => { e.stopPropagation(); goTo(current - 1); };
+nextBtn.onclick = (e) => { e.stopPropagation(); goTo(current + 1); };
+
+// html2canvas is only needed for screenshots: fetch it on the first Save click
+let html2canvasLoading = null;
+function loadHtml2Canvas() {
+    if (window.html2canvas) return Promise.resolve();
+    if (!html2canvasLoading) {
+        html2canvasLoading = new Promise((resolve, reject) => {
+            const s = document.createElement('script');
+            s.src = 'https://cdnjs.cloudflare.com/ajax/libs/html2canvas/1.4.1/html2canvas.min.js';
+            s.onload = resolve;
+            s.onerror = () => { html2canvasLoading = null; s.remove(); reject(new Error('html2canvas failed to load')); };
+            document.head.appendChild(s);
+        });
+    }
+    return html2canvasLoading;
+}
+
+// Encode the canvas off the main thread as a PNG blob and download it via an
+// object URL (toDataURL would base64 the whole image into a string first)
+function downloadCanvas(canvas, filename) {
+    return new Promise((resolve, reject) => {
+        canvas.toBlob(blob => {
+            if (!blob) { reject(new Error('encode failed')); return; }
+            const url = URL.createObjectURL(blob);
+            const link = document.createElement('a');
+            link.download = filename;
+            link.href = url;
+            link.click();
+            setTimeout(() => URL.revokeObjectURL(url), 1000);
+            resolve();
+        }, 'image/png');
+    });
+}
+
+async function takeScreenshot() {
+    const card = document.getElementById('summaryCard');
+    const btn = document.querySelector('.screenshot-btn');
+    btn.innerHTML = '<span>Saving...</span>';
+    btn.disabled = true;
+    card.style.opacity = '1';
+    card.style.transform = 'none';
+    await new Promise(r => setTimeout(r, 100));
+    try {
+        await loadHtml2Canvas();
+        const canvas = await html2canvas(card, { backgroundColor:'#1a2f2f', scale:2, logging:false, useCORS:true });
+        await downloadCanvas(canvas, summaryFilename);
+        btn.innerHTML = '<span class="btn-icon">✓</span><span>Saved!</span>';
+        setTimeout(() => { btn.innerHTML = '<span class="btn-icon">📸</span><span>Save Screenshot</span>'; btn.disabled = false; }, 2000);
+    } catch (err) {
+        btn.innerHTML = '<span class="btn-icon">📸</span><span>Save Screenshot</span>';
+        btn.disabled = false;
+    }
+}
+
+async function saveSlide(slideEl, filename, btn) {
+    btn.innerHTML = '⏳';
+    btn.disabled = true;
+    const watermark = slideEl.querySelector('.slide-watermark');
+    if (watermark) watermark.style.display = 'block';
+    btn.style.visibility = 'hidden';
+    slideEl.classList.add('capturing');
+    await new Promise(r => setTimeout(r, 50));
+    const computedBg = getComputedStyle(slideEl).backgroundColor;
+    const bgColor = computedBg && computedBg !== 'rgba(0, 0, 0, 0)' ? computedBg : '#0a0a12';
+    try {
+        await loadHtml2Canvas();
+        const canvas = await html2canvas(slideEl, { backgroundColor: bgColor, scale: 2, logging: false, useCORS: true, width: slideEl.offsetWidth, height: slideEl.offsetHeight });
+        const size = Math.min(canvas.width, canvas.height);
+        const squareCanvas = document.createElement('canvas');
+        squareCanvas.width = size;
+        squareCanvas.height = size;
+        const ctx = squareCanvas.getContext('2d');
+        ctx.fillStyle = bgColor;
+        ctx.fillRect(0, 0, size, size);
+        const srcX = (canvas.width - size) / 2;
+        const srcY = (canvas.height - size) / 2;
+        ctx.drawImage(canvas, srcX, srcY, size, size, 0, 0, size, size);
+        await downloadCanvas(squareCanvas, filename);
+        btn.innerHTML = '✓';
+        setTimeout(() => { btn.innerHTML = '📸 Save'; btn.disabled = false; btn.style.visibility = 'visible'; }, 2000);
+    } catch (err) {
+        btn.innerHTML = '📸 Save';
+        btn.disabled = false;
+        btn.style.visibility = 'visible';
+    }
+    slideEl.classList.remove('capturing');
+    if (watermark) watermark.style.display = 'none';
+}
+
+// Contribution graph tooltip
+const tooltip = document.createElement('div');
+tooltip.className = 'contrib-tooltip';
+tooltip.style.display = 'none';
+document.body.appendChild(tooltip);
+
+document.querySelectorAll('.contrib-cell[data-date]').forEach(cell => {
+    cell.addEventListener('mouseenter', (e) => {
+        const count = cell.dataset.count;
+        const date = cell.dataset.date;
+        const msgText = cell.dataset.msgText;
+        tooltip.innerHTML = `<div class="tooltip-count">${count} ${msgText}</div><div class="tooltip-date">${date}</div>`;
+        tooltip.style.display = 'block';
+    });
+    cell.addEventListener('mousemove', (e) => {
+        tooltip.style.left = (e.clientX + 12) + 'px';
+        tooltip.style.top = (e.clientY - 10) + 'px';
+    });
+    cell.addEventListener('mouseleave', () => {
+        tooltip.style.display = 'none';
+    });
+});
+
+goTo(0);
+</script>
+</body></html>'''.encode()
 
 
 def gen_html(d, path, year, has_phone, has_whatsapp, earliest_date, latest_date):
@@ -825,7 +1541,7 @@ def gen_html(d, path, year, has_phone, has_whatsapp, earliest_date, latest_date)
 
     # Format busiest day
     if d['busiest_day']:
-        bd = datetime.strptime(d['busiest_day'][0], '%Y-%m-%d')
+        bd = date.fromordinal(d['busiest_day'][0])
         busiest_str = bd.strftime('%b %d')
         busiest_count = d['busiest_day'][1]
     else:
@@ -888,7 +1604,7 @@ def gen_html(d, path, year, has_phone, has_whatsapp, earliest_date, latest_date)
 
         for platform in ['Phone', 'FaceTime', 'WhatsApp']:
             if platform in d['platforms']:
-                pct = round(d['platforms'][platform]['count'] / max(total_calls, 1) * 100)
+                pct = round(d['platforms'][platform]['count'] / (total_calls or 1) * 100)
                 count = d['platforms'][platform]['count']
                 css_class = platform.lower()
                 platform_data.append((platform, pct, count, css_class))
@@ -922,7 +1638,7 @@ def gen_html(d, path, year, has_phone, has_whatsapp, earliest_date, latest_date)
     video = d['video_voice']['video']
     voice = d['video_voice']['voice']
     if video > 0:
-        video_pct = round(video / max(stats['total'], 1) * 100)
+        video_pct = round(video / (stats['total'] or 1) * 100)
         slides.append(f'''
         <div class="slide">
             <div class="slide-label">// VIDEO VS VOICE</div>
@@ -947,7 +1663,7 @@ def gen_html(d, path, year, has_phone, has_whatsapp, earliest_date, latest_date)
     if d['top_count']:
         top = d['top_count'][0]
         name, stats_top = top
-        platforms_icons = ' '.join(['📱' if p == 'Phone' else ('📹' if p == 'FaceTime' else '💬') for p in stats_top['platforms']])
+        platforms_icons = ' '.join([PLATFORM_ICONS.get(p, '💬') for p in stats_top['platforms']])
         slides.append(f'''
         <div class="slide gradient-bg">
             <div class="slide-label">// YOUR #1</div>
@@ -972,10 +1688,10 @@ def gen_html(d, path, year, has_phone, has_whatsapp, earliest_date, latest_date)
                 icons.append('<span style="color:#25d366;font-size:10px">💬</span>')
             return ''.join(icons) if icons else ''
 
-        top5_html = ''.join([
-            f'<div class="rank-item"><span class="rank-num">{i}</span><span class="rank-name">{name} <span class="platform-icons">{platform_icons(stats.get("platforms", []))}</span></span><span class="rank-count">{stats["count"]:,}</span></div>'
+        top5_html = rank_items(
+            (i, f'{name} <span class="platform-icons">{platform_icons(stats.get("platforms", []))}</span>', 'rank-count', f'{stats["count"]:,}')
             for i, (name, stats) in enumerate(d['top_count'][:5], 1)
-        ])
+        )
         slides.append(f'''
         <div class="slide">
             <div class="slide-label">// INNER CIRCLE</div>
@@ -987,10 +1703,10 @@ def gen_html(d, path, year, has_phone, has_whatsapp, earliest_date, latest_date)
 
     # Slide 7: Talk Time Champions (Top 5 by duration)
     if d['top_duration']:
-        duration_html = ''.join([
-            f'<div class="rank-item"><span class="rank-num">{i}</span><span class="rank-name">{name} <span class="platform-icons">{platform_icons(stats.get("platforms", []))}</span></span><span class="rank-count cyan">{format_duration_short(stats["duration"])}</span></div>'
+        duration_html = rank_items(
+            (i, f'{name} <span class="platform-icons">{platform_icons(stats.get("platforms", []))}</span>', 'rank-count cyan', format_duration_short(stats["duration"]))
             for i, (name, stats) in enumerate(d['top_duration'][:5], 1)
-        ])
+        )
         slides.append(f'''
         <div class="slide orange-bg">
             <div class="slide-label">// TALK TIME CHAMPIONS</div>
@@ -1031,6 +1747,13 @@ def gen_html(d, path, year, has_phone, has_whatsapp, earliest_date, latest_date)
 
         current_date = first_day
         max_count = max(d['daily_counts'].values()) if d['daily_counts'] else 1
+        # Level thresholds are loop-invariant: compute them once. A count's level is
+        # the number of bounds strictly below it (0 for no calls, 4 above 75% of max).
+        level_bounds = (0, max_count * 0.25, max_count * 0.5, max_count * 0.75)
+        # Local names for the per-day lookups below
+        count_for = d['daily_counts'].get
+        small_ints = SMALL_INTS
+        one_day = timedelta(days=1)
         month_labels = []
         last_month = None
         week_idx = 0
@@ -1038,60 +1761,58 @@ def gen_html(d, path, year, has_phone, has_whatsapp, earliest_date, latest_date)
         while current_date <= last_day:
             week_cells = []
             for _ in range(7):
-                date_str = current_date.strftime('%Y-%m-%d')
-                count = d['daily_counts'].get(date_str, 0)
+                count = count_for(current_date.toordinal(), 0)
 
                 if (year_start <= current_date <= year_end) and current_date.month != last_month:
                     month_labels.append((week_idx, current_date.strftime('%b')))
                     last_month = current_date.month
 
-                if count == 0:
-                    level = 0
-                elif count <= max_count * 0.25:
-                    level = 1
-                elif count <= max_count * 0.5:
-                    level = 2
-                elif count <= max_count * 0.75:
-                    level = 3
-                else:
-                    level = 4
+                level = bisect_left(level_bounds, count)
 
                 in_year = year_start <= current_date <= year_end
-                week_cells.append((date_str, count, level, in_year))
-                current_date += timedelta(days=1)
+                if in_year:
+                    # Tooltip date formatted straight from the date object (no strptime round-trip)
+                    formatted_date = current_date.strftime('%b %d, %Y')
+                    count_s = small_ints[count] if count < 256 else str(count)
+                    call_text = "call" if count == 1 else "calls"
+                    week_cells.append((count_s, level, True, formatted_date, call_text))
+                else:
+                    week_cells.append((None, level, False, None, None))
+                current_date += one_day
 
             cal_cells.append(week_cells)
             week_idx += 1
             if week_idx > 60:
                 break
 
-        contrib_html = '<div class="contrib-graph">'
-        contrib_html += '<div class="contrib-container">'
-        contrib_html += '<div class="contrib-days"><span>Sun</span><span>Mon</span><span>Tue</span><span>Wed</span><span>Thu</span><span>Fri</span><span>Sat</span></div>'
-        contrib_html += '<div class="contrib-main">'
-        contrib_html += '<div class="contrib-months">'
+        parts = []
+        add = parts.append
+        add('<div class="contrib-graph">')
+        add('<div class="contrib-container">')
+        add('<div class="contrib-days"><span>Sun</span><span>Mon</span><span>Tue</span><span>Wed</span><span>Thu</span><span>Fri</span><span>Sat</span></div>')
+        add('<div class="contrib-main">')
+        add('<div class="contrib-months">')
         for week_num, month_name in month_labels:
-            left_px = week_num * 12
-            contrib_html += f'<span style="position:absolute;left:{left_px}px">{month_name}</span>'
-        contrib_html += '</div>'
-        contrib_html += '<div class="contrib-grid">'
-        for week in cal_cells:
-            contrib_html += '<div class="contrib-week">'
-            for date_str, count, level, in_year in week:
-                if in_year:
-                    try:
-                        date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-                        formatted_date = date_obj.strftime('%b %d, %Y')
-                    except:
-                        formatted_date = date_str
-                    call_text = "call" if count == 1 else "calls"
-                    contrib_html += f'<div class="contrib-cell level-{level}" data-date="{formatted_date}" data-count="{count}" data-msg-text="{call_text}"></div>'
-                else:
-                    contrib_html += '<div class="contrib-cell empty"></div>'
-            contrib_html += '</div>'
-        contrib_html += '</div></div></div>'
-        contrib_html += '<div class="contrib-legend"><span>Less</span><div class="contrib-cell level-0"></div><div class="contrib-cell level-1"></div><div class="contrib-cell level-2"></div><div class="contrib-cell level-3"></div><div class="contrib-cell level-4"></div><span>More</span></div>'
-        contrib_html += '</div>'
+            add('<span style="position:absolute;left:')
+            add(str(week_num * 12))
+            add('px">')
+            add(month_name)
+            add('</span>')
+        add('</div>')
+        add('<div class="contrib-grid">')
+        # Cells carry their pre-rendered strings, so the grid is one nested join
+        add(''.join(
+            '<div class="contrib-week">' + ''.join(
+                f'<div class="contrib-cell level-{level}" data-date="{formatted_date}" data-count="{count_s}" data-msg-text="{call_text}"></div>'
+                if in_year else '<div class="contrib-cell empty"></div>'
+                for count_s, level, in_year, formatted_date, call_text in week
+            ) + '</div>'
+            for week in cal_cells
+        ))
+        add('</div></div></div>')
+        add('<div class="contrib-legend"><span>Less</span><div class="contrib-cell level-0"></div><div class="contrib-cell level-1"></div><div class="contrib-cell level-2"></div><div class="contrib-cell level-3"></div><div class="contrib-cell level-4"></div><span>More</span></div>')
+        add('</div>')
+        contrib_html = ''.join(parts)
 
         # Add note about data coverage on activity slide
         activity_note = ""
@@ -1214,7 +1935,7 @@ def gen_html(d, path, year, has_phone, has_whatsapp, earliest_date, latest_date)
 
     # Slide: Weekday vs Weekend
     ww = d['weekday_weekend']
-    weekday_pct = round(ww['weekday'] / max(stats['total'], 1) * 100)
+    weekday_pct = round(ww['weekday'] / (stats['total'] or 1) * 100)
     weekend_pct = 100 - weekday_pct
     slides.append(f'''
     <div class="slide">
@@ -1266,10 +1987,7 @@ def gen_html(d, path, year, has_phone, has_whatsapp, earliest_date, latest_date)
 
     # Slide: Ghost Protocol (unreturned missed calls)
     if d['ghosts']:
-        ghost_html = ''.join([
-            f'<div class="rank-item"><span class="rank-num">👻</span><span class="rank-name">{name}</span><span class="rank-count red">{count}</span></div>'
-            for name, count in d['ghosts'][:5]
-        ])
+        ghost_html = rank_items(('👻', name, 'rank-count red', count) for name, count in d['ghosts'][:5])
         slides.append(f'''
         <div class="slide red-bg">
             <div class="slide-label">// GHOST PROTOCOL</div>
@@ -1283,18 +2001,7 @@ def gen_html(d, path, year, has_phone, has_whatsapp, earliest_date, latest_date)
     # Slide: Callback Speed
     if d['avg_callback_time']:
         cb_time = d['avg_callback_time']
-        if cb_time < 5:
-            cb_label = "LIGHTNING"
-            cb_class = "green"
-        elif cb_time < 30:
-            cb_label = "RESPONSIVE"
-            cb_class = "cyan"
-        elif cb_time < 120:
-            cb_label = "EVENTUALLY"
-            cb_class = "yellow"
-        else:
-            cb_label = "WHENEVER"
-            cb_class = "red"
+        cb_label, cb_class = CALLBACK_SPEEDS[bisect_right(CALLBACK_SPEED_BOUNDS, cb_time)]
 
         cb_display = f"{cb_time}m" if cb_time < 60 else f"{cb_time // 60}h {cb_time % 60}m"
         slides.append(f'''
@@ -1321,10 +2028,7 @@ def gen_html(d, path, year, has_phone, has_whatsapp, earliest_date, latest_date)
 
     # Slide 17: Heating Up
     if d['heating_up']:
-        heat_html = ''.join([
-            f'<div class="rank-item"><span class="rank-num">🔥</span><span class="rank-name">{name}</span><span class="rank-count green">+{h2-h1}</span></div>'
-            for name, h1, h2 in d['heating_up'][:5]
-        ])
+        heat_html = rank_items(('🔥', name, 'rank-count green', f'+{h2-h1}') for name, h1, h2 in d['heating_up'][:5])
         slides.append(f'''
         <div class="slide">
             <div class="slide-label">// HEATING UP</div>
@@ -1336,10 +2040,10 @@ def gen_html(d, path, year, has_phone, has_whatsapp, earliest_date, latest_date)
 
     # Slide 18: Cooling Down
     if d['cooling_down']:
-        cool_html = ''.join([
-            f'<div class="rank-item"><span class="rank-num">🧊</span><span class="rank-name">{name}</span><span class="rank-count"><span class="green">{h1}</span> → <span class="red">{h2}</span></span></div>'
+        cool_html = rank_items(
+            ('🧊', name, 'rank-count', f'<span class="green">{h1}</span> → <span class="red">{h2}</span>')
             for name, h1, h2 in d['cooling_down'][:5]
-        ])
+        )
         slides.append(f'''
         <div class="slide">
             <div class="slide-label">// COOLING DOWN</div>
@@ -1358,17 +2062,8 @@ def gen_html(d, path, year, has_phone, has_whatsapp, earliest_date, latest_date)
     for platform in ['Phone', 'FaceTime', 'WhatsApp']:
         if platform in d['platforms']:
             # Use colored labels for clarity
-            if platform == 'Phone':
-                color = '#4ade80'
-                label = 'Phone'
-            elif platform == 'FaceTime':
-                color = '#22d3ee'
-                label = 'FaceTime'
-            else:  # WhatsApp
-                color = '#25d366'
-                label = 'WhatsApp'
             count = d["platforms"][platform]["count"]
-            platform_summary.append(f'<span style="color:{color}">{label}</span> {count:,}')
+            platform_summary.append(f'<span style="color:{PLATFORM_COLORS[platform]}">{platform}</span> {count:,}')
     platform_summary_html = ' <span style="color:#666;margin:0 8px">·</span> '.join(platform_summary)
 
     slides.append(f'''
@@ -1423,343 +2118,16 @@ def gen_html(d, path, year, has_phone, has_whatsapp, earliest_date, latest_date)
         <div class="share-hint">share your call stats</div>
     </div>''')
 
-    slides_html = ''.join(slides)
     num_slides = len(slides)
 
-    favicon = "data:image/svg+xml,<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 100 100'><text y='.9em' font-size='90'>📞</text></svg>"
-
-    html = f'''<!DOCTYPE html>
+    page_head = f'''<!DOCTYPE html>
 <html><head>
 <meta charset="UTF-8">
 <meta name="viewport" content="width=device-width,initial-scale=1">
 <title>Calls Wrapped {year}</title>
-<link rel="icon" href="{favicon}">
-<script src="https://cdnjs.cloudflare.com/ajax/libs/html2canvas/1.4.1/html2canvas.min.js"></script>
-<link rel="preconnect" href="https://fonts.googleapis.com">
-<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-<link href="https://fonts.googleapis.com/css2?family=Silkscreen&family=Azeret+Mono:wght@400;500;600;700&family=Space+Grotesk:wght@400;500;700&display=swap" rel="stylesheet">
-<style>
-
-:root {{
-    --bg: #08080f;
-    --bg-card: #0d0d18;
-    --text: #f5f5f7;
-    --muted: #6b7280;
-    --green: #34d399;
-    --yellow: #fbbf24;
-    --red: #f87171;
-    --cyan: #22d3ee;
-    --pink: #f472b6;
-    --orange: #fb923c;
-    --purple: #a78bfa;
-    --phone: #34d399;
-    --facetime: #22d3ee;
-    --whatsapp: #25D366;
-    --glow-cyan: rgba(34,211,238,0.15);
-    --font-pixel: 'Silkscreen', cursive;
-    --font-mono: 'Azeret Mono', monospace;
-    --font-body: 'Space Grotesk', sans-serif;
-}}
-
-* {{ margin:0; padding:0; box-sizing:border-box; -webkit-tap-highlight-color:transparent; }}
-html, body {{ height:100%; overflow:hidden; }}
-body {{ font-family:'Space Grotesk',sans-serif; background:var(--bg); color:var(--text); font-feature-settings:'ss01' on,'ss02' on; -webkit-font-smoothing:antialiased; }}
-
-.gallery {{
-    display:flex;
-    height:100%;
-    transition:transform 0.4s cubic-bezier(0.4,0,0.2,1);
-}}
+'''
 
-.slide {{
-    position:relative;
-    min-width:100vw;
-    height:100vh;
-    display:flex;
-    flex-direction:column;
-    justify-content:center;
-    align-items:center;
-    padding:48px 24px 88px;
-    text-align:center;
-    background:var(--bg);
-}}
-
-.slide.intro {{ background:radial-gradient(ellipse at 50% 0%,#151525 0%,#08080f 70%); }}
-.slide.gradient-bg {{ background:radial-gradient(ellipse at 50% 100%,#0a1f1a 0%,#08080f 70%); }}
-.slide.purple-bg {{ background:radial-gradient(ellipse at 50% 100%,#151020 0%,#08080f 70%); }}
-.slide.orange-bg {{ background:radial-gradient(ellipse at 50% 100%,#1a1008 0%,#08080f 70%); }}
-.slide.red-bg {{ background:radial-gradient(ellipse at 50% 100%,#1a0a0a 0%,#08080f 70%); }}
-.slide.summary-slide {{ background:radial-gradient(ellipse at 50% 50%,#101820 0%,#08080f 70%); }}
-.slide.contrib-slide {{ background:var(--bg); padding:32px 16px 88px; }}
-.slide.platform-breakdown {{ background:radial-gradient(ellipse at 50% 100%,#0a1a15 0%,#08080f 70%); }}
-
-.coverage-warning {{ font-size:12px; color:var(--yellow); margin-top:12px; opacity:0.8; }}
-
-/* Contribution graph */
-.contrib-graph {{ display:flex; flex-direction:column; align-items:center; margin:20px auto; padding:0 8px; }}
-.contrib-container {{ display:flex; gap:4px; }}
-.contrib-days {{ display:flex; flex-direction:column; gap:2px; font-size:9px; color:var(--muted); padding-top:20px; min-width:28px; text-align:right; padding-right:4px; }}
-.contrib-days span {{ height:10px; line-height:10px; }}
-.contrib-main {{ display:flex; flex-direction:column; }}
-.contrib-months {{ position:relative; height:16px; margin-bottom:4px; font-size:10px; color:var(--muted); }}
-.contrib-months span {{ position:absolute; white-space:nowrap; }}
-.contrib-grid {{ display:flex; gap:2px; }}
-.contrib-week {{ display:flex; flex-direction:column; gap:2px; }}
-.contrib-cell {{ width:10px; height:10px; border-radius:2px; background:rgba(255,255,255,0.05); }}
-.contrib-cell.empty {{ background:transparent; }}
-.contrib-cell.level-0 {{ background:rgba(255,255,255,0.12); }}
-.contrib-cell.level-1 {{ background:rgba(34,211,238,0.25); }}
-.contrib-cell.level-2 {{ background:rgba(34,211,238,0.45); }}
-.contrib-cell.level-3 {{ background:rgba(34,211,238,0.70); }}
-.contrib-cell.level-4 {{ background:var(--cyan); }}
-.contrib-cell:not(.empty) {{ cursor:pointer; position:relative; }}
-.contrib-tooltip {{ position:fixed; background:rgba(20,20,30,0.95); color:var(--text); padding:8px 12px; border-radius:6px; font-size:12px; pointer-events:none; z-index:1000; white-space:nowrap; border:1px solid rgba(255,255,255,0.1); box-shadow:0 4px 12px rgba(0,0,0,0.3); }}
-.contrib-tooltip .tooltip-count {{ font-family:var(--font-mono); color:var(--cyan); font-weight:600; }}
-.contrib-tooltip .tooltip-date {{ color:var(--muted); font-size:11px; margin-top:2px; }}
-.contrib-legend {{ display:flex; align-items:center; justify-content:center; gap:4px; margin-top:12px; font-size:10px; color:var(--muted); }}
-.contrib-legend .contrib-cell {{ cursor:default; }}
-.contrib-stats {{ display:flex; gap:32px; margin-top:24px; justify-content:center; }}
-.contrib-stat {{ display:flex; flex-direction:column; align-items:center; }}
-.contrib-stat-num {{ font-family:var(--font-mono); font-size:28px; font-weight:600; color:var(--cyan); }}
-.contrib-stat-lbl {{ font-size:11px; color:var(--muted); margin-top:4px; text-transform:uppercase; letter-spacing:0.5px; }}
-.activity-note {{ font-size:11px; color:var(--yellow); margin-top:16px; opacity:0.85; }}
-
-/* Platform breakdown - stacked bar design */
-.stacked-bar {{ display:flex; width:100%; max-width:340px; height:40px; border-radius:20px; overflow:hidden; margin:32px 0 28px; box-shadow:0 8px 24px rgba(0,0,0,0.3); }}
-.bar-segment {{ height:100%; transition:all 0.3s; position:relative; }}
-.bar-segment.phone {{ background:linear-gradient(90deg, #34d399, #10b981); }}
-.bar-segment.facetime {{ background:linear-gradient(90deg, #22d3ee, #06b6d4); }}
-.bar-segment.whatsapp {{ background:linear-gradient(90deg, #25d366, #128c7e); }}
-.platform-details {{ display:flex; gap:16px; justify-content:center; margin-top:12px; }}
-.platform-detail {{ display:flex; flex-direction:column; align-items:center; padding:14px 18px; border-radius:10px; background:rgba(255,255,255,0.02); }}
-.platform-detail.phone {{ border-left:2px solid #34d399; }}
-.platform-detail.facetime {{ border-left:2px solid #22d3ee; }}
-.platform-detail.whatsapp {{ border-left:2px solid #25d366; }}
-.platform-detail .platform-pct {{ font-family:var(--font-mono); font-size:28px; font-weight:700; letter-spacing:-1px; }}
-.platform-detail.phone .platform-pct {{ color:#34d399; }}
-.platform-detail.facetime .platform-pct {{ color:#22d3ee; }}
-.platform-detail.whatsapp .platform-pct {{ color:#25d366; }}
-.platform-detail .platform-name {{ font-size:12px; color:var(--muted); margin-top:2px; }}
-.platform-detail .platform-count {{ font-family:var(--font-mono); font-size:11px; color:var(--muted); margin-top:6px; opacity:0.6; }}
-
-/* Dual stats (video vs voice) */
-.dual-stats {{ display:flex; gap:40px; margin:28px 0; }}
-.dual-stat {{ display:flex; flex-direction:column; align-items:center; }}
-.dual-icon {{ font-size:40px; margin-bottom:8px; }}
-.dual-num {{ font-family:var(--font-mono); font-size:40px; font-weight:600; }}
-.dual-label {{ font-size:12px; color:var(--muted); margin-top:6px; }}
-
-/* Duration buckets */
-.duration-buckets {{ display:flex; gap:20px; margin:28px 0; justify-content:center; }}
-.bucket {{ display:flex; flex-direction:column; align-items:center; padding:16px 20px; background:rgba(255,255,255,0.03); border-radius:12px; min-width:90px; }}
-.bucket-icon {{ font-size:28px; margin-bottom:6px; }}
-.bucket-num {{ font-family:var(--font-mono); font-size:32px; font-weight:600; }}
-.bucket-label {{ font-size:11px; color:var(--muted); margin-top:6px; text-align:center; line-height:1.2; }}
-
-/* Personality type */
-.personality-type {{ font-family:var(--font-pixel); font-size:16px; font-weight:400; line-height:1.2; color:var(--purple); margin:20px 0; text-transform:uppercase; letter-spacing:0.5px; text-shadow:0 0 20px rgba(167,139,250,0.3); }}
-
-.slide h1 {{ font-family:var(--font-pixel); font-size:32px; font-weight:400; line-height:1.15; margin:16px 0; }}
-.slide-label {{ font-family:var(--font-pixel); font-size:11px; font-weight:400; color:var(--cyan); letter-spacing:1px; margin-bottom:12px; text-shadow:0 0 20px var(--glow-cyan); }}
-.slide-icon {{ font-size:64px; margin-bottom:12px; }}
-.slide-text {{ font-size:16px; color:var(--muted); margin:6px 0; letter-spacing:0.2px; }}
-.subtitle {{ font-size:16px; color:var(--muted); margin-top:6px; }}
-.subtitle2 {{ font-size:14px; color:var(--muted); margin-top:4px; opacity:0.6; }}
-
-.big-number {{ font-family:var(--font-mono); font-size:72px; font-weight:600; line-height:1; letter-spacing:-3px; }}
-.big-number.gradient {{ background:linear-gradient(135deg, var(--cyan) 0%, var(--green) 100%); -webkit-background-clip:text; -webkit-text-fill-color:transparent; background-clip:text; filter:drop-shadow(0 0 30px var(--glow-cyan)); }}
-.pct {{ font-family:var(--font-body); font-size:44px; }}
-.huge-name {{ font-family:var(--font-body); font-size:28px; font-weight:600; line-height:1.2; word-break:break-word; max-width:85%; margin:12px 0; }}
-.roast {{ font-style:italic; color:var(--muted); font-size:15px; margin-top:14px; max-width:360px; line-height:1.4; }}
-
-.green {{ color:var(--green); }}
-.yellow {{ color:var(--yellow); }}
-.red {{ color:var(--red); }}
-.cyan {{ color:var(--cyan); }}
-.pink {{ color:var(--pink); }}
-.orange {{ color:var(--orange); }}
-.purple {{ color:var(--purple); }}
-
-.source-badge {{ font-size:16px; margin-left:4px; }}
-
-.stat-grid {{ display:flex; gap:32px; margin-top:24px; }}
-.stat-item {{ display:flex; flex-direction:column; align-items:center; }}
-.stat-num {{ font-family:var(--font-mono); font-size:22px; font-weight:600; color:var(--cyan); }}
-.stat-lbl {{ font-size:10px; color:var(--muted); margin-top:4px; text-transform:uppercase; letter-spacing:0.5px; }}
-
-.rank-list {{ width:100%; max-width:380px; margin-top:16px; }}
-.rank-item {{ display:flex; align-items:center; padding:12px 16px; gap:14px; border-radius:8px; margin-bottom:4px; background:rgba(255,255,255,0.02); transition:background 0.2s; }}
-.rank-item:hover {{ background:rgba(255,255,255,0.04); }}
-.rank-item:first-child {{ background:linear-gradient(90deg, var(--glow-cyan) 0%, transparent 100%); border:1px solid rgba(34,211,238,0.2); }}
-.rank-item:first-child .rank-name {{ font-weight:600; color:var(--cyan); }}
-.rank-item:first-child .rank-count {{ font-size:18px; color:var(--cyan); }}
-.rank-num {{ font-family:var(--font-mono); font-size:16px; font-weight:600; color:var(--cyan); width:28px; text-align:center; opacity:0.7; }}
-.rank-item:first-child .rank-num {{ opacity:1; }}
-.rank-name {{ flex:1; font-size:15px; text-align:left; white-space:nowrap; overflow:hidden; text-overflow:ellipsis; }}
-.rank-count {{ font-family:var(--font-mono); font-size:15px; font-weight:600; color:var(--yellow); }}
-
-.tap-hint {{ position:absolute; bottom:60px; font-size:16px; color:var(--muted); animation:pulse 2s infinite; }}
-@keyframes pulse {{ 0%,100%{{opacity:0.4}} 50%{{opacity:1}} }}
-
-/* Animations */
-.slide .slide-label,
-.slide .slide-text,
-.slide .slide-icon,
-.slide .big-number,
-.slide .huge-name,
-.slide .roast,
-.slide .stat-grid,
-.slide .rank-item,
-.slide h1,
-.slide .subtitle,
-.slide .subtitle2,
-.slide .summary-card,
-.slide .contrib-graph,
-.slide .contrib-stats,
-.slide .stacked-bar,
-.slide .platform-details,
-.slide .dual-stats,
-.slide .duration-buckets,
-.slide .personality-type {{
-    opacity: 0;
-    transform: translateY(20px);
-}}
-
-.gallery {{ transition: transform 0.55s cubic-bezier(0.22, 1, 0.36, 1); }}
-
-.slide.active .slide-label {{ animation: textFade 0.4s ease-out forwards; }}
-.slide.active .slide-text {{ animation: textFade 0.4s ease-out 0.1s forwards; }}
-.slide.active .slide-icon {{ animation: iconPop 0.5s cubic-bezier(0.34, 1.56, 0.64, 1) 0.05s forwards; }}
-.slide.active h1 {{ animation: titleReveal 0.5s ease-out 0.12s forwards; }}
-.slide.active .subtitle {{ animation: textFade 0.4s ease-out 0.25s forwards; }}
-.slide.active .subtitle2 {{ animation: textFade 0.4s ease-out 0.35s forwards; }}
-.slide.active .big-number {{ animation: numberFlip 0.6s ease-out 0.18s forwards; }}
-.slide.active .huge-name {{ animation: nameBlur 0.5s ease-out 0.2s forwards; }}
-.slide.active .roast {{ animation: roastType 0.6s ease-out 0.4s forwards; }}
-.slide.active .stat-grid {{ animation: none; opacity: 1; transform: none; }}
-.slide.active .stat-item {{ animation: statFade 0.35s ease-out forwards; }}
-.slide.active .stat-item:nth-child(1) {{ animation-delay: 0.3s; }}
-.slide.active .stat-item:nth-child(2) {{ animation-delay: 0.38s; }}
-.slide.active .stat-item:nth-child(3) {{ animation-delay: 0.46s; }}
-.slide.active .rank-list {{ animation: none; opacity: 1; transform: none; }}
-.slide.active .rank-item {{ animation: rankSlide 0.35s ease-out forwards; }}
-.slide.active .rank-item:nth-child(1) {{ animation-delay: 0.1s; }}
-.slide.active .rank-item:nth-child(2) {{ animation-delay: 0.18s; }}
-.slide.active .rank-item:nth-child(3) {{ animation-delay: 0.26s; }}
-.slide.active .rank-item:nth-child(4) {{ animation-delay: 0.34s; }}
-.slide.active .rank-item:nth-child(5) {{ animation-delay: 0.42s; }}
-.slide.active .summary-card {{ animation: cardRise 0.6s ease-out 0.1s forwards; }}
-.slide.active .screenshot-btn {{ opacity: 0; animation: buttonSlide 0.4s ease-out 0.5s forwards; }}
-.slide.active .share-hint {{ opacity: 0; animation: hintFade 0.4s ease-out 0.7s forwards; }}
-.slide.active .contrib-graph {{ animation: graphReveal 0.8s ease-out 0.15s forwards; }}
-.slide.active .contrib-stats {{ animation: none; opacity: 1; transform: none; }}
-.slide.active .contrib-stat {{ animation: statFade 0.35s ease-out forwards; }}
-.slide.active .contrib-stat:nth-child(1) {{ animation-delay: 0.5s; }}
-.slide.active .contrib-stat:nth-child(2) {{ animation-delay: 0.6s; }}
-.slide.active .contrib-stat:nth-child(3) {{ animation-delay: 0.7s; }}
-.slide.active .stacked-bar {{ animation: barGrow 0.6s ease-out 0.2s forwards; }}
-.slide.active .platform-details {{ animation: textFade 0.5s ease-out 0.5s forwards; }}
-@keyframes barGrow {{ 0% {{ opacity: 0; transform: scaleX(0); }} 100% {{ opacity: 1; transform: scaleX(1); }} }}
-.slide.active .dual-stats {{ animation: textFade 0.5s ease-out 0.2s forwards; }}
-.slide.active .duration-buckets {{ animation: textFade 0.5s ease-out 0.2s forwards; }}
-.slide.active .personality-type {{ animation: glitchReveal 0.8s ease-out 0.15s forwards; }}
-
-@keyframes glitchReveal {{ 0% {{ opacity: 0; transform: translateY(15px); filter: blur(4px); }} 50% {{ opacity: 0.8; transform: translateY(3px) skewX(-3deg); filter: blur(1px); }} 100% {{ opacity: 1; transform: translateY(0) skewX(0); filter: blur(0); }} }}
-
-@keyframes textFade {{ 0% {{ opacity: 0; transform: translateY(15px); }} 100% {{ opacity: 1; transform: translateY(0); }} }}
-@keyframes titleReveal {{ 0% {{ opacity: 0; transform: translateY(25px) scale(0.95); }} 70% {{ transform: translateY(-3px) scale(1.01); }} 100% {{ opacity: 1; transform: translateY(0) scale(1); }} }}
-@keyframes iconPop {{ 0% {{ opacity: 0; transform: translateY(20px) scale(0.4) rotate(-15deg); }} 50% {{ transform: translateY(-8px) scale(1.15) rotate(8deg); }} 75% {{ transform: translateY(2px) scale(0.95) rotate(-3deg); }} 100% {{ opacity: 1; transform: translateY(0) scale(1) rotate(0); }} }}
-@keyframes numberFlip {{ 0% {{ opacity: 0; transform: perspective(400px) rotateX(-60deg) translateY(20px); }} 60% {{ transform: perspective(400px) rotateX(10deg); }} 100% {{ opacity: 1; transform: perspective(400px) rotateX(0) translateY(0); }} }}
-@keyframes nameBlur {{ 0% {{ opacity: 0; transform: translateY(20px); filter: blur(8px); }} 100% {{ opacity: 1; transform: translateY(0); filter: blur(0); }} }}
-@keyframes roastType {{ 0% {{ opacity: 0; clip-path: inset(0 100% 0 0); }} 100% {{ opacity: 1; clip-path: inset(0 0 0 0); }} }}
-@keyframes statFade {{ 0% {{ opacity: 0; transform: translateY(12px); }} 100% {{ opacity: 1; transform: translateY(0); }} }}
-@keyframes rankSlide {{ 0% {{ opacity: 0; transform: translateX(-20px); }} 100% {{ opacity: 1; transform: translateX(0); }} }}
-@keyframes cardRise {{ 0% {{ opacity: 0; transform: translateY(40px); }} 100% {{ opacity: 1; transform: translateY(0); }} }}
-@keyframes graphReveal {{ 0% {{ opacity: 0; transform: translateY(30px) scale(0.95); }} 100% {{ opacity: 1; transform: translateY(0) scale(1); }} }}
-@keyframes buttonSlide {{ 0% {{ opacity: 0; transform: translateY(15px); }} 100% {{ opacity: 1; transform: translateY(0); }} }}
-@keyframes hintFade {{ 0% {{ opacity: 0; }} 100% {{ opacity: 1; }} }}
-
-.summary-card {{
-    background:linear-gradient(160deg,#0f1218 0%,#121820 50%,#0f1218 100%);
-    border:1px solid rgba(255,255,255,0.08);
-    border-radius:20px;
-    padding:28px 24px;
-    width:100%;
-    max-width:380px;
-    text-align:center;
-    box-shadow:0 20px 40px rgba(0,0,0,0.4);
-}}
-.summary-header {{ display:flex; align-items:center; justify-content:center; gap:10px; margin-bottom:20px; padding-bottom:14px; border-bottom:1px solid rgba(255,255,255,0.06); }}
-.summary-logo {{ font-size:24px; }}
-.summary-title {{ font-family:var(--font-pixel); font-size:10px; font-weight:400; color:var(--text); letter-spacing:0.5px; }}
-.summary-hero {{ margin:20px 0; }}
-.summary-big-stat {{ display:flex; flex-direction:column; align-items:center; }}
-.summary-big-num {{ font-family:var(--font-mono); font-size:52px; font-weight:600; background:linear-gradient(135deg, var(--cyan), var(--green)); -webkit-background-clip:text; -webkit-text-fill-color:transparent; background-clip:text; line-height:1; letter-spacing:-2px; }}
-.summary-big-label {{ font-size:11px; color:var(--muted); text-transform:uppercase; letter-spacing:1.5px; margin-top:6px; }}
-.summary-platform-split {{ display:flex; justify-content:center; flex-wrap:wrap; gap:6px 12px; margin:14px 0; padding:10px 16px; border-top:1px solid rgba(255,255,255,0.04); border-bottom:1px solid rgba(255,255,255,0.04); font-family:var(--font-mono); font-size:11px; }}
-.summary-stats {{ display:grid; grid-template-columns:repeat(4,1fr); gap:8px; margin:18px 0; padding:16px 0; border-top:1px solid rgba(255,255,255,0.06); border-bottom:1px solid rgba(255,255,255,0.06); }}
-.summary-stat {{ display:flex; flex-direction:column; align-items:center; }}
-.summary-stat-val {{ font-family:var(--font-mono); font-size:18px; font-weight:600; color:var(--cyan); white-space:nowrap; }}
-.summary-stat-lbl {{ font-size:8px; color:var(--muted); text-transform:uppercase; margin-top:3px; letter-spacing:0.3px; }}
-.summary-personality {{ margin:14px 0; }}
-.summary-personality-type {{ font-family:var(--font-pixel); font-size:10px; font-weight:400; color:var(--purple); text-transform:uppercase; letter-spacing:0.5px; }}
-.summary-top3 {{ margin:12px 0; display:flex; flex-direction:column; gap:4px; }}
-.summary-top3-label {{ font-size:9px; color:var(--muted); text-transform:uppercase; letter-spacing:0.5px; }}
-.summary-top3-names {{ font-size:12px; color:var(--text); opacity:0.9; }}
-.summary-footer {{ margin-top:16px; padding-top:14px; border-top:1px solid rgba(255,255,255,0.06); font-size:10px; color:var(--cyan); font-family:var(--font-pixel); font-weight:400; opacity:0.8; }}
-
-.screenshot-btn {{
-    display:flex; align-items:center; justify-content:center; gap:8px;
-    font-family:var(--font-pixel); font-size:9px; font-weight:400; text-transform:uppercase; letter-spacing:0.5px;
-    background:linear-gradient(135deg, var(--cyan), var(--green)); color:#000; border:none;
-    padding:14px 28px; border-radius:10px; margin-top:24px;
-    cursor:pointer; transition:transform 0.2s,box-shadow 0.2s;
-    box-shadow:0 4px 16px rgba(34,211,238,0.3);
-}}
-.screenshot-btn:hover {{ transform:scale(1.02); box-shadow:0 6px 20px rgba(34,211,238,0.4); }}
-.screenshot-btn:active {{ transform:scale(0.98); }}
-.btn-icon {{ font-size:18px; }}
-.share-hint {{ font-size:13px; color:var(--muted); margin-top:14px; }}
-
-.slide-save-btn {{
-    position:absolute; bottom:56px; left:50%; transform:translateX(-50%);
-    display:flex; align-items:center; justify-content:center; gap:6px;
-    font-family:var(--font-pixel); font-size:8px; font-weight:400; text-transform:uppercase; letter-spacing:0.5px;
-    background:rgba(34,211,238,0.1); color:var(--cyan); border:1px solid rgba(34,211,238,0.2);
-    padding:8px 16px; border-radius:6px;
-    cursor:pointer; transition:all 0.2s; opacity:0;
-}}
-.slide.active .slide-save-btn {{ opacity:0.7; }}
-.slide-save-btn:hover {{ opacity:1; background:rgba(34,211,238,0.15); border-color:rgba(34,211,238,0.4); }}
-
-.slide.capturing, .slide.capturing * {{
-    animation: none !important;
-    opacity: 1 !important;
-    transform: none !important;
-    filter: none !important;
-    clip-path: none !important;
-}}
-.slide-watermark {{
-    position:absolute; bottom:24px; left:50%; transform:translateX(-50%);
-    font-family:var(--font-pixel); font-size:10px; color:var(--cyan); opacity:0.6;
-    display:none;
-}}
-
-.progress {{ position:fixed; bottom:20px; left:50%; transform:translateX(-50%); display:flex; gap:6px; z-index:100; }}
-.dot {{ width:8px; height:8px; border-radius:50%; background:rgba(255,255,255,0.15); transition:all 0.3s; cursor:pointer; }}
-.dot:hover {{ background:rgba(255,255,255,0.3); }}
-.dot.active {{ background:var(--cyan); transform:scale(1.4); box-shadow:0 0 8px var(--cyan); }}
-
-.nav {{ position:fixed; top:50%; transform:translateY(-50%); font-size:28px; color:rgba(255,255,255,0.15); cursor:pointer; z-index:100; padding:20px; transition:color 0.2s; user-select:none; }}
-.nav:hover {{ color:rgba(255,255,255,0.4); }}
-.nav.prev {{ left:4px; }}
-.nav.next {{ right:4px; }}
-.nav.hidden {{ opacity:0; pointer-events:none; }}
-</style>
-</head>
-<body>
-
-<div class="gallery" id="gallery">{slides_html}</div>
+    page_tail = f'''</div>
 <div class="progress" id="progress"></div>
 <div class="nav prev" id="prev">‹</div>
 <div class="nav next" id="next">›</div>
@@ -1770,135 +2138,26 @@ const progressEl = document.getElementById('progress');
 const prevBtn = document.getElementById('prev');
 const nextBtn = document.getElementById('next');
 const total = {num_slides};
-let current = 0;
-
-for (let i = 0; i < total; i++) {{
-    const dot = document.createElement('div');
-    dot.className = 'dot' + (i === 0 ? ' active' : '');
-    dot.onclick = () => goTo(i);
-    progressEl.appendChild(dot);
-}}
-const dots = progressEl.querySelectorAll('.dot');
-const slides = gallery.querySelectorAll('.slide');
-
-function goTo(idx) {{
-    if (idx < 0 || idx >= total) return;
-    slides.forEach(s => s.classList.remove('active'));
-    current = idx;
-    gallery.style.transform = `translateX(-${{current * 100}}vw)`;
-    dots.forEach((d, i) => d.classList.toggle('active', i === current));
-    prevBtn.classList.toggle('hidden', current === 0);
-    nextBtn.classList.toggle('hidden', current === total - 1);
-    setTimeout(() => slides[current].classList.add('active'), 50);
-}}
-
-document.addEventListener('click', (e) => {{
-    if (e.target.closest('.nav, button, .dot')) return;
-    const x = e.clientX / window.innerWidth;
-    if (x < 0.3) goTo(current - 1);
-    else goTo(current + 1);
-}});
-
-document.addEventListener('keydown', (e) => {{
-    if (e.key === 'ArrowRight' || e.key === ' ') {{ e.preventDefault(); goTo(current + 1); }}
-    if (e.key === 'ArrowLeft') {{ e.preventDefault(); goTo(current - 1); }}
-}});
-
-prevBtn.onclick = (e) => {{ e.stopPropagation(); goTo(current - 1); }};
-nextBtn.onclick = (e) => {{ e.stopPropagation(); goTo(current + 1); }};
-
-async function takeScreenshot() {{
-    const card = document.getElementById('summaryCard');
-    const btn = document.querySelector('.screenshot-btn');
-    btn.innerHTML = '<span>Saving...</span>';
-    btn.disabled = true;
-    card.style.opacity = '1';
-    card.style.transform = 'none';
-    await new Promise(r => setTimeout(r, 100));
-    try {{
-        const canvas = await html2canvas(card, {{ backgroundColor:'#1a2f2f', scale:2, logging:false, useCORS:true }});
-        const link = document.createElement('a');
-        link.download = 'calls_wrapped_{year}_summary.png';
-        link.href = canvas.toDataURL('image/png');
-        link.click();
-        btn.innerHTML = '<span class="btn-icon">✓</span><span>Saved!</span>';
-        setTimeout(() => {{ btn.innerHTML = '<span class="btn-icon">📸</span><span>Save Screenshot</span>'; btn.disabled = false; }}, 2000);
-    }} catch (err) {{
-        btn.innerHTML = '<span class="btn-icon">📸</span><span>Save Screenshot</span>';
-        btn.disabled = false;
-    }}
-}}
-
-async function saveSlide(slideEl, filename, btn) {{
-    btn.innerHTML = '⏳';
-    btn.disabled = true;
-    const watermark = slideEl.querySelector('.slide-watermark');
-    if (watermark) watermark.style.display = 'block';
-    btn.style.visibility = 'hidden';
-    slideEl.classList.add('capturing');
-    await new Promise(r => setTimeout(r, 50));
-    const computedBg = getComputedStyle(slideEl).backgroundColor;
-    const bgColor = computedBg && computedBg !== 'rgba(0, 0, 0, 0)' ? computedBg : '#0a0a12';
-    try {{
-        const canvas = await html2canvas(slideEl, {{ backgroundColor: bgColor, scale: 2, logging: false, useCORS: true, width: slideEl.offsetWidth, height: slideEl.offsetHeight }});
-        const size = Math.min(canvas.width, canvas.height);
-        const squareCanvas = document.createElement('canvas');
-        squareCanvas.width = size;
-        squareCanvas.height = size;
-        const ctx = squareCanvas.getContext('2d');
-        ctx.fillStyle = bgColor;
-        ctx.fillRect(0, 0, size, size);
-        const srcX = (canvas.width - size) / 2;
-        const srcY = (canvas.height - size) / 2;
-        ctx.drawImage(canvas, srcX, srcY, size, size, 0, 0, size, size);
-        const link = document.createElement('a');
-        link.download = filename;
-        link.href = squareCanvas.toDataURL('image/png');
-        link.click();
-        btn.innerHTML = '✓';
-        setTimeout(() => {{ btn.innerHTML = '📸 Save'; btn.disabled = false; btn.style.visibility = 'visible'; }}, 2000);
-    }} catch (err) {{
-        btn.innerHTML = '📸 Save';
-        btn.disabled = false;
-        btn.style.visibility = 'visible';
-    }}
-    slideEl.classList.remove('capturing');
-    if (watermark) watermark.style.display = 'none';
-}}
-
-// Contribution graph tooltip
-const tooltip = document.createElement('div');
-tooltip.className = 'contrib-tooltip';
-tooltip.style.display = 'none';
-document.body.appendChild(tooltip);
-
-document.querySelectorAll('.contrib-cell[data-date]').forEach(cell => {{
-    cell.addEventListener('mouseenter', (e) => {{
-        const count = cell.dataset.count;
-        const date = cell.dataset.date;
-        const msgText = cell.dataset.msgText;
-        tooltip.innerHTML = `<div class="tooltip-count">${{count}} ${{msgText}}</div><div class="tooltip-date">${{date}}</div>`;
-        tooltip.style.display = 'block';
-    }});
-    cell.addEventListener('mousemove', (e) => {{
-        tooltip.style.left = (e.clientX + 12) + 'px';
-        tooltip.style.top = (e.clientY - 10) + 'px';
-    }});
-    cell.addEventListener('mouseleave', () => {{
-        tooltip.style.display = 'none';
-    }});
-}});
-
-goTo(0);
-</script>
-</body></html>'''
-
-    with open(path, 'w') as f:
-        f.write(html)
+const summaryFilename = 'calls_wrapped_{year}_summary.png';
+'''
+
+    # Stream the fragments to disk in order rather than joining one big page string;
+    # a 1 MB buffer holds a typical report, so it goes out in a single write.
+    # The static head and script are pre-encoded: only per-report text is encoded here.
+    # Written to a temp file and renamed, so the browser never sees a partial page
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb', buffering=1 << 20) as f:
+        f.writelines((page_head.encode(), REPORT_HEAD))
+        f.writelines(slide.encode() for slide in slides)
+        f.writelines((page_tail.encode(), REPORT_JS))
+    os.replace(tmp_path, path)
     return path
 
 
 def main():
+    # CLI-only modules, imported here so importing this file stays cheap
+    import argparse, subprocess
+
     parser = argparse.ArgumentParser(description='Call Wrapped 2025 - Your calling habits exposed')
     parser.add_argument('--output', '-o', default=None, help='Output HTML file path')
     parser.add_argument('--use-2024', action='store_true', help='Use 2024 data instead of 2025')
@@ -1922,31 +2181,30 @@ def main():
     print(f"\n[*] Platforms: {' + '.join(platforms)}")
 
     print("[*] Loading contacts...")
-    contacts = extract_contacts()
+    # The AddressBook files are independent of the call databases, so load
+    # contacts in a worker while the coverage/count probes run here
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        contacts_future = pool.submit(extract_contacts)
+
+        # Determine year
+        year = "2024" if args.use_2024 else "2025"
+        ts_start = TS_2024_START if year == "2024" else TS_2025_START
+        ts_end = TS_2024_END if year == "2024" else TS_2025_END
+        ts_jun = TS_JUN_2024 if year == "2024" else TS_JUN_2025
+
+        # Check data coverage, counting 2025 calls in the same queries to check we have enough data
+        earliest, latest, total_2025 = scan_coverage(ts_start, ts_end, has_phone, has_whatsapp,
+                                                     count_calls=not args.use_2024)
+
+        contacts = contacts_future.result()
     print(f"    ✓ {len(contacts)} contacts loaded")
 
-    # Determine year
-    year = "2024" if args.use_2024 else "2025"
-    ts_start = TS_2024_START if year == "2024" else TS_2025_START
-    ts_end = TS_2024_END if year == "2024" else TS_2025_END
-    ts_jun = TS_JUN_2024 if year == "2024" else TS_JUN_2025
-
-    # Check data coverage
-    earliest, latest = get_data_coverage(ts_start, ts_end, has_phone, has_whatsapp)
     if earliest:
         earliest_dt = datetime.fromtimestamp(earliest)
         print(f"    ℹ️  Earliest call data: {earliest_dt.strftime('%b %d, %Y')}")
 
-    # Check if we have enough 2025 data
+    # Fall back to 2024 if there isn't enough 2025 data
     if not args.use_2024:
-        total_2025 = 0
-        if has_phone:
-            r = q_phone(f"SELECT COUNT(*) FROM ZCALLRECORD WHERE (ZDATE + {MAC_EPOCH}) > {ts_start}")
-            total_2025 += r[0][0]
-        if has_whatsapp:
-            r = q_whatsapp(f"SELECT COUNT(*) FROM ZWAAGGREGATECALLEVENT WHERE (ZFIRSTDATE + {MAC_EPOCH}) > {ts_start}")
-            total_2025 += r[0][0]
-
         if total_2025 < 10:
             print(f"    ⚠️  Only {total_2025} calls in 2025, using 2024")
             year = "2024"
@@ -1959,21 +2217,20 @@ def main():
 
     spinner = Spinner()
 
-    # Analyze phone calls
-    phone_calls = []
+    # Analyze phone and WhatsApp calls: separate database files, so read them concurrently
+    print(f"[*] Analyzing {' + '.join(platforms)} {year}...")
+    spinner.start("Reading call history...")
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        phone_future = pool.submit(analyze_phone_calls, ts_start, ts_end, ts_jun, contacts) if has_phone else None
+        whatsapp_future = pool.submit(analyze_whatsapp_calls, ts_start, ts_end, ts_jun, contacts) if has_whatsapp else None
+        phone_calls = phone_future.result() if phone_future else []
+        whatsapp_calls = whatsapp_future.result() if whatsapp_future else []
+    counts = []
     if has_phone:
-        print(f"[*] Analyzing Phone/FaceTime {year}...")
-        spinner.start("Reading call history...")
-        phone_calls = analyze_phone_calls(ts_start, ts_end, ts_jun, contacts)
-        spinner.stop(f"{len(phone_calls)} phone/FaceTime calls analyzed")
-
-    # Analyze WhatsApp calls
-    whatsapp_calls = []
+        counts.append(f"{len(phone_calls)} phone/FaceTime")
     if has_whatsapp:
-        print(f"[*] Analyzing WhatsApp {year}...")
-        spinner.start("Reading WhatsApp calls...")
-        whatsapp_calls = analyze_whatsapp_calls(ts_start, ts_end, ts_jun, contacts)
-        spinner.stop(f"{len(whatsapp_calls)} WhatsApp calls analyzed")
+        counts.append(f"{len(whatsapp_calls)} WhatsApp")
+    spinner.stop(f"{' + '.join(counts)} calls analyzed")
 
     print("[*] Combining and analyzing...")
     spinner.start("Crunching numbers...")
@@ -1985,7 +2242,8 @@ def main():
     gen_html(data, output_file, year, has_phone, has_whatsapp, earliest, latest)
     spinner.stop(f"Saved to {output_file}")
 
-    subprocess.run(['open', output_file])
+    # Launch without waiting on LaunchServices; the report is already complete on disk
+    subprocess.Popen(['open', output_file])
     print("\n  Done! Click through your call wrapped.\n")
 
 
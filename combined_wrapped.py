@@ -4,8 +4,10 @@ Combined Wrapped 2025 - Your texting habits across iMessage AND WhatsApp, expose
 Usage: python3 combined_wrapped.py
 """
 
-import sqlite3, os, sys, re, subprocess, argparse, glob, threading, time
-from datetime import datetime, timedelta
+import sqlite3, os, sys, subprocess, argparse, glob, threading, time, pathlib, heapq, functools, pickle, bisect
+from datetime import datetime, date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
 
 # Database paths
 IMESSAGE_DB = os.path.expanduser("~/Library/Messages/chat.db")
@@ -17,34 +19,42 @@ WHATSAPP_PATHS = [
 ]
 
 WHATSAPP_DB = None
+ANALYSIS_CACHE_DIR = os.path.expanduser("~/.cache/wrap2025")
 
 class Spinner:
     """Animated terminal spinner for long operations"""
     def __init__(self, message=""):
         self.message = message
-        self.spinning = False
+        self.stop_event = threading.Event()
         self.thread = None
         self.frames = ['⣾', '⣽', '⣻', '⢿', '⡿', '⣟', '⣯', '⣷']
+        self.animate = sys.stdout.isatty()  # don't spam frames into pipes/logs
 
     def spin(self):
         i = 0
-        while self.spinning:
+        while True:
             frame = self.frames[i % len(self.frames)]
             print(f"\r    {frame} {self.message}", end='', flush=True)
-            time.sleep(0.1)
+            # A slow frame rate keeps this thread from taking the GIL away from
+            # the analysis threads; the wait also ends immediately on stop()
+            if self.stop_event.wait(0.25):
+                break
             i += 1
 
     def start(self, message=None):
         if message:
             self.message = message
-        self.spinning = True
-        self.thread = threading.Thread(target=self.spin)
+        if not self.animate:
+            return  # no thread at all when there's no terminal to draw on
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.spin, daemon=True)
         self.thread.start()
 
     def stop(self, final_message=None):
-        self.spinning = False
+        self.stop_event.set()
         if self.thread:
             self.thread.join()
+            self.thread = None
         if final_message:
             print(f"\r    ✓ {final_message}".ljust(60))
         else:
@@ -70,9 +80,45 @@ TS_JUN_2024_WHATSAPP = 738892800
 TS_2025_END_WHATSAPP = 788918399  # Dec 31, 2025 23:59:59
 TS_2024_END_WHATSAPP = 757382399  # Dec 31, 2024 23:59:59
 
+class DigitTable(dict):
+    """str.translate table that deletes every non-digit (same set as regex \\D)."""
+    def __missing__(self, codepoint):
+        value = codepoint if chr(codepoint).isdecimal() else None
+        self[codepoint] = value
+        return value
+
+DIGIT_TABLE = DigitTable()
+
+# Read-only analytics tuning applied to every connection. The databases are
+# opened with mode=ro rather than immutable=1: Messages and WhatsApp keep
+# writing to their WAL while we read, and immutable would ignore it. mode=ro
+# already rejects writes to the main database while still allowing the
+# in-memory temp tables analyze_imessage builds, so query_only is not set.
+READ_PRAGMAS = (
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=268435456",
+)
+
+def open_readonly(path, **kwargs):
+    """Open a read-only connection to a database with READ_PRAGMAS applied."""
+    conn = sqlite3.connect(f"{pathlib.Path(path).as_uri()}?mode=ro", uri=True, **kwargs)
+    for pragma in READ_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+def imessage_date_ns(ts):
+    """Convert a Unix timestamp to iMessage's raw date (nanoseconds since 2001)."""
+    return (ts - COCOA_OFFSET) * 1000000000
+
+def pct(part, whole):
+    """part as an integer percentage of whole, rounded half up without floats."""
+    whole = max(whole, 1)
+    return (part * 100 + whole // 2) // whole
+
 def normalize_phone(phone):
     if not phone: return None
-    digits = re.sub(r'\D', '', str(phone))
+    digits = str(phone).translate(DIGIT_TABLE)
     if len(digits) == 11 and digits.startswith('1'):
         digits = digits[1:]
     elif len(digits) > 10:
@@ -87,15 +133,19 @@ def extract_imessage_contacts():
     if os.path.exists(main_db): db_paths.append(main_db)
     for db_path in db_paths:
         try:
-            conn = sqlite3.connect(db_path)
-            people = {}
-            for row in conn.execute("SELECT ROWID, ZFIRSTNAME, ZLASTNAME FROM ZABCDRECORD WHERE ZFIRSTNAME IS NOT NULL OR ZLASTNAME IS NOT NULL"):
-                name = f"{row[1] or ''} {row[2] or ''}".strip()
-                if name: people[row[0]] = name
-            for owner, phone in conn.execute("SELECT ZOWNER, ZFULLNUMBER FROM ZABCDPHONENUMBER WHERE ZFULLNUMBER IS NOT NULL"):
-                if owner in people:
-                    name = people[owner]
-                    digits = re.sub(r'\D', '', str(phone))
+            conn = open_readonly(db_path)
+            # Join each phone/email to its owner in SQL, so unnamed and
+            # orphaned entries never reach Python; rows keep table order, which
+            # decides the winner when two people share a number
+            named = "(r.ZFIRSTNAME IS NOT NULL OR r.ZLASTNAME IS NOT NULL)"
+            for first, last, phone in conn.execute(f"""
+                SELECT r.ZFIRSTNAME, r.ZLASTNAME, p.ZFULLNUMBER
+                FROM ZABCDPHONENUMBER p JOIN ZABCDRECORD r ON r.ROWID = p.ZOWNER
+                WHERE p.ZFULLNUMBER IS NOT NULL AND {named} ORDER BY p.ROWID
+            """):
+                name = f"{first or ''} {last or ''}".strip()
+                if name:
+                    digits = str(phone).translate(DIGIT_TABLE)
                     if digits:
                         contacts[digits] = name
                         if len(digits) >= 10:
@@ -104,8 +154,13 @@ def extract_imessage_contacts():
                             contacts[digits[-7:]] = name
                         if len(digits) == 11 and digits.startswith('1'):
                             contacts[digits[1:]] = name
-            for owner, email in conn.execute("SELECT ZOWNER, ZADDRESS FROM ZABCDEMAILADDRESS WHERE ZADDRESS IS NOT NULL"):
-                if owner in people: contacts[email.lower().strip()] = people[owner]
+            for first, last, email in conn.execute(f"""
+                SELECT r.ZFIRSTNAME, r.ZLASTNAME, e.ZADDRESS
+                FROM ZABCDEMAILADDRESS e JOIN ZABCDRECORD r ON r.ROWID = e.ZOWNER
+                WHERE e.ZADDRESS IS NOT NULL AND {named} ORDER BY e.ROWID
+            """):
+                name = f"{first or ''} {last or ''}".strip()
+                if name: contacts[email.lower().strip()] = name
             conn.close()
         except: pass
     return contacts
@@ -116,12 +171,10 @@ def extract_whatsapp_contacts():
     if not WHATSAPP_DB:
         return contacts
     try:
-        conn = sqlite3.connect(WHATSAPP_DB)
-        for row in conn.execute("SELECT ZJID, ZPUSHNAME FROM ZWAPROFILEPUSHNAME WHERE ZPUSHNAME IS NOT NULL"):
+        for row in db_conn(WHATSAPP_DB).execute("SELECT ZJID, ZPUSHNAME FROM ZWAPROFILEPUSHNAME WHERE ZPUSHNAME IS NOT NULL"):
             jid, name = row
             if jid and name:
                 contacts[jid] = name
-        conn.close()
     except:
         pass
     return contacts
@@ -131,7 +184,7 @@ def get_name_imessage(handle, contacts):
         lookup = handle.lower().strip()
         if lookup in contacts: return contacts[lookup]
         return handle.split('@')[0]
-    digits = re.sub(r'\D', '', str(handle))
+    digits = str(handle).translate(DIGIT_TABLE)
     if digits in contacts: return contacts[digits]
     if len(digits) == 11 and digits.startswith('1'):
         if digits[1:] in contacts: return contacts[digits[1:]]
@@ -155,6 +208,7 @@ def get_name_whatsapp(jid, contacts):
         return f"+{phone}"
     return jid
 
+@functools.lru_cache(maxsize=1)
 def find_whatsapp_database():
     """Find the WhatsApp database path."""
     for path in WHATSAPP_PATHS:
@@ -169,26 +223,23 @@ def check_access():
     has_imessage = False
     has_whatsapp = False
 
-    # Check iMessage
-    if os.path.exists(IMESSAGE_DB):
-        try:
-            conn = sqlite3.connect(IMESSAGE_DB)
-            conn.execute("SELECT 1 FROM message LIMIT 1")
-            conn.close()
-            has_imessage = True
-        except:
-            pass
+    # Check iMessage. Probes go through the connection cache, so a database
+    # that passes keeps its connection for the analysis (opening with mode=ro
+    # already fails on a missing file, so there's no separate exists check)
+    try:
+        db_conn(IMESSAGE_DB).execute("SELECT 1 FROM message LIMIT 1")
+        has_imessage = True
+    except:
+        close_db(IMESSAGE_DB)
 
     # Check WhatsApp
     WHATSAPP_DB = find_whatsapp_database()
     if WHATSAPP_DB:
         try:
-            conn = sqlite3.connect(WHATSAPP_DB)
-            conn.execute("SELECT 1 FROM ZWAMESSAGE LIMIT 1")
-            conn.close()
+            db_conn(WHATSAPP_DB).execute("SELECT 1 FROM ZWAMESSAGE LIMIT 1")
             has_whatsapp = True
         except:
-            pass
+            close_db(WHATSAPP_DB)
 
     if not has_imessage and not has_whatsapp:
         print("\n[!] ACCESS DENIED - Neither iMessage nor WhatsApp accessible")
@@ -198,240 +249,255 @@ def check_access():
 
     return has_imessage, has_whatsapp
 
-def q_imessage(sql):
-    conn = sqlite3.connect(IMESSAGE_DB)
-    r = conn.execute(sql).fetchall()
-    conn.close()
-    return r
+_connections = {}  # db path -> open connection, shared by every query on that db
+
+def db_conn(path):
+    """Return the cached connection for a database, opening it on first use."""
+    conn = _connections.get(path)
+    if conn is None:
+        # Connections may be opened on the main thread but read from analyzer
+        # threads; each database is only ever used by one thread at a time
+        conn = _connections[path] = open_readonly(path, check_same_thread=False)
+    return conn
+
+def close_db(path):
+    """Close and forget the cached connection for a database, if any."""
+    conn = _connections.pop(path, None)
+    if conn is not None:
+        conn.close()
+
+def q_imessage(sql, params=()):
+    return db_conn(IMESSAGE_DB).execute(sql, params).fetchall()
+
+def q_whatsapp(sql, params=()):
+    return db_conn(WHATSAPP_DB).execute(sql, params).fetchall()
 
-def q_whatsapp(sql):
-    conn = sqlite3.connect(WHATSAPP_DB)
-    r = conn.execute(sql).fetchall()
-    conn.close()
-    return r
+def contact_lists(rows):
+    """Build the per-contact leaderboards from one row of counts per contact.
+
+    Each row is (id, total, sent, received, late_night, received_before_jun,
+    received_after_jun, total_before_jun, total_after_jun).
+    """
+    ratio = lambda a, b: -a / b if b else float('inf')
+    top = heapq.nlargest(20, rows, key=lambda r: r[1])
+    late = heapq.nlargest(10, (r for r in rows if r[4] > 5), key=lambda r: r[4])
+    ghosted = heapq.nlargest(10, (r for r in rows if r[5] > 10 and r[6] < 3), key=lambda r: r[5])
+    heating = heapq.nsmallest(10, (r for r in rows if r[7] > 20 and r[8] > r[7] * 1.5), key=lambda r: r[7] - r[8])
+    fan = heapq.nsmallest(10, (r for r in rows if r[3] > r[2] * 2 and r[1] > 100), key=lambda r: ratio(r[3], r[2]))
+    simp = heapq.nsmallest(10, (r for r in rows if r[2] > r[3] * 2 and r[1] > 100), key=lambda r: ratio(r[2], r[3]))
+    return {
+        'top': [r[:4] for r in top],
+        'late': [(r[0], r[4]) for r in late],
+        'ghosted': [(r[0], r[5], r[6]) for r in ghosted],
+        'heating': [(r[0], r[7], r[8]) for r in heating],
+        'fan': [(r[0], r[3], r[2]) for r in fan],
+        'simp': [(r[0], r[2], r[3]) for r in simp],
+    }
+
+def utc_offsets(ts_start, ts_end):
+    """Local UTC offset over a time range, as [(from_ts, offset_seconds)]."""
+    segments = [(ts_start, time.localtime(ts_start).tm_gmtoff)]
+    t = ts_start
+    while t < ts_end:
+        nxt = min(t + 86400, ts_end)
+        if time.localtime(nxt).tm_gmtoff != segments[-1][1]:
+            # Binary search for the first second on the new offset
+            lo, hi = t, nxt
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                if time.localtime(mid).tm_gmtoff == segments[-1][1]:
+                    lo = mid
+                else:
+                    hi = mid
+            segments.append((hi, time.localtime(hi).tm_gmtoff))
+        t = nxt
+    return segments
+
+def local_hour_sql(ts_sql, ts_start, ts_end):
+    """SQL expression for the local hour of the integer Unix time ts_sql.
+
+    Plain arithmetic against the range's UTC offset segments (DST changes
+    included), so SQLite doesn't call datetime()/strftime() for every row.
+    """
+    segments = utc_offsets(ts_start, ts_end)
+    offset = str(segments[-1][1])
+    if len(segments) > 1:
+        whens = ' '.join(f"WHEN {ts_sql} < {nxt} THEN {off}" for (_, off), (nxt, _) in zip(segments, segments[1:]))
+        offset = f"CASE {whens} ELSE {offset} END"
+    return f"(({ts_sql} + {offset}) / 3600 % 24)"
+
+# Activity is counted in 15-minute buckets of Unix time. Every UTC offset and
+# DST shift is a multiple of 15 minutes, so all of a bucket falls on one local
+# date and hour: SQLite only integer-divides, and localtime runs per bucket
+ACTIVITY_BUCKET = 900
+
+def activity_summary(rows):
+    """Derive peak hour, peak day, busiest day and daily counts from
+    (bucket, count) rows ordered by bucket."""
+    days = ['Sunday','Monday','Tuesday','Wednesday','Thursday','Friday','Saturday']
+    hours, weekdays, daily_counts = {}, {}, {}
+    for bucket, c in rows:
+        t = datetime.fromtimestamp(bucket * ACTIVITY_BUCKET)
+        day = t.strftime('%Y-%m-%d')
+        w = (t.weekday() + 1) % 7  # Sunday = 0
+        hours[t.hour] = hours.get(t.hour, 0) + c
+        weekdays[w] = weekdays.get(w, 0) + c
+        daily_counts[day] = daily_counts.get(day, 0) + c
+    return {
+        'hour': max(hours, key=hours.get) if hours else 12,
+        'day': days[max(weekdays, key=weekdays.get)] if weekdays else '???',
+        'busiest_day': max(daily_counts.items(), key=lambda x: x[1]) if daily_counts else None,
+        'daily_counts': daily_counts,
+    }
 
 def analyze_imessage(ts_start, ts_end, ts_jun):
     """Analyze iMessage data and return stats dict."""
     d = {}
 
-    one_on_one_cte = """
+    # Query parameters: bounds on the raw date column, so range filters can
+    # use its index ((date/1e9 + offset) > ts_start  <=>  date >= ns(ts_start + 1))
+    bounds = {
+        'start': imessage_date_ns(ts_start + 1),
+        'end': imessage_date_ns(ts_end),
+        'jun': imessage_date_ns(ts_jun),
+    }
+
+    # Split messages into one-on-one and group chats once, and list the handles
+    # that aren't short codes or business chats; every query below reads these
+    # temp tables instead of rebuilding them per query or per message row
+    db_conn(IMESSAGE_DB).executescript("""
+        DROP TABLE IF EXISTS temp.one_on_one_messages;
+        DROP TABLE IF EXISTS temp.group_messages;
+        DROP TABLE IF EXISTS temp.good_handles;
+        CREATE TEMP TABLE good_handles (rid INTEGER PRIMARY KEY);
+        INSERT INTO good_handles
+            SELECT ROWID FROM handle
+            WHERE NOT (LENGTH(REPLACE(REPLACE(id, '+', ''), '-', '')) BETWEEN 5 AND 6 AND REPLACE(REPLACE(id, '+', ''), '-', '') GLOB '[0-9]*')
+            AND id NOT LIKE 'urn:%';
+        CREATE TEMP TABLE one_on_one_messages (msg_id INTEGER PRIMARY KEY);
+        CREATE TEMP TABLE group_messages (msg_id INTEGER, chat_id INTEGER);
         WITH chat_participants AS (
-            SELECT chat_id, COUNT(*) as participant_count
-            FROM chat_handle_join
-            GROUP BY chat_id
-        ),
-        one_on_one_messages AS (
-            SELECT m.ROWID as msg_id
-            FROM message m
-            JOIN chat_message_join cmj ON m.ROWID = cmj.message_id
+            SELECT chat_id, COUNT(*) as participant_count FROM chat_handle_join GROUP BY chat_id
+        )
+        INSERT OR IGNORE INTO one_on_one_messages
+            SELECT cmj.message_id FROM chat_message_join cmj
             JOIN chat_participants cp ON cmj.chat_id = cp.chat_id
-            WHERE cp.participant_count = 1
+            WHERE cp.participant_count = 1;
+        WITH chat_participants AS (
+            SELECT chat_id, COUNT(*) as participant_count FROM chat_handle_join GROUP BY chat_id
         )
-    """
+        INSERT INTO group_messages
+            SELECT cmj.message_id, cmj.chat_id FROM chat_message_join cmj
+            JOIN chat_participants cp ON cmj.chat_id = cp.chat_id
+            WHERE cp.participant_count >= 2;
+    """)
 
     # Stats
-    raw_stats = q_imessage(f"""{one_on_one_cte}
+    raw_stats = q_imessage("""
         SELECT COUNT(*), SUM(CASE WHEN is_from_me=1 THEN 1 ELSE 0 END), SUM(CASE WHEN is_from_me=0 THEN 1 ELSE 0 END), COUNT(DISTINCT handle_id)
-        FROM message m
-        WHERE (date/1000000000+978307200)>{ts_start} AND (date/1000000000+978307200)<{ts_end}
-        AND m.ROWID IN (SELECT msg_id FROM one_on_one_messages)
-    """)[0]
+        FROM message m JOIN one_on_one_messages oom ON oom.msg_id = m.ROWID
+        WHERE date >= :start AND date < :end
+    """, bounds)[0]
     d['stats'] = (raw_stats[0] or 0, raw_stats[1] or 0, raw_stats[2] or 0, raw_stats[3] or 0)
 
-    # Top contacts
-    d['top'] = q_imessage(f"""{one_on_one_cte}
-        SELECT h.id, COUNT(*) t, SUM(CASE WHEN m.is_from_me=1 THEN 1 ELSE 0 END), SUM(CASE WHEN m.is_from_me=0 THEN 1 ELSE 0 END)
-        FROM message m JOIN handle h ON m.handle_id=h.ROWID
-        WHERE (m.date/1000000000+978307200)>{ts_start} AND (m.date/1000000000+978307200)<{ts_end}
-        AND m.ROWID IN (SELECT msg_id FROM one_on_one_messages)
-        AND NOT (LENGTH(REPLACE(REPLACE(h.id, '+', ''), '-', '')) BETWEEN 5 AND 6 AND REPLACE(REPLACE(h.id, '+', ''), '-', '') GLOB '[0-9]*')
-        AND h.id NOT LIKE 'urn:%'
-        GROUP BY h.id ORDER BY t DESC LIMIT 20
-    """)
-
-    # Late night
-    d['late'] = q_imessage(f"""{one_on_one_cte}
-        SELECT h.id, COUNT(*) n FROM message m JOIN handle h ON m.handle_id=h.ROWID
-        WHERE (m.date/1000000000+978307200)>{ts_start} AND (m.date/1000000000+978307200)<{ts_end}
-        AND CAST(strftime('%H',datetime((m.date/1000000000+978307200),'unixepoch','localtime')) AS INT)<5
-        AND m.ROWID IN (SELECT msg_id FROM one_on_one_messages)
-        AND NOT (LENGTH(REPLACE(REPLACE(h.id, '+', ''), '-', '')) BETWEEN 5 AND 6 AND REPLACE(REPLACE(h.id, '+', ''), '-', '') GLOB '[0-9]*')
-        AND h.id NOT LIKE 'urn:%'
-        GROUP BY h.id HAVING n>5 ORDER BY n DESC LIMIT 10
-    """)
-
-    # Peak hour
-    r = q_imessage(f"SELECT CAST(strftime('%H',datetime((date/1000000000+978307200),'unixepoch','localtime')) AS INT) h, COUNT(*) c FROM message WHERE (date/1000000000+978307200)>{ts_start} AND (date/1000000000+978307200)<{ts_end} GROUP BY h ORDER BY c DESC LIMIT 1")
-    d['hour'] = r[0][0] if r else 12
-
-    # Peak day
-    days = ['Sunday','Monday','Tuesday','Wednesday','Thursday','Friday','Saturday']
-    r = q_imessage(f"SELECT CAST(strftime('%w',datetime((date/1000000000+978307200),'unixepoch','localtime')) AS INT) d, COUNT(*) FROM message WHERE (date/1000000000+978307200)>{ts_start} AND (date/1000000000+978307200)<{ts_end} GROUP BY d ORDER BY 2 DESC LIMIT 1")
-    d['day'] = days[r[0][0]] if r else '???'
-
-    # Ghosted
-    d['ghosted'] = q_imessage(f"""{one_on_one_cte}
-        SELECT h.id, SUM(CASE WHEN m.is_from_me=0 AND (m.date/1000000000+978307200)<{ts_jun} THEN 1 ELSE 0 END) b, SUM(CASE WHEN m.is_from_me=0 AND (m.date/1000000000+978307200)>={ts_jun} THEN 1 ELSE 0 END) a
-        FROM message m JOIN handle h ON m.handle_id=h.ROWID
-        WHERE (m.date/1000000000+978307200)>{ts_start} AND (m.date/1000000000+978307200)<{ts_end}
-        AND m.ROWID IN (SELECT msg_id FROM one_on_one_messages)
-        AND NOT (LENGTH(REPLACE(REPLACE(h.id, '+', ''), '-', '')) BETWEEN 5 AND 6 AND REPLACE(REPLACE(h.id, '+', ''), '-', '') GLOB '[0-9]*')
-        AND h.id NOT LIKE 'urn:%'
-        GROUP BY h.id HAVING b>10 AND a<3 ORDER BY b DESC LIMIT 10
-    """)
-
-    # Heating up
-    d['heating'] = q_imessage(f"""{one_on_one_cte}
-        SELECT h.id, SUM(CASE WHEN (m.date/1000000000+978307200)<{ts_jun} THEN 1 ELSE 0 END) h1, SUM(CASE WHEN (m.date/1000000000+978307200)>={ts_jun} THEN 1 ELSE 0 END) h2
-        FROM message m JOIN handle h ON m.handle_id=h.ROWID
-        WHERE (m.date/1000000000+978307200)>{ts_start} AND (m.date/1000000000+978307200)<{ts_end}
-        AND m.ROWID IN (SELECT msg_id FROM one_on_one_messages)
-        AND NOT (LENGTH(REPLACE(REPLACE(h.id, '+', ''), '-', '')) BETWEEN 5 AND 6 AND REPLACE(REPLACE(h.id, '+', ''), '-', '') GLOB '[0-9]*')
-        AND h.id NOT LIKE 'urn:%'
-        GROUP BY h.id HAVING h1>20 AND h2>h1*1.5 ORDER BY (h2-h1) DESC LIMIT 10
-    """)
-
-    # Biggest fan
-    d['fan'] = q_imessage(f"""{one_on_one_cte}
-        SELECT h.id, SUM(CASE WHEN m.is_from_me=0 THEN 1 ELSE 0 END) t, SUM(CASE WHEN m.is_from_me=1 THEN 1 ELSE 0 END) y
-        FROM message m JOIN handle h ON m.handle_id=h.ROWID
-        WHERE (m.date/1000000000+978307200)>{ts_start} AND (m.date/1000000000+978307200)<{ts_end}
-        AND m.ROWID IN (SELECT msg_id FROM one_on_one_messages)
-        AND NOT (LENGTH(REPLACE(REPLACE(h.id, '+', ''), '-', '')) BETWEEN 5 AND 6 AND REPLACE(REPLACE(h.id, '+', ''), '-', '') GLOB '[0-9]*')
-        AND h.id NOT LIKE 'urn:%'
-        GROUP BY h.id HAVING t>y*2 AND (t+y)>100 ORDER BY (t*1.0/NULLIF(y,0)) DESC LIMIT 10
-    """)
-
-    # Simp
-    d['simp'] = q_imessage(f"""{one_on_one_cte}
-        SELECT h.id, SUM(CASE WHEN m.is_from_me=1 THEN 1 ELSE 0 END) y, SUM(CASE WHEN m.is_from_me=0 THEN 1 ELSE 0 END) t
-        FROM message m JOIN handle h ON m.handle_id=h.ROWID
-        WHERE (m.date/1000000000+978307200)>{ts_start} AND (m.date/1000000000+978307200)<{ts_end}
-        AND m.ROWID IN (SELECT msg_id FROM one_on_one_messages)
-        AND NOT (LENGTH(REPLACE(REPLACE(h.id, '+', ''), '-', '')) BETWEEN 5 AND 6 AND REPLACE(REPLACE(h.id, '+', ''), '-', '') GLOB '[0-9]*')
-        AND h.id NOT LIKE 'urn:%'
-        GROUP BY h.id HAVING y>t*2 AND (t+y)>100 ORDER BY (y*1.0/NULLIF(t,0)) DESC LIMIT 10
-    """)
+    # Per-contact counts (top, late night, ghosted, heating up, fan, simp)
+    late_hour = local_hour_sql("(m.date/1000000000+978307200)", ts_start, ts_end)
+    rows = q_imessage(f"""
+        SELECT h.id, COUNT(*),
+               SUM(CASE WHEN m.is_from_me=1 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN m.is_from_me=0 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN {late_hour}<5 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN m.is_from_me=0 AND m.date < :jun THEN 1 ELSE 0 END),
+               SUM(CASE WHEN m.is_from_me=0 AND m.date >= :jun THEN 1 ELSE 0 END),
+               SUM(CASE WHEN m.date < :jun THEN 1 ELSE 0 END),
+               SUM(CASE WHEN m.date >= :jun THEN 1 ELSE 0 END)
+        FROM message m JOIN one_on_one_messages oom ON oom.msg_id = m.ROWID JOIN handle h ON m.handle_id=h.ROWID
+        WHERE m.date >= :start AND m.date < :end
+        AND m.handle_id IN (SELECT rid FROM good_handles)
+        GROUP BY h.id
+    """, bounds)
+    d.update(contact_lists(rows))
 
-    # Response time
+    # Activity buckets; one scan feeds peak hour, peak day, busiest day and
+    # the daily counts
     r = q_imessage(f"""
-        WITH chat_participants AS (
-            SELECT chat_id, COUNT(*) as participant_count
-            FROM chat_handle_join
-            GROUP BY chat_id
-        ),
-        one_on_one_messages AS (
-            SELECT m.ROWID as msg_id
-            FROM message m
-            JOIN chat_message_join cmj ON m.ROWID = cmj.message_id
-            JOIN chat_participants cp ON cmj.chat_id = cp.chat_id
-            WHERE cp.participant_count = 1
-        ),
-        g AS (
-            SELECT (m.date/1000000000+978307200) ts, m.is_from_me, m.handle_id,
-                   LAG(m.date/1000000000+978307200) OVER (PARTITION BY m.handle_id ORDER BY m.date) pt,
-                   LAG(m.is_from_me) OVER (PARTITION BY m.handle_id ORDER BY m.date) pf
-            FROM message m
-            WHERE (m.date/1000000000+978307200)>{ts_start} AND (m.date/1000000000+978307200)<{ts_end}
-            AND m.ROWID IN (SELECT msg_id FROM one_on_one_messages)
+        SELECT (date/1000000000+978307200)/{ACTIVITY_BUCKET} b, COUNT(*)
+        FROM message WHERE date >= :start AND date < :end GROUP BY b ORDER BY b
+    """, bounds)
+    d.update(activity_summary(r))
+
+    # Response time + starter % (one LAG pass)
+    r = q_imessage("""
+        WITH g AS (
+            SELECT (m.date/1000000000+978307200) ts, m.is_from_me,
+                   LAG(m.date/1000000000+978307200) OVER w pt,
+                   LAG(m.is_from_me) OVER w pf
+            FROM message m JOIN one_on_one_messages oom ON oom.msg_id = m.ROWID
+            WHERE m.date >= :start AND m.date < :end
+            WINDOW w AS (PARTITION BY m.handle_id ORDER BY m.date)
         )
-        SELECT AVG(ts-pt)/60.0 FROM g
-        WHERE is_from_me=1 AND pf=0 AND (ts-pt)<86400 AND (ts-pt)>10
-    """)
+        SELECT AVG(CASE WHEN is_from_me=1 AND pf=0 AND (ts-pt)<86400 AND (ts-pt)>10 THEN ts-pt END)/60.0,
+               SUM(CASE WHEN (pt IS NULL OR (ts-pt) > 14400) AND is_from_me=1 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN pt IS NULL OR (ts-pt) > 14400 THEN 1 ELSE 0 END)
+        FROM g
+    """, bounds)
     d['resp'] = int(r[0][0] or 30)
+    d['starter_pct'] = pct(r[0][1] or 0, r[0][2]) if r and r[0][2] else 50
 
     # Per-person response time: who you reply to fastest (YOUR PRIORITY LIST)
-    d['priority_list'] = q_imessage(f"""
-        WITH chat_participants AS (
-            SELECT chat_id, COUNT(*) as participant_count
-            FROM chat_handle_join GROUP BY chat_id
-        ),
-        one_on_one_messages AS (
-            SELECT m.ROWID as msg_id
-            FROM message m
-            JOIN chat_message_join cmj ON m.ROWID = cmj.message_id
-            JOIN chat_participants cp ON cmj.chat_id = cp.chat_id
-            WHERE cp.participant_count = 1
-        ),
-        response_pairs AS (
+    d['priority_list'] = q_imessage("""
+        WITH response_pairs AS (
             SELECT m.handle_id,
                    (m.date/1000000000+978307200) ts,
                    m.is_from_me,
                    LAG(m.date/1000000000+978307200) OVER (PARTITION BY m.handle_id ORDER BY m.date) pt,
                    LAG(m.is_from_me) OVER (PARTITION BY m.handle_id ORDER BY m.date) pf
-            FROM message m
-            WHERE (m.date/1000000000+978307200) > {ts_start} AND (m.date/1000000000+978307200) < {ts_end}
-            AND m.ROWID IN (SELECT msg_id FROM one_on_one_messages)
+            FROM message m JOIN one_on_one_messages oom ON oom.msg_id = m.ROWID
+            WHERE m.date >= :start AND m.date < :end
         )
         SELECT h.id, AVG(rp.ts - rp.pt)/60.0 as avg_resp_min, COUNT(*) as reply_count
         FROM response_pairs rp
         JOIN handle h ON rp.handle_id = h.ROWID
         WHERE rp.is_from_me = 1 AND rp.pf = 0
         AND (rp.ts - rp.pt) BETWEEN 10 AND 86400
-        AND NOT (LENGTH(REPLACE(REPLACE(h.id, '+', ''), '-', '')) BETWEEN 5 AND 6 AND REPLACE(REPLACE(h.id, '+', ''), '-', '') GLOB '[0-9]*')
-        AND h.id NOT LIKE 'urn:%'
+        AND rp.handle_id IN (SELECT rid FROM good_handles)
         GROUP BY h.id
         HAVING reply_count >= 50
         ORDER BY avg_resp_min ASC
         LIMIT 10
-    """)
+    """, bounds)
 
     # Per-person response time: who replies to YOU fastest (WHO DROPS EVERYTHING)
-    d['fast_responders'] = q_imessage(f"""
-        WITH chat_participants AS (
-            SELECT chat_id, COUNT(*) as participant_count
-            FROM chat_handle_join GROUP BY chat_id
-        ),
-        one_on_one_messages AS (
-            SELECT m.ROWID as msg_id
-            FROM message m
-            JOIN chat_message_join cmj ON m.ROWID = cmj.message_id
-            JOIN chat_participants cp ON cmj.chat_id = cp.chat_id
-            WHERE cp.participant_count = 1
-        ),
-        response_pairs AS (
+    d['fast_responders'] = q_imessage("""
+        WITH response_pairs AS (
             SELECT m.handle_id,
                    (m.date/1000000000+978307200) ts,
                    m.is_from_me,
                    LAG(m.date/1000000000+978307200) OVER (PARTITION BY m.handle_id ORDER BY m.date) pt,
                    LAG(m.is_from_me) OVER (PARTITION BY m.handle_id ORDER BY m.date) pf
-            FROM message m
-            WHERE (m.date/1000000000+978307200) > {ts_start} AND (m.date/1000000000+978307200) < {ts_end}
-            AND m.ROWID IN (SELECT msg_id FROM one_on_one_messages)
+            FROM message m JOIN one_on_one_messages oom ON oom.msg_id = m.ROWID
+            WHERE m.date >= :start AND m.date < :end
         )
         SELECT h.id, AVG(rp.ts - rp.pt)/60.0 as avg_resp_min, COUNT(*) as reply_count
         FROM response_pairs rp
         JOIN handle h ON rp.handle_id = h.ROWID
         WHERE rp.is_from_me = 0 AND rp.pf = 1
         AND (rp.ts - rp.pt) BETWEEN 10 AND 86400
-        AND NOT (LENGTH(REPLACE(REPLACE(h.id, '+', ''), '-', '')) BETWEEN 5 AND 6 AND REPLACE(REPLACE(h.id, '+', ''), '-', '') GLOB '[0-9]*')
-        AND h.id NOT LIKE 'urn:%'
+        AND rp.handle_id IN (SELECT rid FROM good_handles)
         GROUP BY h.id
         HAVING reply_count >= 50
         ORDER BY avg_resp_min ASC
         LIMIT 10
-    """)
+    """, bounds)
 
     # Per-person initiation breakdown (WHO TEXTS FIRST per person)
-    d['initiation_breakdown'] = q_imessage(f"""
-        WITH chat_participants AS (
-            SELECT chat_id, COUNT(*) as participant_count
-            FROM chat_handle_join GROUP BY chat_id
-        ),
-        one_on_one_messages AS (
-            SELECT m.ROWID as msg_id
-            FROM message m
-            JOIN chat_message_join cmj ON m.ROWID = cmj.message_id
-            JOIN chat_participants cp ON cmj.chat_id = cp.chat_id
-            WHERE cp.participant_count = 1
-        ),
-        conversation_starts AS (
+    d['initiation_breakdown'] = q_imessage("""
+        WITH conversation_starts AS (
             SELECT m.handle_id, m.is_from_me,
                    (m.date/1000000000+978307200) ts,
                    LAG(m.date/1000000000+978307200) OVER (PARTITION BY m.handle_id ORDER BY m.date) prev_ts
-            FROM message m
-            WHERE (m.date/1000000000+978307200) > {ts_start} AND (m.date/1000000000+978307200) < {ts_end}
-            AND m.ROWID IN (SELECT msg_id FROM one_on_one_messages)
+            FROM message m JOIN one_on_one_messages oom ON oom.msg_id = m.ROWID
+            WHERE m.date >= :start AND m.date < :end
         )
         SELECT h.id,
                SUM(CASE WHEN cs.is_from_me = 1 THEN 1 ELSE 0 END) as you_started,
@@ -440,224 +506,131 @@ def analyze_imessage(ts_start, ts_end, ts_jun):
         FROM conversation_starts cs
         JOIN handle h ON cs.handle_id = h.ROWID
         WHERE (cs.prev_ts IS NULL OR (cs.ts - cs.prev_ts) > 14400)
-        AND NOT (LENGTH(REPLACE(REPLACE(h.id, '+', ''), '-', '')) BETWEEN 5 AND 6 AND REPLACE(REPLACE(h.id, '+', ''), '-', '') GLOB '[0-9]*')
-        AND h.id NOT LIKE 'urn:%'
+        AND cs.handle_id IN (SELECT rid FROM good_handles)
         GROUP BY h.id
         HAVING total_convos >= 5
         ORDER BY total_convos DESC
         LIMIT 20
-    """)
+    """, bounds)
 
-    # Emojis (batch query)
+    # Emojis + words (one pass over sent messages)
     emojis = ['😂','❤️','😭','🔥','💀','✨','🙏','👀','💯','😈']
-    emoji_cases = ', '.join([f"SUM(CASE WHEN text LIKE '%{e}%' THEN 1 ELSE 0 END)" for e in emojis])
-    r = q_imessage(f"SELECT {emoji_cases} FROM message WHERE (date/1000000000+978307200)>{ts_start} AND (date/1000000000+978307200)<{ts_end} AND is_from_me=1")
-    d['emoji'] = dict(zip(emojis, r[0])) if r else {e: 0 for e in emojis}
-
-    # Words
-    r = q_imessage(f"""
-        SELECT COUNT(*), COALESCE(SUM(LENGTH(text) - LENGTH(REPLACE(text, ' ', ''))), 0)
-        FROM message
-        WHERE (date/1000000000+978307200)>{ts_start} AND (date/1000000000+978307200)<{ts_end}
-        AND is_from_me=1 AND text IS NOT NULL AND LENGTH(text) > 0
+    emoji_cases = ', '.join([f"SUM(CASE WHEN instr(text, '{e}') > 0 THEN 1 ELSE 0 END)" for e in emojis])
+    is_words = """text IS NOT NULL AND LENGTH(text) > 0
         AND text NOT LIKE 'Loved "%' AND text NOT LIKE 'Liked "%'
         AND text NOT LIKE 'Disliked "%' AND text NOT LIKE 'Laughed at "%'
         AND text NOT LIKE 'Emphasized "%' AND text NOT LIKE 'Questioned "%'
-        AND text NOT LIKE '%￼%'
-    """)
-    d['words'] = (r[0][0] or 0) + (r[0][1] or 0)
-
-    # Busiest day
-    r = q_imessage(f"SELECT DATE(datetime((date/1000000000+978307200),'unixepoch','localtime')) d, COUNT(*) c FROM message WHERE (date/1000000000+978307200)>{ts_start} AND (date/1000000000+978307200)<{ts_end} GROUP BY d ORDER BY c DESC LIMIT 1")
-    d['busiest_day'] = (r[0][0], r[0][1]) if r else None
-
-    # Starter %
+        AND text NOT LIKE '%￼%'"""
     r = q_imessage(f"""
-        WITH chat_participants AS (
-            SELECT chat_id, COUNT(*) as participant_count
-            FROM chat_handle_join GROUP BY chat_id
-        ),
-        one_on_one_messages AS (
-            SELECT m.ROWID as msg_id FROM message m
-            JOIN chat_message_join cmj ON m.ROWID = cmj.message_id
-            JOIN chat_participants cp ON cmj.chat_id = cp.chat_id
-            WHERE cp.participant_count = 1
-        ),
-        convos AS (
-            SELECT m.is_from_me, (m.date/1000000000+978307200) as ts,
-                   LAG(m.date/1000000000+978307200) OVER (PARTITION BY m.handle_id ORDER BY m.date) as prev_ts
-            FROM message m WHERE (m.date/1000000000+978307200)>{ts_start} AND (m.date/1000000000+978307200)<{ts_end}
-            AND m.ROWID IN (SELECT msg_id FROM one_on_one_messages)
-        )
-        SELECT SUM(CASE WHEN is_from_me=1 THEN 1 ELSE 0 END), COUNT(*)
-        FROM convos WHERE prev_ts IS NULL OR (ts - prev_ts) > 14400
-    """)
-    d['starter_pct'] = round((r[0][0] or 0) / max(r[0][1] or 1, 1) * 100) if r and r[0][1] else 50
-
-    # Daily counts
-    daily_counts = q_imessage(f"""
-        SELECT DATE(datetime((date/1000000000+978307200),'unixepoch','localtime')) as d, COUNT(*) as c
-        FROM message WHERE (date/1000000000+978307200)>{ts_start} AND (date/1000000000+978307200)<{ts_end} GROUP BY d ORDER BY d
-    """)
-    d['daily_counts'] = {row[0]: row[1] for row in daily_counts}
+        SELECT {emoji_cases},
+               SUM(CASE WHEN {is_words} THEN 1 ELSE 0 END),
+               SUM(CASE WHEN {is_words} THEN LENGTH(text) - LENGTH(REPLACE(text, ' ', '')) ELSE 0 END)
+        FROM message
+        WHERE date >= :start AND date < :end
+        AND is_from_me=1
+    """, bounds)
+    d['emoji'] = dict(zip(emojis, r[0])) if r else {e: 0 for e in emojis}
+    d['words'] = (r[0][-2] or 0) + (r[0][-1] or 0) if r else 0
 
     # Group stats
-    group_chat_cte = """
-        WITH chat_participants AS (
-            SELECT chat_id, COUNT(*) as participant_count FROM chat_handle_join GROUP BY chat_id
-        ),
-        group_chats AS (
-            SELECT chat_id FROM chat_participants WHERE participant_count >= 2
-        ),
-        group_messages AS (
-            SELECT m.ROWID as msg_id, cmj.chat_id FROM message m
-            JOIN chat_message_join cmj ON m.ROWID = cmj.message_id
-            WHERE cmj.chat_id IN (SELECT chat_id FROM group_chats)
-        )
-    """
-    r = q_imessage(f"""{group_chat_cte}
+    r = q_imessage("""
         SELECT
             (SELECT COUNT(DISTINCT chat_id) FROM group_messages gm
-             JOIN message m ON gm.msg_id = m.ROWID WHERE (m.date/1000000000+978307200)>{ts_start} AND (m.date/1000000000+978307200)<{ts_end}),
+             JOIN message m ON gm.msg_id = m.ROWID WHERE m.date >= :start AND m.date < :end),
             COUNT(*), SUM(CASE WHEN m.is_from_me=1 THEN 1 ELSE 0 END)
-        FROM message m WHERE (m.date/1000000000+978307200)>{ts_start} AND (m.date/1000000000+978307200)<{ts_end}
+        FROM message m WHERE m.date >= :start AND m.date < :end
         AND m.ROWID IN (SELECT msg_id FROM group_messages)
-    """)
+    """, bounds)
     d['group_stats'] = {'count': r[0][0] or 0, 'total': r[0][1] or 0, 'sent': r[0][2] or 0} if r else {'count': 0, 'total': 0, 'sent': 0}
 
     # Group leaderboard
-    r = q_imessage(f"""
-        WITH chat_participants AS (
-            SELECT chat_id, COUNT(*) as participant_count FROM chat_handle_join GROUP BY chat_id
-        ),
-        group_chats AS (
-            SELECT chat_id FROM chat_participants WHERE participant_count >= 2
-        ),
-        group_messages AS (
-            SELECT m.ROWID as msg_id, cmj.chat_id FROM message m
-            JOIN chat_message_join cmj ON m.ROWID = cmj.message_id
-            WHERE cmj.chat_id IN (SELECT chat_id FROM group_chats)
-            AND (m.date/1000000000+978307200)>{ts_start} AND (m.date/1000000000+978307200)<{ts_end}
-        )
+    r = q_imessage("""
         SELECT c.ROWID, c.display_name, COUNT(*),
             (SELECT COUNT(*) FROM chat_handle_join WHERE chat_id = c.ROWID)
         FROM chat c JOIN group_messages gm ON c.ROWID = gm.chat_id
+        JOIN message m ON gm.msg_id = m.ROWID
+        WHERE m.date >= :start AND m.date < :end
         GROUP BY c.ROWID ORDER BY 3 DESC LIMIT 10
-    """)
+    """, bounds)
     d['group_leaderboard'] = []
     for row in r:
         chat_id, display_name, msg_count, participant_count = row
         name = display_name if display_name else f"Group ({participant_count} people)"
         d['group_leaderboard'].append({'name': name, 'msg_count': msg_count})
 
+    close_db(IMESSAGE_DB)
     return d
 
 def analyze_whatsapp(ts_start, ts_end, ts_jun):
     """Analyze WhatsApp data and return stats dict."""
     d = {}
+    bounds = {'start': ts_start, 'end': ts_end, 'jun': ts_jun}  # query parameters
 
     one_on_one_cte = """
         WITH dm_sessions AS (
             SELECT Z_PK, ZCONTACTJID FROM ZWACHATSESSION WHERE ZSESSIONTYPE = 0
-        ),
-        dm_messages AS (
-            SELECT m.Z_PK as msg_id, m.ZCHATSESSION, s.ZCONTACTJID
-            FROM ZWAMESSAGE m JOIN dm_sessions s ON m.ZCHATSESSION = s.Z_PK
         )
     """
 
     # Stats
     raw_stats = q_whatsapp(f"""{one_on_one_cte}
         SELECT COUNT(*), SUM(CASE WHEN m.ZISFROMME=1 THEN 1 ELSE 0 END), SUM(CASE WHEN m.ZISFROMME=0 THEN 1 ELSE 0 END), COUNT(DISTINCT dm.ZCONTACTJID)
-        FROM ZWAMESSAGE m JOIN dm_messages dm ON m.Z_PK = dm.msg_id
-        WHERE m.ZMESSAGEDATE>{ts_start} AND m.ZMESSAGEDATE<{ts_end}
-    """)[0]
+        FROM ZWAMESSAGE m JOIN dm_sessions dm ON m.ZCHATSESSION = dm.Z_PK
+        WHERE m.ZMESSAGEDATE>:start AND m.ZMESSAGEDATE<:end
+    """, bounds)[0]
     d['stats'] = (raw_stats[0] or 0, raw_stats[1] or 0, raw_stats[2] or 0, raw_stats[3] or 0)
 
-    # Top contacts
-    d['top'] = q_whatsapp(f"""{one_on_one_cte}
-        SELECT dm.ZCONTACTJID, COUNT(*) t, SUM(CASE WHEN m.ZISFROMME=1 THEN 1 ELSE 0 END), SUM(CASE WHEN m.ZISFROMME=0 THEN 1 ELSE 0 END)
-        FROM ZWAMESSAGE m JOIN dm_messages dm ON m.Z_PK = dm.msg_id
-        WHERE m.ZMESSAGEDATE>{ts_start} AND m.ZMESSAGEDATE<{ts_end} GROUP BY dm.ZCONTACTJID ORDER BY t DESC LIMIT 20
-    """)
-
-    # Late night
-    d['late'] = q_whatsapp(f"""{one_on_one_cte}
-        SELECT dm.ZCONTACTJID, COUNT(*) n FROM ZWAMESSAGE m
-        JOIN dm_messages dm ON m.Z_PK = dm.msg_id
-        WHERE m.ZMESSAGEDATE>{ts_start} AND m.ZMESSAGEDATE<{ts_end}
-        AND CAST(strftime('%H',datetime(m.ZMESSAGEDATE+{COCOA_OFFSET},'unixepoch','localtime')) AS INT)<5
-        GROUP BY dm.ZCONTACTJID HAVING n>5 ORDER BY n DESC LIMIT 10
-    """)
-
-    # Peak hour
-    r = q_whatsapp(f"SELECT CAST(strftime('%H',datetime(ZMESSAGEDATE+{COCOA_OFFSET},'unixepoch','localtime')) AS INT) h, COUNT(*) c FROM ZWAMESSAGE WHERE ZMESSAGEDATE>{ts_start} AND ZMESSAGEDATE<{ts_end} GROUP BY h ORDER BY c DESC LIMIT 1")
-    d['hour'] = r[0][0] if r else 12
-
-    # Peak day
-    days = ['Sunday','Monday','Tuesday','Wednesday','Thursday','Friday','Saturday']
-    r = q_whatsapp(f"SELECT CAST(strftime('%w',datetime(ZMESSAGEDATE+{COCOA_OFFSET},'unixepoch','localtime')) AS INT) d, COUNT(*) FROM ZWAMESSAGE WHERE ZMESSAGEDATE>{ts_start} AND ZMESSAGEDATE<{ts_end} GROUP BY d ORDER BY 2 DESC LIMIT 1")
-    d['day'] = days[r[0][0]] if r else '???'
-
-    # Ghosted
-    d['ghosted'] = q_whatsapp(f"""{one_on_one_cte}
-        SELECT dm.ZCONTACTJID, SUM(CASE WHEN m.ZISFROMME=0 AND m.ZMESSAGEDATE<{ts_jun} THEN 1 ELSE 0 END) b, SUM(CASE WHEN m.ZISFROMME=0 AND m.ZMESSAGEDATE>={ts_jun} THEN 1 ELSE 0 END) a
-        FROM ZWAMESSAGE m JOIN dm_messages dm ON m.Z_PK = dm.msg_id
-        WHERE m.ZMESSAGEDATE>{ts_start} AND m.ZMESSAGEDATE<{ts_end} GROUP BY dm.ZCONTACTJID HAVING b>10 AND a<3 ORDER BY b DESC LIMIT 10
-    """)
-
-    # Heating up
-    d['heating'] = q_whatsapp(f"""{one_on_one_cte}
-        SELECT dm.ZCONTACTJID, SUM(CASE WHEN m.ZMESSAGEDATE<{ts_jun} THEN 1 ELSE 0 END) h1, SUM(CASE WHEN m.ZMESSAGEDATE>={ts_jun} THEN 1 ELSE 0 END) h2
-        FROM ZWAMESSAGE m JOIN dm_messages dm ON m.Z_PK = dm.msg_id
-        WHERE m.ZMESSAGEDATE>{ts_start} AND m.ZMESSAGEDATE<{ts_end} GROUP BY dm.ZCONTACTJID HAVING h1>20 AND h2>h1*1.5 ORDER BY (h2-h1) DESC LIMIT 10
-    """)
-
-    # Biggest fan
-    d['fan'] = q_whatsapp(f"""{one_on_one_cte}
-        SELECT dm.ZCONTACTJID, SUM(CASE WHEN m.ZISFROMME=0 THEN 1 ELSE 0 END) t, SUM(CASE WHEN m.ZISFROMME=1 THEN 1 ELSE 0 END) y
-        FROM ZWAMESSAGE m JOIN dm_messages dm ON m.Z_PK = dm.msg_id
-        WHERE m.ZMESSAGEDATE>{ts_start} AND m.ZMESSAGEDATE<{ts_end} GROUP BY dm.ZCONTACTJID HAVING t>y*2 AND (t+y)>100 ORDER BY (t*1.0/NULLIF(y,0)) DESC LIMIT 10
-    """)
-
-    # Simp
-    d['simp'] = q_whatsapp(f"""{one_on_one_cte}
-        SELECT dm.ZCONTACTJID, SUM(CASE WHEN m.ZISFROMME=1 THEN 1 ELSE 0 END) y, SUM(CASE WHEN m.ZISFROMME=0 THEN 1 ELSE 0 END) t
-        FROM ZWAMESSAGE m JOIN dm_messages dm ON m.Z_PK = dm.msg_id
-        WHERE m.ZMESSAGEDATE>{ts_start} AND m.ZMESSAGEDATE<{ts_end} GROUP BY dm.ZCONTACTJID HAVING y>t*2 AND (t+y)>100 ORDER BY (y*1.0/NULLIF(t,0)) DESC LIMIT 10
-    """)
-
-    # Response time
+    # Per-contact counts (top, late night, ghosted, heating up, fan, simp)
+    late_hour = local_hour_sql(f"CAST(m.ZMESSAGEDATE+{COCOA_OFFSET} AS INT)", ts_start + COCOA_OFFSET, ts_end + COCOA_OFFSET)
+    rows = q_whatsapp(f"""{one_on_one_cte}
+        SELECT dm.ZCONTACTJID, COUNT(*),
+               SUM(CASE WHEN m.ZISFROMME=1 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN m.ZISFROMME=0 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN {late_hour}<5 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN m.ZISFROMME=0 AND m.ZMESSAGEDATE<:jun THEN 1 ELSE 0 END),
+               SUM(CASE WHEN m.ZISFROMME=0 AND m.ZMESSAGEDATE>=:jun THEN 1 ELSE 0 END),
+               SUM(CASE WHEN m.ZMESSAGEDATE<:jun THEN 1 ELSE 0 END),
+               SUM(CASE WHEN m.ZMESSAGEDATE>=:jun THEN 1 ELSE 0 END)
+        FROM ZWAMESSAGE m JOIN dm_sessions dm ON m.ZCHATSESSION = dm.Z_PK
+        WHERE m.ZMESSAGEDATE>:start AND m.ZMESSAGEDATE<:end
+        GROUP BY dm.ZCONTACTJID
+    """, bounds)
+    d.update(contact_lists(rows))
+
+    # Activity buckets; one scan feeds peak hour, peak day, busiest day and
+    # the daily counts
     r = q_whatsapp(f"""
+        SELECT CAST(ZMESSAGEDATE+{COCOA_OFFSET} AS INT)/{ACTIVITY_BUCKET} b, COUNT(*)
+        FROM ZWAMESSAGE WHERE ZMESSAGEDATE>:start AND ZMESSAGEDATE<:end GROUP BY b ORDER BY b
+    """, bounds)
+    d.update(activity_summary(r))
+
+    # Response time + starter % (one LAG pass)
+    r = q_whatsapp("""
         WITH dm_sessions AS (
             SELECT Z_PK, ZCONTACTJID FROM ZWACHATSESSION WHERE ZSESSIONTYPE = 0
         ),
-        dm_messages AS (
-            SELECT m.Z_PK as msg_id, m.ZCHATSESSION FROM ZWAMESSAGE m
-            JOIN dm_sessions s ON m.ZCHATSESSION = s.Z_PK
-        ),
         g AS (
-            SELECT m.ZMESSAGEDATE ts, m.ZISFROMME, m.ZCHATSESSION,
-                   LAG(m.ZMESSAGEDATE) OVER (PARTITION BY m.ZCHATSESSION ORDER BY m.ZMESSAGEDATE) pt,
-                   LAG(m.ZISFROMME) OVER (PARTITION BY m.ZCHATSESSION ORDER BY m.ZMESSAGEDATE) pf
-            FROM ZWAMESSAGE m JOIN dm_messages dm ON m.Z_PK = dm.msg_id
-            WHERE m.ZMESSAGEDATE>{ts_start} AND m.ZMESSAGEDATE<{ts_end}
+            SELECT m.ZMESSAGEDATE ts, m.ZISFROMME,
+                   LAG(m.ZMESSAGEDATE) OVER w pt,
+                   LAG(m.ZISFROMME) OVER w pf
+            FROM ZWAMESSAGE m JOIN dm_sessions dm ON m.ZCHATSESSION = dm.Z_PK
+            WHERE m.ZMESSAGEDATE>:start AND m.ZMESSAGEDATE<:end
+            WINDOW w AS (PARTITION BY m.ZCHATSESSION ORDER BY m.ZMESSAGEDATE)
         )
-        SELECT AVG(ts-pt)/60.0 FROM g
-        WHERE ZISFROMME=1 AND pf=0 AND (ts-pt)<86400 AND (ts-pt)>10
-    """)
+        SELECT AVG(CASE WHEN ZISFROMME=1 AND pf=0 AND (ts-pt)<86400 AND (ts-pt)>10 THEN ts-pt END)/60.0,
+               SUM(CASE WHEN (pt IS NULL OR (ts-pt) > 14400) AND ZISFROMME=1 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN pt IS NULL OR (ts-pt) > 14400 THEN 1 ELSE 0 END)
+        FROM g
+    """, bounds)
     d['resp'] = int(r[0][0] or 30)
+    d['starter_pct'] = pct(r[0][1] or 0, r[0][2]) if r and r[0][2] else 50
 
     # Per-person response time: who you reply to fastest (YOUR PRIORITY LIST)
-    d['priority_list'] = q_whatsapp(f"""
+    d['priority_list'] = q_whatsapp("""
         WITH dm_sessions AS (
             SELECT Z_PK, ZCONTACTJID FROM ZWACHATSESSION WHERE ZSESSIONTYPE = 0
         ),
-        dm_messages AS (
-            SELECT m.Z_PK as msg_id, m.ZCHATSESSION, s.ZCONTACTJID
-            FROM ZWAMESSAGE m
-            JOIN dm_sessions s ON m.ZCHATSESSION = s.Z_PK
-        ),
         response_pairs AS (
             SELECT dm.ZCONTACTJID,
                    m.ZMESSAGEDATE ts,
@@ -665,8 +638,8 @@ def analyze_whatsapp(ts_start, ts_end, ts_jun):
                    LAG(m.ZMESSAGEDATE) OVER (PARTITION BY m.ZCHATSESSION ORDER BY m.ZMESSAGEDATE) pt,
                    LAG(m.ZISFROMME) OVER (PARTITION BY m.ZCHATSESSION ORDER BY m.ZMESSAGEDATE) pf
             FROM ZWAMESSAGE m
-            JOIN dm_messages dm ON m.Z_PK = dm.msg_id
-            WHERE m.ZMESSAGEDATE > {ts_start} AND m.ZMESSAGEDATE < {ts_end}
+            JOIN dm_sessions dm ON m.ZCHATSESSION = dm.Z_PK
+            WHERE m.ZMESSAGEDATE > :start AND m.ZMESSAGEDATE < :end
         )
         SELECT ZCONTACTJID, AVG(ts - pt)/60.0 as avg_resp_min, COUNT(*) as reply_count
         FROM response_pairs
@@ -676,18 +649,13 @@ def analyze_whatsapp(ts_start, ts_end, ts_jun):
         HAVING reply_count >= 50
         ORDER BY avg_resp_min ASC
         LIMIT 10
-    """)
+    """, bounds)
 
     # Per-person response time: who replies to YOU fastest (WHO DROPS EVERYTHING)
-    d['fast_responders'] = q_whatsapp(f"""
+    d['fast_responders'] = q_whatsapp("""
         WITH dm_sessions AS (
             SELECT Z_PK, ZCONTACTJID FROM ZWACHATSESSION WHERE ZSESSIONTYPE = 0
         ),
-        dm_messages AS (
-            SELECT m.Z_PK as msg_id, m.ZCHATSESSION, s.ZCONTACTJID
-            FROM ZWAMESSAGE m
-            JOIN dm_sessions s ON m.ZCHATSESSION = s.Z_PK
-        ),
         response_pairs AS (
             SELECT dm.ZCONTACTJID,
                    m.ZMESSAGEDATE ts,
@@ -695,8 +663,8 @@ def analyze_whatsapp(ts_start, ts_end, ts_jun):
                    LAG(m.ZMESSAGEDATE) OVER (PARTITION BY m.ZCHATSESSION ORDER BY m.ZMESSAGEDATE) pt,
                    LAG(m.ZISFROMME) OVER (PARTITION BY m.ZCHATSESSION ORDER BY m.ZMESSAGEDATE) pf
             FROM ZWAMESSAGE m
-            JOIN dm_messages dm ON m.Z_PK = dm.msg_id
-            WHERE m.ZMESSAGEDATE > {ts_start} AND m.ZMESSAGEDATE < {ts_end}
+            JOIN dm_sessions dm ON m.ZCHATSESSION = dm.Z_PK
+            WHERE m.ZMESSAGEDATE > :start AND m.ZMESSAGEDATE < :end
         )
         SELECT ZCONTACTJID, AVG(ts - pt)/60.0 as avg_resp_min, COUNT(*) as reply_count
         FROM response_pairs
@@ -706,25 +674,20 @@ def analyze_whatsapp(ts_start, ts_end, ts_jun):
         HAVING reply_count >= 50
         ORDER BY avg_resp_min ASC
         LIMIT 10
-    """)
+    """, bounds)
 
     # Per-person initiation breakdown (WHO TEXTS FIRST per person)
-    d['initiation_breakdown'] = q_whatsapp(f"""
+    d['initiation_breakdown'] = q_whatsapp("""
         WITH dm_sessions AS (
             SELECT Z_PK, ZCONTACTJID FROM ZWACHATSESSION WHERE ZSESSIONTYPE = 0
         ),
-        dm_messages AS (
-            SELECT m.Z_PK as msg_id, m.ZCHATSESSION, s.ZCONTACTJID
-            FROM ZWAMESSAGE m
-            JOIN dm_sessions s ON m.ZCHATSESSION = s.Z_PK
-        ),
         conversation_starts AS (
             SELECT dm.ZCONTACTJID, m.ZISFROMME,
                    m.ZMESSAGEDATE ts,
                    LAG(m.ZMESSAGEDATE) OVER (PARTITION BY m.ZCHATSESSION ORDER BY m.ZMESSAGEDATE) prev_ts
             FROM ZWAMESSAGE m
-            JOIN dm_messages dm ON m.Z_PK = dm.msg_id
-            WHERE m.ZMESSAGEDATE > {ts_start} AND m.ZMESSAGEDATE < {ts_end}
+            JOIN dm_sessions dm ON m.ZCHATSESSION = dm.Z_PK
+            WHERE m.ZMESSAGEDATE > :start AND m.ZMESSAGEDATE < :end
         )
         SELECT ZCONTACTJID,
                SUM(CASE WHEN ZISFROMME = 1 THEN 1 ELSE 0 END) as you_started,
@@ -736,99 +699,115 @@ def analyze_whatsapp(ts_start, ts_end, ts_jun):
         HAVING total_convos >= 5
         ORDER BY total_convos DESC
         LIMIT 20
-    """)
+    """, bounds)
 
-    # Emojis (batch query)
+    # Emojis + words (one pass over sent messages)
     emojis = ['😂','❤️','😭','🔥','💀','✨','🙏','👀','💯','😈']
-    emoji_cases = ', '.join([f"SUM(CASE WHEN ZTEXT LIKE '%{e}%' THEN 1 ELSE 0 END)" for e in emojis])
-    r = q_whatsapp(f"SELECT {emoji_cases} FROM ZWAMESSAGE WHERE ZMESSAGEDATE>{ts_start} AND ZMESSAGEDATE<{ts_end} AND ZISFROMME=1")
-    d['emoji'] = dict(zip(emojis, r[0])) if r else {e: 0 for e in emojis}
-
-    # Words
-    r = q_whatsapp(f"""
-        SELECT COUNT(*), COALESCE(SUM(LENGTH(ZTEXT) - LENGTH(REPLACE(ZTEXT, ' ', ''))), 0)
-        FROM ZWAMESSAGE WHERE ZMESSAGEDATE>{ts_start} AND ZMESSAGEDATE<{ts_end} AND ZISFROMME=1
-        AND ZTEXT IS NOT NULL AND LENGTH(ZTEXT) > 0
-    """)
-    d['words'] = (r[0][0] or 0) + (r[0][1] or 0)
-
-    # Busiest day
-    r = q_whatsapp(f"SELECT DATE(datetime(ZMESSAGEDATE+{COCOA_OFFSET},'unixepoch','localtime')) d, COUNT(*) c FROM ZWAMESSAGE WHERE ZMESSAGEDATE>{ts_start} AND ZMESSAGEDATE<{ts_end} GROUP BY d ORDER BY c DESC LIMIT 1")
-    d['busiest_day'] = (r[0][0], r[0][1]) if r else None
-
-    # Starter %
+    emoji_cases = ', '.join([f"SUM(CASE WHEN instr(ZTEXT, '{e}') > 0 THEN 1 ELSE 0 END)" for e in emojis])
     r = q_whatsapp(f"""
-        WITH dm_sessions AS (
-            SELECT Z_PK, ZCONTACTJID FROM ZWACHATSESSION WHERE ZSESSIONTYPE = 0
-        ),
-        dm_messages AS (
-            SELECT m.Z_PK as msg_id, m.ZCHATSESSION FROM ZWAMESSAGE m
-            JOIN dm_sessions s ON m.ZCHATSESSION = s.Z_PK
-        ),
-        convos AS (
-            SELECT m.ZISFROMME, m.ZMESSAGEDATE as ts,
-                   LAG(m.ZMESSAGEDATE) OVER (PARTITION BY m.ZCHATSESSION ORDER BY m.ZMESSAGEDATE) as prev_ts
-            FROM ZWAMESSAGE m JOIN dm_messages dm ON m.Z_PK = dm.msg_id
-            WHERE m.ZMESSAGEDATE>{ts_start} AND m.ZMESSAGEDATE<{ts_end}
-        )
-        SELECT SUM(CASE WHEN ZISFROMME=1 THEN 1 ELSE 0 END), COUNT(*)
-        FROM convos WHERE prev_ts IS NULL OR (ts - prev_ts) > 14400
-    """)
-    d['starter_pct'] = round((r[0][0] or 0) / max(r[0][1] or 1, 1) * 100) if r and r[0][1] else 50
-
-    # Daily counts
-    daily_counts = q_whatsapp(f"""
-        SELECT DATE(datetime(ZMESSAGEDATE+{COCOA_OFFSET},'unixepoch','localtime')) as d, COUNT(*) as c
-        FROM ZWAMESSAGE WHERE ZMESSAGEDATE>{ts_start} AND ZMESSAGEDATE<{ts_end} GROUP BY d ORDER BY d
-    """)
-    d['daily_counts'] = {row[0]: row[1] for row in daily_counts}
+        SELECT {emoji_cases},
+               SUM(CASE WHEN LENGTH(ZTEXT) > 0 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN LENGTH(ZTEXT) > 0 THEN LENGTH(ZTEXT) - LENGTH(REPLACE(ZTEXT, ' ', '')) ELSE 0 END)
+        FROM ZWAMESSAGE WHERE ZMESSAGEDATE>:start AND ZMESSAGEDATE<:end AND ZISFROMME=1
+    """, bounds)
+    d['emoji'] = dict(zip(emojis, r[0])) if r else {e: 0 for e in emojis}
+    d['words'] = (r[0][-2] or 0) + (r[0][-1] or 0) if r else 0
 
     # Group stats
-    group_chat_cte = """
+    r = q_whatsapp("""
         WITH group_sessions AS (
             SELECT Z_PK FROM ZWACHATSESSION WHERE ZSESSIONTYPE = 1
-        ),
-        group_messages AS (
-            SELECT m.Z_PK as msg_id, m.ZCHATSESSION FROM ZWAMESSAGE m
-            JOIN group_sessions s ON m.ZCHATSESSION = s.Z_PK
         )
-    """
-    r = q_whatsapp(f"""{group_chat_cte}
-        SELECT
-            (SELECT COUNT(DISTINCT gm.ZCHATSESSION) FROM group_messages gm
-             JOIN ZWAMESSAGE m ON m.Z_PK = gm.msg_id WHERE m.ZMESSAGEDATE>{ts_start} AND m.ZMESSAGEDATE<{ts_end}),
-            COUNT(*), SUM(CASE WHEN m.ZISFROMME=1 THEN 1 ELSE 0 END)
-        FROM ZWAMESSAGE m WHERE m.ZMESSAGEDATE>{ts_start} AND m.ZMESSAGEDATE<{ts_end}
-        AND m.Z_PK IN (SELECT msg_id FROM group_messages)
-    """)
+        SELECT COUNT(DISTINCT m.ZCHATSESSION), COUNT(*), SUM(CASE WHEN m.ZISFROMME=1 THEN 1 ELSE 0 END)
+        FROM ZWAMESSAGE m JOIN group_sessions s ON m.ZCHATSESSION = s.Z_PK
+        WHERE m.ZMESSAGEDATE>:start AND m.ZMESSAGEDATE<:end
+    """, bounds)
     d['group_stats'] = {'count': r[0][0] or 0, 'total': r[0][1] or 0, 'sent': r[0][2] or 0} if r else {'count': 0, 'total': 0, 'sent': 0}
 
     # Group leaderboard
-    r = q_whatsapp(f"""
+    r = q_whatsapp("""
         WITH group_sessions AS (
             SELECT Z_PK, ZPARTNERNAME FROM ZWACHATSESSION WHERE ZSESSIONTYPE = 1
         )
         SELECT s.Z_PK, s.ZPARTNERNAME, COUNT(*)
         FROM ZWAMESSAGE m JOIN group_sessions s ON m.ZCHATSESSION = s.Z_PK
-        WHERE m.ZMESSAGEDATE>{ts_start} AND m.ZMESSAGEDATE<{ts_end} GROUP BY s.Z_PK ORDER BY 3 DESC LIMIT 10
-    """)
+        WHERE m.ZMESSAGEDATE>:start AND m.ZMESSAGEDATE<:end GROUP BY s.Z_PK ORDER BY 3 DESC LIMIT 10
+    """, bounds)
     d['group_leaderboard'] = []
     for row in r:
         chat_id, name, msg_count = row
         d['group_leaderboard'].append({'name': name or "Unnamed Group", 'msg_count': msg_count})
 
+    close_db(WHATSAPP_DB)
     return d
 
+def analysis_cache_key(db_path, args):
+    """Stat signature of a message database (WAL included, new messages land
+    there first) and of this script, plus the analyzed range and timezone."""
+    key = [args, time.timezone, time.altzone, time.tzname]
+    for path in (db_path, db_path + '-wal', os.path.abspath(__file__)):
+        try:
+            st = os.stat(path)
+            key.append((path, st.st_mtime_ns, st.st_size))
+        except OSError:
+            pass
+    return tuple(key)
+
+def cached_analysis(name, analyze, db_path, *args):
+    """Run analyze(*args), reusing the last run's result if nothing it depends on has changed."""
+    cache_file = os.path.join(ANALYSIS_CACHE_DIR, f"combined_{name}.pickle")
+    key = analysis_cache_key(db_path, args)
+    try:
+        with open(cache_file, 'rb') as f:
+            cached_key, d = pickle.load(f)
+        if cached_key == key:
+            close_db(db_path)
+            return d
+    except:
+        pass
+
+    d = analyze(*args)
+
+    # Save for next time: owner-only permissions, swapped into place atomically
+    try:
+        os.makedirs(ANALYSIS_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{cache_file}.{os.getpid()}.tmp"
+        with os.fdopen(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as f:
+            pickle.dump((key, d), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_file)
+    except:
+        pass
+    return d
+
+SOURCE_ICONS = {'imessage': '📱', 'whatsapp': '💬'}
+SAVE_BTN = '''<button class="slide-save-btn" onclick="saveSlide(this.parentElement, '{}', this)"><svg class="save-icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><rect x="3" y="3" width="18" height="18" rx="2"/><circle cx="8.5" cy="8.5" r="1.5"/><path d="M21 15l-5-5L5 21"/></svg> Save</button>'''
+CONTRIB_MIN_DAYS = 5  # fewer active days than this skip the full contribution graph
+MONTH_ABBRS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+# Per-contact lists the analyzers return, each row keyed by handle first
+CONTACT_LISTS = ('top', 'late', 'ghosted', 'heating', 'fan', 'simp',
+                 'priority_list', 'fast_responders', 'initiation_breakdown')
+
 def merge_data(imessage_data, whatsapp_data, imessage_contacts, whatsapp_contacts, has_imessage, has_whatsapp):
     """Merge iMessage and WhatsApp data into combined stats."""
     d = {}
 
-    # Helper to create unified contact lookup
-    def get_name(handle, source='imessage'):
-        if source == 'imessage':
-            return get_name_imessage(handle, imessage_contacts)
-        else:
-            return get_name_whatsapp(handle, whatsapp_contacts)
+    # The same handles recur across every list below, so each platform's
+    # handles are named once up front and the merges just look them up
+    def resolve_names(data, get_name, contacts):
+        handles = {row[0] for key in CONTACT_LISTS for row in data.get(key, [])}
+        return {h: get_name(h, contacts) for h in handles}
+    im_names = resolve_names(imessage_data, get_name_imessage, imessage_contacts) if has_imessage else {}
+    wa_names = resolve_names(whatsapp_data, get_name_whatsapp, whatsapp_contacts) if has_whatsapp else {}
+
+    def named_rows(key):
+        """Rows of one list from both platforms, handle swapped for a name."""
+        if has_imessage:
+            for h, *rest in imessage_data.get(key, []):
+                yield (im_names[h], *rest)
+        if has_whatsapp:
+            for h, *rest in whatsapp_data.get(key, []):
+                yield (wa_names[h], *rest)
 
     # Merge stats
     im_stats = imessage_data.get('stats', (0, 0, 0, 0)) if has_imessage else (0, 0, 0, 0)
@@ -846,11 +825,11 @@ def merge_data(imessage_data, whatsapp_data, imessage_contacts, whatsapp_contact
     top_combined = []
     if has_imessage:
         for h, t, s, r in imessage_data.get('top', []):
-            name = get_name(h, 'imessage')
+            name = im_names[h]
             top_combined.append({'name': name, 'total': t, 'sent': s, 'received': r, 'source': 'imessage', 'handle': h})
     if has_whatsapp:
         for h, t, s, r in whatsapp_data.get('top', []):
-            name = get_name(h, 'whatsapp')
+            name = wa_names[h]
             top_combined.append({'name': name, 'total': t, 'sent': s, 'received': r, 'source': 'whatsapp', 'handle': h})
 
     # Sort by total and dedupe by name (keep higher count)
@@ -859,21 +838,21 @@ def merge_data(imessage_data, whatsapp_data, imessage_contacts, whatsapp_contact
         name = entry['name']
         if name not in name_counts or entry['total'] > name_counts[name]['total']:
             name_counts[name] = entry
-    d['top'] = sorted(name_counts.values(), key=lambda x: -x['total'])[:10]
+    d['top'] = heapq.nlargest(10, name_counts.values(), key=lambda x: x['total'])
 
     # Merge late night
     late_combined = []
     if has_imessage:
         for h, n in imessage_data.get('late', []):
-            late_combined.append((get_name(h, 'imessage'), n, 'imessage'))
+            late_combined.append((im_names[h], n, 'imessage'))
     if has_whatsapp:
         for h, n in whatsapp_data.get('late', []):
-            late_combined.append((get_name(h, 'whatsapp'), n, 'whatsapp'))
+            late_combined.append((wa_names[h], n, 'whatsapp'))
     name_counts = {}
     for name, count, source in late_combined:
         if name not in name_counts or count > name_counts[name][1]:
             name_counts[name] = (name, count, source)
-    d['late'] = sorted(name_counts.values(), key=lambda x: -x[1])[:5]
+    d['late'] = heapq.nlargest(5, name_counts.values(), key=lambda x: x[1])
 
     # Use dominant platform for hour/day (whichever has more messages)
     if im_stats[0] >= wa_stats[0] and has_imessage:
@@ -887,97 +866,45 @@ def merge_data(imessage_data, whatsapp_data, imessage_contacts, whatsapp_contact
         d['day'] = '???'
 
     # Merge ghosted
-    ghosted_combined = []
-    if has_imessage:
-        for h, b, a in imessage_data.get('ghosted', []):
-            ghosted_combined.append((get_name(h, 'imessage'), b, a))
-    if has_whatsapp:
-        for h, b, a in whatsapp_data.get('ghosted', []):
-            ghosted_combined.append((get_name(h, 'whatsapp'), b, a))
-    d['ghosted'] = sorted(ghosted_combined, key=lambda x: -x[1])[:5]
+    d['ghosted'] = heapq.nlargest(5, named_rows('ghosted'), key=lambda x: x[1])
 
     # Merge heating
-    heating_combined = []
-    if has_imessage:
-        for h, h1, h2 in imessage_data.get('heating', []):
-            heating_combined.append((get_name(h, 'imessage'), h1, h2))
-    if has_whatsapp:
-        for h, h1, h2 in whatsapp_data.get('heating', []):
-            heating_combined.append((get_name(h, 'whatsapp'), h1, h2))
-    d['heating'] = sorted(heating_combined, key=lambda x: -(x[2] - x[1]))[:5]
+    d['heating'] = heapq.nlargest(5, named_rows('heating'), key=lambda x: x[2] - x[1])
 
     # Merge fans
-    fan_combined = []
-    if has_imessage:
-        for h, t, y in imessage_data.get('fan', []):
-            fan_combined.append((get_name(h, 'imessage'), t, y))
-    if has_whatsapp:
-        for h, t, y in whatsapp_data.get('fan', []):
-            fan_combined.append((get_name(h, 'whatsapp'), t, y))
-    d['fan'] = sorted(fan_combined, key=lambda x: -(x[1] / max(x[2], 1)))[:5]
+    d['fan'] = heapq.nlargest(5, named_rows('fan'), key=lambda x: x[1] / max(x[2], 1))
 
     # Merge simps
-    simp_combined = []
-    if has_imessage:
-        for h, y, t in imessage_data.get('simp', []):
-            simp_combined.append((get_name(h, 'imessage'), y, t))
-    if has_whatsapp:
-        for h, y, t in whatsapp_data.get('simp', []):
-            simp_combined.append((get_name(h, 'whatsapp'), y, t))
-    d['simp'] = sorted(simp_combined, key=lambda x: -(x[1] / max(x[2], 1)))[:5]
+    d['simp'] = heapq.nlargest(5, named_rows('simp'), key=lambda x: x[1] / max(x[2], 1))
 
-    # Merge priority_list (who you reply to fastest)
-    priority_combined = []
-    if has_imessage:
-        for h, t, c in imessage_data.get('priority_list', []):
-            priority_combined.append((get_name(h, 'imessage'), t, c))
-    if has_whatsapp:
-        for h, t, c in whatsapp_data.get('priority_list', []):
-            priority_combined.append((get_name(h, 'whatsapp'), t, c))
-    # Sort by response time (ascending = fastest first)
-    d['priority_list'] = sorted(priority_combined, key=lambda x: x[1])[:5]
+    # Merge priority_list (who you reply to fastest), fastest first
+    d['priority_list'] = heapq.nsmallest(5, named_rows('priority_list'), key=lambda x: x[1])
 
     # Merge fast_responders (who replies to YOU fastest)
-    fast_combined = []
-    if has_imessage:
-        for h, t, c in imessage_data.get('fast_responders', []):
-            fast_combined.append((get_name(h, 'imessage'), t, c))
-    if has_whatsapp:
-        for h, t, c in whatsapp_data.get('fast_responders', []):
-            fast_combined.append((get_name(h, 'whatsapp'), t, c))
-    d['fast_responders'] = sorted(fast_combined, key=lambda x: x[1])[:5]
+    d['fast_responders'] = heapq.nsmallest(5, named_rows('fast_responders'), key=lambda x: x[1])
 
-    # Merge initiation_breakdown (who texts first per person)
-    initiation_combined = []
-    if has_imessage:
-        for h, y, t, tc in imessage_data.get('initiation_breakdown', []):
-            initiation_combined.append((get_name(h, 'imessage'), y, t, tc))
-    if has_whatsapp:
-        for h, y, t, tc in whatsapp_data.get('initiation_breakdown', []):
-            initiation_combined.append((get_name(h, 'whatsapp'), y, t, tc))
-    # Sort by total conversations (most active relationships first)
-    d['initiation_breakdown'] = sorted(initiation_combined, key=lambda x: -x[3])[:20]
-
-    # Weighted average response time
-    im_resp = imessage_data.get('resp', 30) if has_imessage else 30
-    wa_resp = whatsapp_data.get('resp', 30) if has_whatsapp else 30
+    # Merge initiation_breakdown (who texts first per person), most active first
+    d['initiation_breakdown'] = heapq.nlargest(20, named_rows('initiation_breakdown'), key=lambda x: x[3])
+
+    # Weighted average response time (a lone platform's value stands as is)
     im_weight = im_stats[0]
     wa_weight = wa_stats[0]
     total_weight = im_weight + wa_weight
-    if total_weight > 0:
-        d['resp'] = int((im_resp * im_weight + wa_resp * wa_weight) / total_weight)
-    else:
+    both = has_imessage and has_whatsapp
+    if both and total_weight > 0:
+        d['resp'] = int((imessage_data.get('resp', 30) * im_weight + whatsapp_data.get('resp', 30) * wa_weight) / total_weight)
+    elif both:
         d['resp'] = 30
+    else:
+        d['resp'] = (imessage_data if has_imessage else whatsapp_data).get('resp', 30)
 
     # Merge emoji counts
-    emoji_counts = {}
+    emoji_counts = Counter()
     if has_imessage:
-        for e, c in imessage_data.get('emoji', {}).items():
-            emoji_counts[e] = emoji_counts.get(e, 0) + c
+        emoji_counts.update(imessage_data.get('emoji', {}))
     if has_whatsapp:
-        for e, c in whatsapp_data.get('emoji', {}).items():
-            emoji_counts[e] = emoji_counts.get(e, 0) + c
-    d['emoji'] = sorted(emoji_counts.items(), key=lambda x: -x[1])[:5]
+        emoji_counts.update(whatsapp_data.get('emoji', {}))
+    d['emoji'] = emoji_counts.most_common(5)
 
     # Merge words
     im_words = imessage_data.get('words', 0) if has_imessage else 0
@@ -993,42 +920,39 @@ def merge_data(imessage_data, whatsapp_data, imessage_contacts, whatsapp_contact
         d['busiest_day'] = im_busiest or wa_busiest
 
     # Weighted starter %
-    im_starter = imessage_data.get('starter_pct', 50) if has_imessage else 50
-    wa_starter = whatsapp_data.get('starter_pct', 50) if has_whatsapp else 50
-    if total_weight > 0:
-        d['starter_pct'] = int((im_starter * im_weight + wa_starter * wa_weight) / total_weight)
-    else:
+    if both and total_weight > 0:
+        d['starter_pct'] = int((imessage_data.get('starter_pct', 50) * im_weight + whatsapp_data.get('starter_pct', 50) * wa_weight) / total_weight)
+    elif both:
         d['starter_pct'] = 50
+    else:
+        d['starter_pct'] = (imessage_data if has_imessage else whatsapp_data).get('starter_pct', 50)
 
     # Merge daily counts
-    daily_counts = {}
+    daily_counts = Counter()
     if has_imessage:
-        for date, count in imessage_data.get('daily_counts', {}).items():
-            daily_counts[date] = daily_counts.get(date, 0) + count
+        daily_counts.update(imessage_data.get('daily_counts', {}))
     if has_whatsapp:
-        for date, count in whatsapp_data.get('daily_counts', {}).items():
-            daily_counts[date] = daily_counts.get(date, 0) + count
+        daily_counts.update(whatsapp_data.get('daily_counts', {}))
     d['daily_counts'] = daily_counts
 
     # Calculate merged daily stats
     if daily_counts:
         all_counts = list(daily_counts.values())
         d['max_daily'] = max(all_counts)
-        d['active_days'] = len([c for c in all_counts if c > 0])
+        d['active_days'] = len(all_counts) - all_counts.count(0)
         d['avg_daily'] = round(sum(all_counts) / max(len(all_counts), 1))
 
-        monthly_counts = {}
+        monthly_counts = Counter()
         for date_str, count in daily_counts.items():
-            month_key = date_str[:7]
-            monthly_counts[month_key] = monthly_counts.get(month_key, 0) + count
+            monthly_counts[date_str[:7]] += count
         if monthly_counts:
             busiest_month_key = max(monthly_counts, key=monthly_counts.get)
-            d['busiest_month'] = datetime.strptime(busiest_month_key, '%Y-%m').strftime('%b')
+            d['busiest_month'] = MONTH_ABBRS[int(busiest_month_key[5:7]) - 1]
         else:
             d['busiest_month'] = 'N/A'
 
-        first_dt = datetime.strptime(min(daily_counts.keys()), '%Y-%m-%d').date()
-        last_dt = datetime.strptime(max(daily_counts.keys()), '%Y-%m-%d').date()
+        first_dt = date.fromisoformat(min(daily_counts))
+        last_dt = date.fromisoformat(max(daily_counts))
         total_days = (last_dt - first_dt).days + 1
         d['quiet_days'] = total_days - d['active_days']
     else:
@@ -1055,7 +979,7 @@ def merge_data(imessage_data, whatsapp_data, imessage_contacts, whatsapp_contact
     if has_whatsapp:
         for g in whatsapp_data.get('group_leaderboard', []):
             group_lb.append({'name': g['name'], 'msg_count': g['msg_count'], 'source': 'whatsapp'})
-    d['group_leaderboard'] = sorted(group_lb, key=lambda x: -x['msg_count'])[:5]
+    d['group_leaderboard'] = heapq.nlargest(5, group_lb, key=lambda x: x['msg_count'])
 
     # Personality (based on combined stats)
     s = d['stats']
@@ -1079,6 +1003,10 @@ def merge_data(imessage_data, whatsapp_data, imessage_contacts, whatsapp_contact
 
     return d
 
+def save_btn(filename):
+    """Button that saves its slide as a PNG under the given filename."""
+    return SAVE_BTN.format(filename)
+
 def gen_html(d, path, year, has_imessage, has_whatsapp):
     """Generate the combined wrapped HTML report."""
     s = d['stats']
@@ -1098,7 +1026,7 @@ def gen_html(d, path, year, has_imessage, has_whatsapp):
 
     # Format busiest day
     if d['busiest_day']:
-        bd = datetime.strptime(d['busiest_day'][0], '%Y-%m-%d')
+        bd = date.fromisoformat(d['busiest_day'][0])
         busiest_str = bd.strftime('%b %d')
         busiest_count = d['busiest_day'][1]
     else:
@@ -1106,9 +1034,10 @@ def gen_html(d, path, year, has_imessage, has_whatsapp):
         busiest_count = 0
 
     # Calculate days elapsed
-    now = datetime.now()
-    year_start = datetime(int(year), 1, 1)
-    days_elapsed = max(1, (now - year_start).days)
+    year_int = int(year)
+    today = datetime.now().date()
+    year_start = date(year_int, 1, 1)
+    days_elapsed = max(1, (today - year_start).days)
     msgs_per_day = s[0] // days_elapsed
 
     words = d['words']
@@ -1148,13 +1077,13 @@ def gen_html(d, path, year, has_imessage, has_whatsapp):
             <div class="stat-item"><span class="stat-num">{s[1]:,}</span><span class="stat-lbl">sent</span></div>
             <div class="stat-item"><span class="stat-num">{s[2]:,}</span><span class="stat-lbl">received</span></div>
         </div>
-        <button class="slide-save-btn" onclick="saveSlide(this.parentElement, 'wrapped_total_messages.png', this)"><svg class="save-icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><rect x="3" y="3" width="18" height="18" rx="2"/><circle cx="8.5" cy="8.5" r="1.5"/><path d="M21 15l-5-5L5 21"/></svg> Save</button>
+        {save_btn("wrapped_total_messages.png")}
         <div class="slide-watermark">wrap2025.com</div>
     </div>''')
 
     # Slide 3: Platform breakdown
     if has_imessage and has_whatsapp:
-        im_pct = round(im_stats[0] / max(s[0], 1) * 100)
+        im_pct = pct(im_stats[0], s[0])
         wa_pct = 100 - im_pct
         slides.append(f'''
         <div class="slide platform-breakdown">
@@ -1174,7 +1103,7 @@ def gen_html(d, path, year, has_imessage, has_whatsapp):
                     <span class="platform-count">{wa_stats[0]:,}</span>
                 </div>
             </div>
-            <button class="slide-save-btn" onclick="saveSlide(this.parentElement, 'wrapped_platform_split.png', this)"><svg class="save-icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><rect x="3" y="3" width="18" height="18" rx="2"/><circle cx="8.5" cy="8.5" r="1.5"/><path d="M21 15l-5-5L5 21"/></svg> Save</button>
+            {save_btn("wrapped_platform_split.png")}
             <div class="slide-watermark">wrap2025.com</div>
         </div>''')
 
@@ -1186,85 +1115,77 @@ def gen_html(d, path, year, has_imessage, has_whatsapp):
         <div class="big-number cyan">{words_display}</div>
         <div class="slide-text">words you typed</div>
         <div class="roast">that's about {pages:,} pages of a novel</div>
-        <button class="slide-save-btn" onclick="saveSlide(this.parentElement, 'wrapped_word_count.png', this)"><svg class="save-icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><rect x="3" y="3" width="18" height="18" rx="2"/><circle cx="8.5" cy="8.5" r="1.5"/><path d="M21 15l-5-5L5 21"/></svg> Save</button>
+        {save_btn("wrapped_word_count.png")}
         <div class="slide-watermark">wrap2025.com</div>
     </div>''')
 
     # Slide 5: Contribution Graph
     if d['daily_counts']:
-        from datetime import date as ddate
-        today = datetime.now().date()
-        year_int = int(year)
-        year_start = ddate(year_int, 1, 1)
-        year_end = today if year_int == today.year else ddate(year_int, 12, 31)
-
-        cal_cells = []
-        first_day = year_start - timedelta(days=(year_start.weekday() + 1) % 7)
-        last_day = year_end + timedelta(days=(5 - year_end.weekday()) % 7)
-
-        current_date = first_day
-        max_count = max(d['daily_counts'].values()) if d['daily_counts'] else 1
-        month_labels = []
-        last_month = None
-        week_idx = 0
-
-        while current_date <= last_day:
-            week_cells = []
-            for _ in range(7):
-                date_str = current_date.strftime('%Y-%m-%d')
-                count = d['daily_counts'].get(date_str, 0)
-
-                if (year_start <= current_date <= year_end) and current_date.month != last_month:
-                    month_labels.append((week_idx, current_date.strftime('%b')))
-                    last_month = current_date.month
-
-                if count == 0:
-                    level = 0
-                elif count <= max_count * 0.25:
-                    level = 1
-                elif count <= max_count * 0.5:
-                    level = 2
-                elif count <= max_count * 0.75:
-                    level = 3
-                else:
-                    level = 4
-
-                in_year = year_start <= current_date <= year_end
-                week_cells.append((date_str, count, level, in_year))
-                current_date += timedelta(days=1)
-
-            cal_cells.append(week_cells)
-            week_idx += 1
-            if week_idx > 60:
-                break
-
-        contrib_html = '<div class="contrib-graph">'
-        contrib_html += '<div class="contrib-container">'
-        contrib_html += '<div class="contrib-days"><span>Sun</span><span>Mon</span><span>Tue</span><span>Wed</span><span>Thu</span><span>Fri</span><span>Sat</span></div>'
-        contrib_html += '<div class="contrib-main">'
-        contrib_html += '<div class="contrib-months">'
-        for week_num, month_name in month_labels:
-            left_px = week_num * 12
-            contrib_html += f'<span style="position:absolute;left:{left_px}px">{month_name}</span>'
-        contrib_html += '</div>'
-        contrib_html += '<div class="contrib-grid">'
-        for week in cal_cells:
-            contrib_html += '<div class="contrib-week">'
-            for date_str, count, level, in_year in week:
-                if in_year:
-                    try:
-                        date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-                        formatted_date = date_obj.strftime('%b %d, %Y')
-                    except:
-                        formatted_date = date_str
-                    msg_text = "message" if count == 1 else "messages"
-                    contrib_html += f'<div class="contrib-cell level-{level}" data-date="{formatted_date}" data-count="{count}" data-msg-text="{msg_text}"></div>'
-                else:
-                    contrib_html += '<div class="contrib-cell empty"></div>'
-            contrib_html += '</div>'
-        contrib_html += '</div></div></div>'
-        contrib_html += '<div class="contrib-legend"><span>Less</span><div class="contrib-cell level-0"></div><div class="contrib-cell level-1"></div><div class="contrib-cell level-2"></div><div class="contrib-cell level-3"></div><div class="contrib-cell level-4"></div><span>More</span></div>'
-        contrib_html += '</div>'
+        if d['active_days'] < CONTRIB_MIN_DAYS:
+            # Too few days to be worth a mostly-empty calendar of ~370 cells
+            day_word = "day" if d['active_days'] == 1 else "days"
+            contrib_html = f'<div class="big-number">{d["active_days"]}</div><div class="roast">active {day_word}. not enough to fill a calendar</div>'
+        else:
+            year_end = today if year_int == today.year else date(year_int, 12, 31)
+
+            cal_cells = []
+            first_day = year_start - timedelta(days=(year_start.weekday() + 1) % 7)
+            last_day = year_end + timedelta(days=(5 - year_end.weekday()) % 7)
+
+            current_date = first_day
+            max_count = d['max_daily'] or 1
+            # Upper bounds of levels 0-3 (0, and up to 25/50/75% of the busiest
+            # day); counts are integers, so the float cutoffs floor exactly
+            level_bounds = [0, max_count // 4, max_count // 2, max_count * 3 // 4]
+            month_labels = []
+            last_month = None
+            week_idx = 0
+
+            daily_counts = d['daily_counts']
+            one_day = timedelta(days=1)
+            while current_date <= last_day:
+                week_cells = []
+                for _ in range(7):
+                    count = daily_counts.get(current_date.isoformat(), 0)
+                    in_year = year_start <= current_date <= year_end
+
+                    if in_year and current_date.month != last_month:
+                        last_month = current_date.month
+                        month_labels.append((week_idx, MONTH_ABBRS[last_month - 1]))
+
+                    level = bisect.bisect_left(level_bounds, count)
+                    week_cells.append((current_date, count, level, in_year))
+                    current_date += one_day
+
+                cal_cells.append(week_cells)
+                week_idx += 1
+                if week_idx > 60:
+                    break
+
+            parts = ['<div class="contrib-graph">',
+                     '<div class="contrib-container">',
+                     '<div class="contrib-days"><span>Sun</span><span>Mon</span><span>Tue</span><span>Wed</span><span>Thu</span><span>Fri</span><span>Sat</span></div>',
+                     '<div class="contrib-main">',
+                     '<div class="contrib-months">']
+            for week_num, month_name in month_labels:
+                left_px = week_num * 12
+                parts.append(f'<span style="position:absolute;left:{left_px}px">{month_name}</span>')
+            parts.append('</div>')
+            parts.append('<div class="contrib-grid">')
+            for week in cal_cells:
+                parts.append('<div class="contrib-week">')
+                for cell_date, count, level, in_year in week:
+                    if in_year:
+                        formatted_date = cell_date.strftime('%b %d, %Y')
+                        msg_text = "message" if count == 1 else "messages"
+                        parts.append(f'<div class="contrib-cell level-{level}" data-date="{formatted_date}" data-count="{count}" data-msg-text="{msg_text}"></div>')
+                    else:
+                        parts.append('<div class="contrib-cell empty"></div>')
+                parts.append('</div>')
+            parts.append('</div></div></div>')
+            parts.append('<div class="contrib-legend"><span>Less</span><div class="contrib-cell level-0"></div><div class="contrib-cell level-1"></div><div class="contrib-cell level-2"></div><div class="contrib-cell level-3"></div><div class="contrib-cell level-4"></div><span>More</span></div>')
+            parts.append('</div>')
+            contrib_html = ''.join(parts)
 
         slides.append(f'''
         <div class="slide contrib-slide">
@@ -1276,14 +1197,14 @@ def gen_html(d, path, year, has_imessage, has_whatsapp):
                 <div class="contrib-stat"><span class="contrib-stat-num">{d['busiest_month']}</span><span class="contrib-stat-lbl">busiest month</span></div>
                 <div class="contrib-stat"><span class="contrib-stat-num">{d['quiet_days']}</span><span class="contrib-stat-lbl">quiet days</span></div>
             </div>
-            <button class="slide-save-btn" onclick="saveSlide(this.parentElement, 'wrapped_contribution_graph.png', this)"><svg class="save-icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><rect x="3" y="3" width="18" height="18" rx="2"/><circle cx="8.5" cy="8.5" r="1.5"/><path d="M21 15l-5-5L5 21"/></svg> Save</button>
+            {save_btn("wrapped_contribution_graph.png")}
             <div class="slide-watermark">wrap2025.com</div>
         </div>''')
 
     # Slide 6: Your #1
     if top:
         t = top[0]
-        source_icon = "📱" if t.get('source') == 'imessage' else "💬"
+        source_icon = SOURCE_ICONS.get(t.get('source'), "💬")
         slides.append(f'''
         <div class="slide gradient-bg">
             <div class="slide-label">// YOUR #1</div>
@@ -1291,13 +1212,13 @@ def gen_html(d, path, year, has_imessage, has_whatsapp):
             <div class="huge-name">{t['name']}</div>
             <div class="big-number yellow">{t['total']:,}</div>
             <div class="slide-text">messages <span class="source-badge">{source_icon}</span></div>
-            <button class="slide-save-btn" onclick="saveSlide(this.parentElement, 'wrapped_your_number_one.png', this)"><svg class="save-icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><rect x="3" y="3" width="18" height="18" rx="2"/><circle cx="8.5" cy="8.5" r="1.5"/><path d="M21 15l-5-5L5 21"/></svg> Save</button>
+            {save_btn("wrapped_your_number_one.png")}
             <div class="slide-watermark">wrap2025.com</div>
         </div>''')
 
         # Slide 7: Top 5
         top5_html = ''.join([
-            f'<div class="rank-item"><span class="rank-num">{i}</span><span class="rank-name">{t["name"]}</span><span class="rank-count">{t["total"]:,}</span><span class="source-icon">{"📱" if t.get("source") == "imessage" else "💬"}</span></div>'
+            f'<div class="rank-item"><span class="rank-num">{i}</span><span class="rank-name">{t["name"]}</span><span class="rank-count">{t["total"]:,}</span><span class="source-icon">{SOURCE_ICONS.get(t.get("source"), "💬")}</span></div>'
             for i, t in enumerate(top[:5], 1)
         ])
         slides.append(f'''
@@ -1305,20 +1226,20 @@ def gen_html(d, path, year, has_imessage, has_whatsapp):
             <div class="slide-label">// INNER CIRCLE</div>
             <div class="slide-text">your top 5 across all platforms</div>
             <div class="rank-list">{top5_html}</div>
-            <button class="slide-save-btn" onclick="saveSlide(this.parentElement, 'wrapped_inner_circle.png', this)"><svg class="save-icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><rect x="3" y="3" width="18" height="18" rx="2"/><circle cx="8.5" cy="8.5" r="1.5"/><path d="M21 15l-5-5L5 21"/></svg> Save</button>
+            {save_btn("wrapped_inner_circle.png")}
             <div class="slide-watermark">wrap2025.com</div>
         </div>''')
 
     # Group chat slides
     gs = d['group_stats']
     if gs['count'] > 0:
-        lurker_pct = round((1 - gs['sent'] / max(gs['total'], 1)) * 100)
+        lurker_pct = 100 - pct(gs['sent'], gs['total'])
         lurker_label = "LURKER" if lurker_pct > 60 else "CONTRIBUTOR" if lurker_pct < 40 else "BALANCED"
         lurker_class = "yellow" if lurker_pct > 60 else "green" if lurker_pct < 40 else "cyan"
 
         if d['group_leaderboard']:
             gc_html = ''.join([
-                f'<div class="rank-item"><span class="rank-num">{i}</span><span class="rank-name">{gc["name"]}</span><span class="rank-count">{gc["msg_count"]:,}</span><span class="source-icon">{"📱" if gc.get("source") == "imessage" else "💬"}</span></div>'
+                f'<div class="rank-item"><span class="rank-num">{i}</span><span class="rank-name">{gc["name"]}</span><span class="rank-count">{gc["msg_count"]:,}</span><span class="source-icon">{SOURCE_ICONS.get(gc.get("source"), "💬")}</span></div>'
                 for i, gc in enumerate(d['group_leaderboard'][:5], 1)
             ])
         else:
@@ -1333,12 +1254,12 @@ def gen_html(d, path, year, has_imessage, has_whatsapp):
             <div class="stat-grid">
                 <div class="stat-item"><span class="stat-num">{gs['total']:,}</span><span class="stat-lbl">total msgs</span></div>
                 <div class="stat-item"><span class="stat-num">{gs['sent']:,}</span><span class="stat-lbl">sent</span></div>
-                <div class="stat-item"><span class="stat-num">{round(gs['sent']/max(gs['total'],1)*100)}%</span><span class="stat-lbl">yours</span></div>
+                <div class="stat-item"><span class="stat-num">{100 - lurker_pct}%</span><span class="stat-lbl">yours</span></div>
             </div>
             <div class="badge {lurker_class}">{lurker_label}</div>
             <div class="slide-text" style="margin-top:18px;">your most active groups</div>
             <div class="rank-list group-list">{gc_html}</div>
-            <button class="slide-save-btn" onclick="saveSlide(this.parentElement, 'wrapped_group_chats.png', this)"><svg class="save-icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><rect x="3" y="3" width="18" height="18" rx="2"/><circle cx="8.5" cy="8.5" r="1.5"/><path d="M21 15l-5-5L5 21"/></svg> Save</button>
+            {save_btn("wrapped_group_chats.png")}
             <div class="slide-watermark">wrap2025.com</div>
         </div>''')
 
@@ -1349,7 +1270,7 @@ def gen_html(d, path, year, has_imessage, has_whatsapp):
         <div class="slide-text">texting personality</div>
         <div class="personality-type">{ptype}</div>
         <div class="roast">"{proast}"</div>
-        <button class="slide-save-btn" onclick="saveSlide(this.parentElement, 'wrapped_personality.png', this)"><svg class="save-icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><rect x="3" y="3" width="18" height="18" rx="2"/><circle cx="8.5" cy="8.5" r="1.5"/><path d="M21 15l-5-5L5 21"/></svg> Save</button>
+        {save_btn("wrapped_personality.png")}
         <div class="slide-watermark">wrap2025.com</div>
     </div>''')
 
@@ -1363,7 +1284,7 @@ def gen_html(d, path, year, has_imessage, has_whatsapp):
         <div class="big-number {starter_class}">{d['starter_pct']}<span class="pct">%</span></div>
         <div class="slide-text">of convos started by you</div>
         <div class="badge {starter_class}">{starter_label}</div>
-        <button class="slide-save-btn" onclick="saveSlide(this.parentElement, 'wrapped_who_texts_first.png', this)"><svg class="save-icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><rect x="3" y="3" width="18" height="18" rx="2"/><circle cx="8.5" cy="8.5" r="1.5"/><path d="M21 15l-5-5L5 21"/></svg> Save</button>
+        {save_btn("wrapped_who_texts_first.png")}
         <div class="slide-watermark">wrap2025.com</div>
     </div>''')
 
@@ -1377,7 +1298,7 @@ def gen_html(d, path, year, has_imessage, has_whatsapp):
         <div class="big-number {resp_class}">{d['resp']}</div>
         <div class="slide-text">minutes</div>
         <div class="badge {resp_class}">{resp_label}</div>
-        <button class="slide-save-btn" onclick="saveSlide(this.parentElement, 'wrapped_response_time.png', this)"><svg class="save-icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><rect x="3" y="3" width="18" height="18" rx="2"/><circle cx="8.5" cy="8.5" r="1.5"/><path d="M21 15l-5-5L5 21"/></svg> Save</button>
+        {save_btn("wrapped_response_time.png")}
         <div class="slide-watermark">wrap2025.com</div>
     </div>''')
 
@@ -1388,7 +1309,7 @@ def gen_html(d, path, year, has_imessage, has_whatsapp):
         <div class="slide-text">most active</div>
         <div class="big-number gradient">{hr_str}</div>
         <div class="slide-text">on <span class="yellow">{d['day']}s</span></div>
-        <button class="slide-save-btn" onclick="saveSlide(this.parentElement, 'wrapped_peak_hours.png', this)"><svg class="save-icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><rect x="3" y="3" width="18" height="18" rx="2"/><circle cx="8.5" cy="8.5" r="1.5"/><path d="M21 15l-5-5L5 21"/></svg> Save</button>
+        {save_btn("wrapped_peak_hours.png")}
         <div class="slide-watermark">wrap2025.com</div>
     </div>''')
 
@@ -1402,7 +1323,7 @@ def gen_html(d, path, year, has_imessage, has_whatsapp):
             <div class="huge-name cyan">{ln[0]}</div>
             <div class="big-number yellow">{ln[1]}</div>
             <div class="slide-text">late night texts</div>
-            <button class="slide-save-btn" onclick="saveSlide(this.parentElement, 'wrapped_3am_bestie.png', this)"><svg class="save-icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><rect x="3" y="3" width="18" height="18" rx="2"/><circle cx="8.5" cy="8.5" r="1.5"/><path d="M21 15l-5-5L5 21"/></svg> Save</button>
+            {save_btn("wrapped_3am_bestie.png")}
             <div class="slide-watermark">wrap2025.com</div>
         </div>''')
 
@@ -1415,35 +1336,35 @@ def gen_html(d, path, year, has_imessage, has_whatsapp):
             <div class="big-number orange">{busiest_str}</div>
             <div class="slide-text"><span class="yellow">{busiest_count:,}</span> messages in one day</div>
             <div class="roast">what happened??</div>
-            <button class="slide-save-btn" onclick="saveSlide(this.parentElement, 'wrapped_busiest_day.png', this)"><svg class="save-icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><rect x="3" y="3" width="18" height="18" rx="2"/><circle cx="8.5" cy="8.5" r="1.5"/><path d="M21 15l-5-5L5 21"/></svg> Save</button>
+            {save_btn("wrapped_busiest_day.png")}
             <div class="slide-watermark">wrap2025.com</div>
         </div>''')
 
     # Biggest fan
     if d['fan']:
         f = d['fan'][0]
-        ratio = round(f[1] / (f[2] + 1), 1)
+        ratio = (f[1] * 10 + (f[2] + 1) // 2) // (f[2] + 1) / 10
         slides.append(f'''
         <div class="slide">
             <div class="slide-label">// BIGGEST FAN</div>
             <div class="slide-text">texts you most</div>
             <div class="huge-name orange">{f[0]}</div>
             <div class="slide-text"><span class="big-number yellow" style="font-size:56px">{ratio}x</span> more than you</div>
-            <button class="slide-save-btn" onclick="saveSlide(this.parentElement, 'wrapped_biggest_fan.png', this)"><svg class="save-icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><rect x="3" y="3" width="18" height="18" rx="2"/><circle cx="8.5" cy="8.5" r="1.5"/><path d="M21 15l-5-5L5 21"/></svg> Save</button>
+            {save_btn("wrapped_biggest_fan.png")}
             <div class="slide-watermark">wrap2025.com</div>
         </div>''')
 
     # Down bad
     if d['simp']:
         si = d['simp'][0]
-        ratio = round(si[1] / (si[2] + 1), 1)
+        ratio = (si[1] * 10 + (si[2] + 1) // 2) // (si[2] + 1) / 10
         slides.append(f'''
         <div class="slide red-bg">
             <div class="slide-label">// DOWN BAD</div>
             <div class="slide-text">you simp for</div>
             <div class="huge-name">{si[0]}</div>
             <div class="slide-text">you text <span class="big-number yellow" style="font-size:56px">{ratio}x</span> more</div>
-            <button class="slide-save-btn" onclick="saveSlide(this.parentElement, 'wrapped_down_bad.png', this)"><svg class="save-icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><rect x="3" y="3" width="18" height="18" rx="2"/><circle cx="8.5" cy="8.5" r="1.5"/><path d="M21 15l-5-5L5 21"/></svg> Save</button>
+            {save_btn("wrapped_down_bad.png")}
             <div class="slide-watermark">wrap2025.com</div>
         </div>''')
 
@@ -1464,7 +1385,7 @@ def gen_html(d, path, year, has_imessage, has_whatsapp):
             <div class="slide-text">who you reply to fastest</div>
             <div class="rank-list">{priority_html}</div>
             <div class="roast" style="margin-top:16px;">these people get the instant reply</div>
-            <button class="slide-save-btn" onclick="saveSlide(this.parentElement, 'wrapped_priority_list.png', this)"><svg class="save-icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><rect x="3" y="3" width="18" height="18" rx="2"/><circle cx="8.5" cy="8.5" r="1.5"/><path d="M21 15l-5-5L5 21"/></svg> Save</button>
+            {save_btn("wrapped_priority_list.png")}
             <div class="slide-watermark">wrap2025.com</div>
         </div>''')
 
@@ -1485,7 +1406,7 @@ def gen_html(d, path, year, has_imessage, has_whatsapp):
             <div class="slide-text">your fastest responders</div>
             <div class="rank-list">{fast_html}</div>
             <div class="roast" style="margin-top:16px;">they see your name and stop what they're doing</div>
-            <button class="slide-save-btn" onclick="saveSlide(this.parentElement, 'wrapped_fast_responders.png', this)"><svg class="save-icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><rect x="3" y="3" width="18" height="18" rx="2"/><circle cx="8.5" cy="8.5" r="1.5"/><path d="M21 15l-5-5L5 21"/></svg> Save</button>
+            {save_btn("wrapped_fast_responders.png")}
             <div class="slide-watermark">wrap2025.com</div>
         </div>''')
 
@@ -1499,9 +1420,9 @@ def gen_html(d, path, year, has_imessage, has_whatsapp):
             you_html = ''
             they_html = ''
             if you_reach_out:
-                you_html = ''.join([f'<div class="rank-item"><span class="rank-num">📤</span><span class="rank-name">{h}</span><span class="rank-count yellow">{int(y/tc*100)}%</span></div>' for h,y,t,tc in you_reach_out])
+                you_html = ''.join([f'<div class="rank-item"><span class="rank-num">📤</span><span class="rank-name">{h}</span><span class="rank-count yellow">{y * 100 // tc}%</span></div>' for h,y,t,tc in you_reach_out])
             if they_find_you:
-                they_html = ''.join([f'<div class="rank-item"><span class="rank-num">📥</span><span class="rank-name">{h}</span><span class="rank-count cyan">{int(t/tc*100)}%</span></div>' for h,y,t,tc in they_find_you])
+                they_html = ''.join([f'<div class="rank-item"><span class="rank-num">📥</span><span class="rank-name">{h}</span><span class="rank-count cyan">{t * 100 // tc}%</span></div>' for h,y,t,tc in they_find_you])
 
             slides.append(f'''
             <div class="slide">
@@ -1511,7 +1432,7 @@ def gen_html(d, path, year, has_imessage, has_whatsapp):
                     {f'<div class="stat-card"><div class="stat-tag">You Always Reach Out</div><div class="rank-list">{you_html}</div></div>' if you_html else ''}
                     {f'<div class="stat-card"><div class="stat-tag">They Always Find You</div><div class="rank-list">{they_html}</div></div>' if they_html else ''}
                 </div>
-                <button class="slide-save-btn" onclick="saveSlide(this.parentElement, 'wrapped_who_texts_first.png', this)"><svg class="save-icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><rect x="3" y="3" width="18" height="18" rx="2"/><circle cx="8.5" cy="8.5" r="1.5"/><path d="M21 15l-5-5L5 21"/></svg> Save</button>
+                {save_btn("wrapped_who_texts_first.png")}
                 <div class="slide-watermark">wrap2025.com</div>
             </div>''')
 
@@ -1523,7 +1444,7 @@ def gen_html(d, path, year, has_imessage, has_whatsapp):
             <div class="slide-label">// HEATING UP</div>
             <div class="slide-text">getting stronger in H2</div>
             <div class="rank-list">{heat_html}</div>
-            <button class="slide-save-btn" onclick="saveSlide(this.parentElement, 'wrapped_heating_up.png', this)"><svg class="save-icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><rect x="3" y="3" width="18" height="18" rx="2"/><circle cx="8.5" cy="8.5" r="1.5"/><path d="M21 15l-5-5L5 21"/></svg> Save</button>
+            {save_btn("wrapped_heating_up.png")}
             <div class="slide-watermark">wrap2025.com</div>
         </div>''')
 
@@ -1536,7 +1457,7 @@ def gen_html(d, path, year, has_imessage, has_whatsapp):
             <div class="slide-text">they chose peace</div>
             <div class="rank-list">{ghost_html}</div>
             <div class="roast" style="margin-top:16px;">before June → after</div>
-            <button class="slide-save-btn" onclick="saveSlide(this.parentElement, 'wrapped_ghosted.png', this)"><svg class="save-icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><rect x="3" y="3" width="18" height="18" rx="2"/><circle cx="8.5" cy="8.5" r="1.5"/><path d="M21 15l-5-5L5 21"/></svg> Save</button>
+            {save_btn("wrapped_ghosted.png")}
             <div class="slide-watermark">wrap2025.com</div>
         </div>''')
 
@@ -1548,7 +1469,7 @@ def gen_html(d, path, year, has_imessage, has_whatsapp):
             <div class="slide-label">// EMOJIS</div>
             <div class="slide-text">your emotional range</div>
             <div class="emoji-row">{emo}</div>
-            <button class="slide-save-btn" onclick="saveSlide(this.parentElement, 'wrapped_emojis.png', this)"><svg class="save-icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><rect x="3" y="3" width="18" height="18" rx="2"/><circle cx="8.5" cy="8.5" r="1.5"/><path d="M21 15l-5-5L5 21"/></svg> Save</button>
+            {save_btn("wrapped_emojis.png")}
             <div class="slide-watermark">wrap2025.com</div>
         </div>''')
 
@@ -1607,12 +1528,11 @@ def gen_html(d, path, year, has_imessage, has_whatsapp):
         <div class="share-hint">share your damage</div>
     </div>''')
 
-    slides_html = ''.join(slides)
     num_slides = len(slides)
 
     favicon = "data:image/svg+xml,<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 100 100'><text y='.9em' font-size='90'>🌯</text></svg>"
 
-    html = f'''<!DOCTYPE html>
+    html_head = f'''<!DOCTYPE html>
 <html><head>
 <meta charset="UTF-8">
 <meta name="viewport" content="width=device-width,initial-scale=1">
@@ -1933,7 +1853,9 @@ body {{ font-family:'Space Grotesk',sans-serif; background:var(--bg); color:var(
 </head>
 <body>
 
-<div class="gallery" id="gallery">{slides_html}</div>
+<div class="gallery" id="gallery">'''
+
+    html_tail = f'''</div>
 <div class="progress" id="progress"></div>
 <div class="nav prev" id="prev">‹</div>
 <div class="nav next" id="next">›</div>
@@ -2068,8 +1990,12 @@ goTo(0);
 </script>
 </body></html>'''
 
+    # Stream the slides between the page shell instead of joining everything
+    # into one document string first
     with open(path, 'w') as f:
-        f.write(html)
+        f.write(html_head)
+        f.writelines(slides)
+        f.write(html_tail)
     return path
 
 def main():
@@ -2095,11 +2021,6 @@ def main():
 
     print(f"\n[*] Platforms: {' + '.join(platforms)}")
 
-    print("[*] Loading contacts...")
-    imessage_contacts = extract_imessage_contacts() if has_imessage else {}
-    whatsapp_contacts = extract_whatsapp_contacts() if has_whatsapp else {}
-    print(f"    ✓ {len(imessage_contacts)} from AddressBook, {len(whatsapp_contacts)} from WhatsApp")
-
     # Determine year
     year = "2024" if args.use_2024 else "2025"
 
@@ -2107,10 +2028,10 @@ def main():
     if not args.use_2024:
         total_2025 = 0
         if has_imessage:
-            r = q_imessage(f"SELECT COUNT(*) FROM message WHERE (date/1000000000+978307200)>{TS_2025_IMESSAGE}")
+            r = q_imessage("SELECT COUNT(*) FROM message WHERE date>=?", (imessage_date_ns(TS_2025_IMESSAGE + 1),))
             total_2025 += r[0][0]
         if has_whatsapp:
-            r = q_whatsapp(f"SELECT COUNT(*) FROM ZWAMESSAGE WHERE ZMESSAGEDATE>{TS_2025_WHATSAPP}")
+            r = q_whatsapp("SELECT COUNT(*) FROM ZWAMESSAGE WHERE ZMESSAGEDATE>?", (TS_2025_WHATSAPP,))
             total_2025 += r[0][0]
 
         if total_2025 < 100:
@@ -2122,27 +2043,35 @@ def main():
 
     spinner = Spinner()
 
-    # Analyze each platform
-    imessage_data = {}
-    whatsapp_data = {}
-
+    # Analyze each platform; the two databases are independent and sqlite3
+    # releases the GIL while it runs a query, so both analyses run at once
+    if year == "2024":
+        imessage_range = (TS_2024_IMESSAGE, TS_2024_END_IMESSAGE, TS_JUN_2024_IMESSAGE)
+        whatsapp_range = (TS_2024_WHATSAPP, TS_2024_END_WHATSAPP, TS_JUN_2024_WHATSAPP)
+    else:
+        imessage_range = (TS_2025_IMESSAGE, TS_2025_END_IMESSAGE, TS_JUN_2025_IMESSAGE)
+        whatsapp_range = (TS_2025_WHATSAPP, TS_2025_END_WHATSAPP, TS_JUN_2025_WHATSAPP)
+    print(f"[*] Analyzing {' + '.join(platforms)} {year}...")
+    spinner.start("Reading message databases...")
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        # Names are only needed by merge_data, and the AddressBook files are
+        # independent of both message databases, so they load alongside.
+        # WhatsApp names come from the WhatsApp connection, so they're read
+        # before its analysis starts
+        contacts_future = pool.submit(extract_imessage_contacts) if has_imessage else None
+        whatsapp_contacts = extract_whatsapp_contacts() if has_whatsapp else {}
+        imessage_future = pool.submit(cached_analysis, 'imessage', analyze_imessage, IMESSAGE_DB, *imessage_range) if has_imessage else None
+        whatsapp_future = pool.submit(cached_analysis, 'whatsapp', analyze_whatsapp, WHATSAPP_DB, *whatsapp_range) if has_whatsapp else None
+        imessage_data = imessage_future.result() if imessage_future else {}
+        whatsapp_data = whatsapp_future.result() if whatsapp_future else {}
+        imessage_contacts = contacts_future.result() if contacts_future else {}
+    counts = []
     if has_imessage:
-        ts_start = TS_2024_IMESSAGE if year == "2024" else TS_2025_IMESSAGE
-        ts_end = TS_2024_END_IMESSAGE if year == "2024" else TS_2025_END_IMESSAGE
-        ts_jun = TS_JUN_2024_IMESSAGE if year == "2024" else TS_JUN_2025_IMESSAGE
-        print(f"[*] Analyzing iMessage {year}...")
-        spinner.start("Reading iMessage database...")
-        imessage_data = analyze_imessage(ts_start, ts_end, ts_jun)
-        spinner.stop(f"{imessage_data['stats'][0]:,} iMessage messages analyzed")
-
+        counts.append(f"{imessage_data['stats'][0]:,} iMessage")
     if has_whatsapp:
-        ts_start = TS_2024_WHATSAPP if year == "2024" else TS_2025_WHATSAPP
-        ts_end = TS_2024_END_WHATSAPP if year == "2024" else TS_2025_END_WHATSAPP
-        ts_jun = TS_JUN_2024_WHATSAPP if year == "2024" else TS_JUN_2025_WHATSAPP
-        print(f"[*] Analyzing WhatsApp {year}...")
-        spinner.start("Reading WhatsApp database...")
-        whatsapp_data = analyze_whatsapp(ts_start, ts_end, ts_jun)
-        spinner.stop(f"{whatsapp_data['stats'][0]:,} WhatsApp messages analyzed")
+        counts.append(f"{whatsapp_data['stats'][0]:,} WhatsApp")
+    spinner.stop(f"{' + '.join(counts)} messages analyzed")
+    print(f"    ✓ {len(imessage_contacts)} contacts from AddressBook, {len(whatsapp_contacts)} from WhatsApp")
 
     print(f"[*] Merging data...")
     spinner.start("Combining platform stats...")